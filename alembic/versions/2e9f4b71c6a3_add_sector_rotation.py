@@ -0,0 +1,45 @@
+"""add sector_rotation
+
+Revision ID: 2e9f4b71c6a3
+Revises: d41a6c8e7f05
+Create Date: 2026-10-19 13:20:55.309712
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e9f4b71c6a3'
+down_revision: Union[str, Sequence[str], None] = 'd41a6c8e7f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sector_rotation',
+    sa.Column('source', sa.SmallInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('sector_id', sa.Integer(), nullable=False),
+    sa.Column('ret_5', sa.REAL(), nullable=True),
+    sa.Column('ret_20', sa.REAL(), nullable=True),
+    sa.Column('ret_60', sa.REAL(), nullable=True),
+    sa.Column('rank_5', sa.SmallInteger(), nullable=True),
+    sa.Column('rank_20', sa.SmallInteger(), nullable=True),
+    sa.Column('rank_60', sa.SmallInteger(), nullable=True),
+    sa.Column('rank_change_5', sa.SmallInteger(), nullable=True),
+    sa.Column('rank_change_20', sa.SmallInteger(), nullable=True),
+    sa.Column('rank_change_60', sa.SmallInteger(), nullable=True),
+    sa.Column('flow_streak', sa.SmallInteger(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['sector_id'], ['sector_dim.id']),
+    sa.PrimaryKeyConstraint('source', 'date', 'sector_id', name='pk_sector_rotation')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sector_rotation')
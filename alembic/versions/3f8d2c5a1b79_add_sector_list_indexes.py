@@ -0,0 +1,39 @@
+"""add sector list indexes
+
+Revision ID: 3f8d2c5a1b79
+Revises: e5b92a7c4f16
+Create Date: 2026-10-19 16:12:27.904311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8d2c5a1b79'
+down_revision: Union[str, Sequence[str], None] = 'e5b92a7c4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 名称模糊搜索 (ILIKE '%关键字%') 使用 trigram GIN 索引
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # 列表默认按 (date, change_percent, id) 排序做 keyset 分页
+    op.create_index('ix_eastmoney_sectors_date_change_id', 'eastmoney_sectors', ['date', 'change_percent', 'id'], unique=False)
+    op.create_index('ix_eastmoney_sectors_name_trgm', 'eastmoney_sectors', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_ths_sectors_date_change_id', 'ths_sectors', ['date', 'change_percent', 'id'], unique=False)
+    op.create_index('ix_ths_sectors_name_trgm', 'ths_sectors', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ths_sectors_name_trgm', table_name='ths_sectors', postgresql_using='gin')
+    op.drop_index('ix_ths_sectors_date_change_id', table_name='ths_sectors')
+    op.drop_index('ix_eastmoney_sectors_name_trgm', table_name='eastmoney_sectors', postgresql_using='gin')
+    op.drop_index('ix_eastmoney_sectors_date_change_id', table_name='eastmoney_sectors')
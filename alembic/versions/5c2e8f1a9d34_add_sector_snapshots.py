@@ -0,0 +1,55 @@
+"""add sector_dim and sector_snapshots
+
+Revision ID: 5c2e8f1a9d34
+Revises: 86699794340a
+Create Date: 2026-10-19 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8f1a9d34'
+down_revision: Union[str, Sequence[str], None] = '86699794340a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sector_dim',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source', sa.SmallInteger(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source', 'name', name='uix_sector_dim_source_name')
+    )
+    op.create_table('sector_snapshots',
+    sa.Column('source', sa.SmallInteger(), nullable=False),
+    sa.Column('fs_type', sa.SmallInteger(), nullable=False),
+    sa.Column('captured_at', sa.DateTime(), nullable=False),
+    sa.Column('sector_id', sa.Integer(), nullable=False),
+    sa.Column('change_percent', sa.REAL(), nullable=False),
+    sa.Column('market_cap', sa.Float(), nullable=True),
+    sa.Column('turnover_rate', sa.REAL(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('net_inflow', sa.REAL(), nullable=True),
+    sa.Column('up_count', sa.SmallInteger(), nullable=True),
+    sa.Column('down_count', sa.SmallInteger(), nullable=True),
+    sa.Column('turnover_ratio', sa.REAL(), nullable=True),
+    sa.ForeignKeyConstraint(['sector_id'], ['sector_dim.id']),
+    sa.PrimaryKeyConstraint('source', 'fs_type', 'captured_at', 'sector_id', name='pk_sector_snapshots')
+    )
+    op.create_index('ix_sector_snapshots_sector_captured_at', 'sector_snapshots', ['sector_id', 'captured_at'], unique=False)
+    op.create_index('ix_sector_snapshots_captured_at_brin', 'sector_snapshots', ['captured_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sector_snapshots_captured_at_brin', table_name='sector_snapshots', postgresql_using='brin')
+    op.drop_index('ix_sector_snapshots_sector_captured_at', table_name='sector_snapshots')
+    op.drop_table('sector_snapshots')
+    op.drop_table('sector_dim')
@@ -0,0 +1,83 @@
+"""compact eastmoney_sectors: drop *_desc columns and store scaled integers
+
+Revision ID: 6d4e1b8f2c90
+Revises: 3f8d2c5a1b79
+Create Date: 2026-10-19 17:05:48.662019
+
+"""
+import logging
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d4e1b8f2c90'
+down_revision: Union[str, Sequence[str], None] = '3f8d2c5a1b79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DESC_COLUMNS = ('market_cap_desc', 'turnover_rate_desc', 'change_percent_desc', 'amount_desc')
+VALUE_COLUMNS = ('market_cap', 'turnover_rate', 'change_percent', 'amount')
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def check_integral_values(bind) -> int:
+    """
+    统计数值含小数的行：这些行多半来自 fltt=2 的上传 (2.50 而非 250)，转为整数列时会被四舍五入而悄悄失真。
+    默认中止迁移并列出示例；确认可以取整后设置 EASTMONEY_ALLOW_ROUNDING=1 重新执行，只记录行数。
+    """
+    fractional = " OR ".join(f"{c} <> round({c})" for c in VALUE_COLUMNS)
+    count = bind.execute(sa.text(f"SELECT count(*) FROM eastmoney_sectors WHERE {fractional}")).scalar()
+    if not count:
+        return 0
+    samples = bind.execute(sa.text(
+        f"SELECT date, name, {', '.join(VALUE_COLUMNS)} FROM eastmoney_sectors WHERE {fractional} ORDER BY date DESC LIMIT 5"
+    )).all()
+    message = f"eastmoney_sectors 中有 {count} 行数值含小数，转为整数列时将被四舍五入，示例: {[tuple(r) for r in samples]}"
+    if os.getenv("EASTMONEY_ALLOW_ROUNDING") != "1":
+        raise RuntimeError(f"{message}。请先修正或删除这些行，或确认可以取整后设置 EASTMONEY_ALLOW_ROUNDING=1 重新执行")
+    logger.warning(f"{message}，已按 EASTMONEY_ALLOW_ROUNDING=1 取整")
+    return count
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    check_integral_values(op.get_bind())
+    # 格式化字符串改为在序列化时由 SectorInfo 生成；对分区主表的修改会同步到全部分区
+    for column in DESC_COLUMNS:
+        op.drop_column('eastmoney_sectors', column)
+    # 东方财富接口 (fltt=1) 返回的本就是整数：元、或放大 100 倍的百分比。
+    # 修改列类型会重写各分区并重建相关索引，同时回收被删除列占用的空间
+    op.execute("""
+        ALTER TABLE eastmoney_sectors
+            ALTER COLUMN market_cap TYPE BIGINT USING round(market_cap)::bigint,
+            ALTER COLUMN turnover_rate TYPE INTEGER USING round(turnover_rate)::integer,
+            ALTER COLUMN change_percent TYPE INTEGER USING round(change_percent)::integer,
+            ALTER COLUMN amount TYPE BIGINT USING round(amount)::bigint
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        ALTER TABLE eastmoney_sectors
+            ALTER COLUMN market_cap TYPE DOUBLE PRECISION,
+            ALTER COLUMN turnover_rate TYPE DOUBLE PRECISION,
+            ALTER COLUMN change_percent TYPE DOUBLE PRECISION,
+            ALTER COLUMN amount TYPE DOUBLE PRECISION
+    """)
+    for column in DESC_COLUMNS:
+        op.add_column('eastmoney_sectors', sa.Column(column, sa.String(), nullable=False, server_default=''))
+    op.execute("""
+        UPDATE eastmoney_sectors SET
+            market_cap_desc = to_char(market_cap / 100000000, 'FM999999999990.00') || ' 亿',
+            turnover_rate_desc = to_char(turnover_rate / 100, 'FM999999990.00') || '%',
+            change_percent_desc = to_char(change_percent / 100, 'FM999999990.00') || '%',
+            amount_desc = to_char(amount / 100000000, 'FM999999999990.00') || ' 亿'
+    """)
+    for column in DESC_COLUMNS:
+        op.alter_column('eastmoney_sectors', column, server_default=None)
@@ -0,0 +1,54 @@
+"""add market_breadth and market_breadth_daily
+
+Revision ID: 7a3c5d92e4b1
+Revises: 2e9f4b71c6a3
+Create Date: 2026-10-19 14:05:38.671420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3c5d92e4b1'
+down_revision: Union[str, Sequence[str], None] = '2e9f4b71c6a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('market_breadth',
+    sa.Column('captured_at', sa.DateTime(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('advancers', sa.Integer(), nullable=False),
+    sa.Column('decliners', sa.Integer(), nullable=False),
+    sa.Column('breadth_ratio', sa.REAL(), nullable=True),
+    sa.Column('net_inflow', sa.Float(), nullable=False),
+    sa.Column('sectors_up', sa.SmallInteger(), nullable=False),
+    sa.Column('sectors_down', sa.SmallInteger(), nullable=False),
+    sa.Column('sector_count', sa.SmallInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('captured_at')
+    )
+    op.create_index(op.f('ix_market_breadth_date'), 'market_breadth', ['date'], unique=False)
+    op.create_table('market_breadth_daily',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('captured_at', sa.DateTime(), nullable=False),
+    sa.Column('advancers', sa.Integer(), nullable=False),
+    sa.Column('decliners', sa.Integer(), nullable=False),
+    sa.Column('breadth_ratio', sa.REAL(), nullable=True),
+    sa.Column('net_inflow', sa.Float(), nullable=False),
+    sa.Column('sectors_up', sa.SmallInteger(), nullable=False),
+    sa.Column('sectors_down', sa.SmallInteger(), nullable=False),
+    sa.Column('sector_count', sa.SmallInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('market_breadth_daily')
+    op.drop_index(op.f('ix_market_breadth_date'), table_name='market_breadth')
+    op.drop_table('market_breadth')
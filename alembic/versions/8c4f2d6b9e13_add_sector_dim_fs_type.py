@@ -0,0 +1,40 @@
+"""add sector_dim.fs_type
+
+Revision ID: 8c4f2d6b9e13
+Revises: f2a7c9e1b5d3
+Create Date: 2026-10-19 21:05:43.218460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4f2d6b9e13'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c9e1b5d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sector_dim', sa.Column('fs_type', sa.SmallInteger(), nullable=True))
+    # 已有板块的类型取自最近一次带 fs_type 的快照 (上传数据的快照 fs_type 为 0，不参与)
+    op.execute("""
+        UPDATE sector_dim d
+        SET fs_type = s.fs_type
+        FROM (
+            SELECT DISTINCT ON (sector_id) sector_id, fs_type
+            FROM sector_snapshots
+            WHERE fs_type <> 0
+            ORDER BY sector_id, captured_at DESC
+        ) s
+        WHERE d.id = s.sector_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sector_dim', 'fs_type')
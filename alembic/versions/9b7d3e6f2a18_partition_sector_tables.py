@@ -0,0 +1,152 @@
+"""partition sector tables by month, add sector_daily_rollups
+
+Revision ID: 9b7d3e6f2a18
+Revises: 5c2e8f1a9d34
+Create Date: 2026-10-19 11:02:17.884105
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b7d3e6f2a18'
+down_revision: Union[str, Sequence[str], None] = '5c2e8f1a9d34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 2
+
+EASTMONEY_COLUMNS = [
+    'id', 'date', 'name', 'market_cap', 'market_cap_desc', 'turnover_rate', 'turnover_rate_desc',
+    'change_percent', 'change_percent_desc', 'amount', 'amount_desc', 'updated_at',
+]
+THS_COLUMNS = [
+    'id', 'date', 'name', 'change_percent', 'net_inflow', 'up_count', 'down_count',
+    'turnover_ratio', 'updated_at',
+]
+
+
+def _eastmoney_columns(table):
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{table}_id_seq'::regclass)"), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('market_cap', sa.Float(), nullable=False),
+        sa.Column('market_cap_desc', sa.String(), nullable=False),
+        sa.Column('turnover_rate', sa.Float(), nullable=False),
+        sa.Column('turnover_rate_desc', sa.String(), nullable=False),
+        sa.Column('change_percent', sa.Float(), nullable=False),
+        sa.Column('change_percent_desc', sa.String(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('amount_desc', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+def _ths_columns(table):
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{table}_id_seq'::regclass)"), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('change_percent', sa.Float(), nullable=False),
+        sa.Column('net_inflow', sa.Float(), nullable=False),
+        sa.Column('up_count', sa.Integer(), nullable=False),
+        sa.Column('down_count', sa.Integer(), nullable=False),
+        sa.Column('turnover_ratio', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    ]
+
+
+TABLES = [
+    ('eastmoney_sectors', 'uix_eastmoney_date_name', _eastmoney_columns, EASTMONEY_COLUMNS),
+    ('ths_sectors', 'uix_ths_date_name', _ths_columns, THS_COLUMNS),
+]
+
+
+def _add_months(d, months):
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_to_legacy(table):
+    """将旧表及其约束改名，腾出原名称给新表"""
+    bind = op.get_bind()
+    op.rename_table(table, f'{table}_legacy')
+    constraints = bind.execute(sa.text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass)"
+    ), {"table": f'{table}_legacy'}).scalars().all()
+    for name in constraints:
+        op.execute(f'ALTER TABLE {table}_legacy RENAME CONSTRAINT {name} TO {name}_legacy')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+
+def _copy_from_legacy(table, columns):
+    cols = ', '.join(columns)
+    op.execute(f'INSERT INTO {table} ({cols}) SELECT {cols} FROM {table}_legacy')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.drop_table(f'{table}_legacy')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table, unique_name, columns_factory, columns in TABLES:
+        _rename_to_legacy(table)
+        op.create_table(table,
+        *columns_factory(table),
+        sa.PrimaryKeyConstraint('id', 'date', name=f'{table}_pkey'),
+        sa.UniqueConstraint('date', 'name', name=unique_name),
+        postgresql_partition_by='RANGE (date)'
+        )
+
+        # 为已有数据所在的月份以及未来几个月创建分区，另建默认分区兜底
+        earliest = bind.execute(sa.text(f'SELECT min(date) FROM {table}_legacy')).scalar() or date.today()
+        month = earliest.replace(day=1)
+        last = _add_months(date.today(), MONTHS_AHEAD)
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            )
+            month = _add_months(month, 1)
+        op.execute(f'CREATE TABLE {table}_pdefault PARTITION OF {table} DEFAULT')
+
+        _copy_from_legacy(table, columns)
+
+    op.create_table('sector_daily_rollups',
+    sa.Column('source', sa.SmallInteger(), nullable=False),
+    sa.Column('fs_type', sa.SmallInteger(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('sector_id', sa.Integer(), nullable=False),
+    sa.Column('samples', sa.SmallInteger(), nullable=False),
+    sa.Column('open_change', sa.REAL(), nullable=False),
+    sa.Column('high_change', sa.REAL(), nullable=False),
+    sa.Column('low_change', sa.REAL(), nullable=False),
+    sa.Column('close_change', sa.REAL(), nullable=False),
+    sa.Column('market_cap', sa.Float(), nullable=True),
+    sa.Column('turnover_rate', sa.REAL(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('net_inflow', sa.REAL(), nullable=True),
+    sa.Column('up_count', sa.SmallInteger(), nullable=True),
+    sa.Column('down_count', sa.SmallInteger(), nullable=True),
+    sa.Column('turnover_ratio', sa.REAL(), nullable=True),
+    sa.ForeignKeyConstraint(['sector_id'], ['sector_dim.id']),
+    sa.PrimaryKeyConstraint('source', 'fs_type', 'date', 'sector_id', name='pk_sector_daily_rollups')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sector_daily_rollups')
+    for table, unique_name, columns_factory, columns in TABLES:
+        _rename_to_legacy(table)
+        op.create_table(table,
+        *columns_factory(table),
+        sa.PrimaryKeyConstraint('id', name=f'{table}_pkey'),
+        sa.UniqueConstraint('date', 'name', name=unique_name)
+        )
+        _copy_from_legacy(table, columns)
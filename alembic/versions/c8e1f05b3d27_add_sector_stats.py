@@ -0,0 +1,37 @@
+"""add sector_stats
+
+Revision ID: c8e1f05b3d27
+Revises: 7a3c5d92e4b1
+Create Date: 2026-10-19 14:52:10.448093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f05b3d27'
+down_revision: Union[str, Sequence[str], None] = '7a3c5d92e4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sector_stats',
+    sa.Column('source', sa.SmallInteger(), nullable=False),
+    sa.Column('sector_id', sa.Integer(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('pending', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['sector_id'], ['sector_dim.id']),
+    sa.PrimaryKeyConstraint('source', 'sector_id', name='pk_sector_stats')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sector_stats')
@@ -0,0 +1,37 @@
+"""add sector history indexes
+
+Revision ID: d41a6c8e7f05
+Revises: 9b7d3e6f2a18
+Create Date: 2026-10-19 11:48:03.127546
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a6c8e7f05'
+down_revision: Union[str, Sequence[str], None] = '9b7d3e6f2a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 覆盖索引：(name, date) 为键，数值列放入 INCLUDE，历史查询只需读取索引
+    op.create_index('ix_eastmoney_sectors_name_date', 'eastmoney_sectors', ['name', 'date'], unique=False,
+                    postgresql_include=['market_cap', 'turnover_rate', 'change_percent', 'amount'])
+    op.create_index('ix_eastmoney_sectors_date_brin', 'eastmoney_sectors', ['date'], unique=False, postgresql_using='brin')
+    op.create_index('ix_ths_sectors_name_date', 'ths_sectors', ['name', 'date'], unique=False,
+                    postgresql_include=['change_percent', 'net_inflow', 'up_count', 'down_count', 'turnover_ratio'])
+    op.create_index('ix_ths_sectors_date_brin', 'ths_sectors', ['date'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ths_sectors_date_brin', table_name='ths_sectors', postgresql_using='brin')
+    op.drop_index('ix_ths_sectors_name_date', table_name='ths_sectors')
+    op.drop_index('ix_eastmoney_sectors_date_brin', table_name='eastmoney_sectors', postgresql_using='brin')
+    op.drop_index('ix_eastmoney_sectors_name_date', table_name='eastmoney_sectors')
@@ -0,0 +1,37 @@
+"""add sector_mapping
+
+Revision ID: e5b92a7c4f16
+Revises: c8e1f05b3d27
+Create Date: 2026-10-19 15:36:42.118205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b92a7c4f16'
+down_revision: Union[str, Sequence[str], None] = 'c8e1f05b3d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sector_mapping',
+    sa.Column('em_sector_id', sa.Integer(), nullable=False),
+    sa.Column('ths_sector_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.REAL(), nullable=False),
+    sa.Column('method', sa.String(length=16), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['em_sector_id'], ['sector_dim.id']),
+    sa.ForeignKeyConstraint(['ths_sector_id'], ['sector_dim.id']),
+    sa.PrimaryKeyConstraint('em_sector_id'),
+    sa.UniqueConstraint('ths_sector_id', name='uix_sector_mapping_ths_sector_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sector_mapping')
@@ -0,0 +1,46 @@
+"""add fetch_runs
+
+Revision ID: f2a7c9e1b5d3
+Revises: 6d4e1b8f2c90
+Create Date: 2026-10-19 18:42:07.531904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9e1b5d3'
+down_revision: Union[str, Sequence[str], None] = '6d4e1b8f2c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fetch_runs',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('source', sa.String(length=16), nullable=False),
+    sa.Column('fs_type', sa.SmallInteger(), nullable=False),
+    sa.Column('trigger', sa.String(length=16), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.Column('pages', sa.SmallInteger(), nullable=False),
+    sa.Column('rows_fetched', sa.Integer(), nullable=False),
+    sa.Column('rows_changed', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.SmallInteger(), nullable=False),
+    sa.Column('bytes', sa.BigInteger(), nullable=False),
+    sa.Column('stages', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_fetch_runs_source_started_at', 'fetch_runs', ['source', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_fetch_runs_source_started_at', table_name='fetch_runs')
+    op.drop_table('fetch_runs')
@@ -0,0 +1,77 @@
+# benchmarks/eastmoney_parse.py
+"""
+东方财富板块解析基准：对比逐条构造 SectorInfo 的旧路径与列式解析路径。
+
+运行：python -m benchmarks.eastmoney_parse [--boards 1000] [--repeat 50]
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from python_cli_starter import market
+from python_cli_starter.schemas import SectorInfo
+
+from .generators import eastmoney_payload
+
+
+def parse_per_item(raw: bytes):
+    """旧路径：解码为 str、标准库 json 解析、逐条清洗并校验为 SectorInfo"""
+    text = raw.decode("utf-8")
+    data = json.loads(text[text.find("{"):text.rfind("}") + 1])
+    sectors = []
+    for item in data["data"]["diff"]:
+        now = datetime.now()
+        sectors.append(SectorInfo(
+            name=str(item.get("f14", "未知板块")),
+            market_cap=market._clean_float(item.get("f20", 0)),
+            turnover_rate=market._clean_float(item.get("f8", 0)),
+            change_percent=market._clean_float(item.get("f3", 0)),
+            amount=market._clean_float(item.get("f6", 0)),
+            date=now.date(),
+            updated_at=now,
+        ))
+    return sectors
+
+
+def parse_columnar(raw: bytes):
+    """新路径：按字节解析为列式数据，并展开为入库用的行"""
+    return market.parse_eastmoney_batch(raw).rows()
+
+
+def parse_columnar_to_models(raw: bytes):
+    """新路径 + 物化为 SectorInfo (仅 API 响应需要)"""
+    return market.parse_eastmoney_batch(raw).to_sectors()
+
+
+CASES = {
+    "per_item": parse_per_item,
+    "columnar": parse_columnar,
+    "columnar+models": parse_columnar_to_models,
+}
+
+
+def run(boards: int = 1000, repeat: int = 50) -> dict:
+    """返回每种实现单次解析的最优耗时 (毫秒)"""
+    raw = eastmoney_payload(boards)
+    return {
+        name: min(timeit.repeat(lambda: func(raw), number=1, repeat=repeat)) * 1000
+        for name, func in CASES.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="东方财富板块解析基准")
+    parser.add_argument("--boards", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args.boards, args.repeat)
+    baseline = results["per_item"]
+    print(f"{args.boards} 个板块，取 {args.repeat} 次中的最优值 (JSON 解码: {'orjson' if market.orjson else 'json'})")
+    for name, ms in results.items():
+        print(f"  {name:<16} {ms:8.3f} ms  ({baseline / ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/generators.py
+"""
+基准测试与模拟数据源共用的合成数据生成器，均由固定种子生成，结果可复现。
+"""
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def eastmoney_items(count: int, seed: int = 42) -> List[Dict]:
+    """东方财富 clist 接口的 diff 条目 (fltt=1，数值均为整数)，按涨跌幅降序"""
+    rng = random.Random(seed)
+    items = [
+        {
+            "f14": f"板块{i:04d}",
+            "f20": rng.randrange(10**9, 10**13),
+            "f8": rng.randrange(0, 3000),
+            "f3": rng.randrange(-1000, 1000),
+            "f6": rng.randrange(10**7, 10**11),
+        }
+        for i in range(count)
+    ]
+    items.sort(key=lambda item: item["f3"], reverse=True)
+    return items
+
+
+def eastmoney_jsonp(items: List[Dict], total: int, callback: str = "jQuery_0") -> str:
+    payload = {"rc": 0, "data": {"total": total, "diff": items}}
+    return f"{callback}({json.dumps(payload, ensure_ascii=False)});"
+
+
+def ths_rows(count: int, seed: int = 42) -> List[Dict]:
+    """同花顺板块行：名称、涨跌幅(%)、成交额(亿元)、净流入(亿元)、上涨/下跌家数"""
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"同花顺板块{i:03d}",
+            "change_percent": round(rng.uniform(-8, 8), 2),
+            "amount": round(rng.uniform(5, 800), 2),
+            "net_inflow": round(rng.uniform(-30, 30), 2),
+            "up_count": rng.randrange(0, 80),
+            "down_count": rng.randrange(0, 80),
+        }
+        for i in range(count)
+    ]
+
+
+def ths_table_html(rows: List[Dict], offset: int = 0) -> str:
+    """与同花顺 ajax 分页一致的表格结构 (每行 8 列以上)"""
+    cells = "".join(
+        f"<tr><td>{offset + i + 1}</td><td><a>{r['name']}</a></td><td>{r['change_percent']}</td>"
+        f"<td>{r['amount'] * 10:.2f}</td><td>{r['amount']}</td><td>{r['net_inflow']}</td>"
+        f"<td>{r['up_count']}</td><td>{r['down_count']}</td><td>领涨股</td></tr>"
+        for i, r in enumerate(rows)
+    )
+    return f'<table class="m-table"><thead><tr><th>序号</th></tr></thead><tbody>{cells}</tbody></table>'
+
+
+def nav_series(fund_code: str, days: int, end: Optional[date] = None) -> List[Dict]:
+    """基金单位净值的随机游走 (仅工作日)，格式与 pingzhongdata 中的 Data_netWorthTrend 一致"""
+    rng = random.Random(fund_code)
+    end = end or date.today()
+    points, day, nav = [], end, 1.0
+    while len(points) < days:
+        if day.weekday() < 5:
+            points.append(day)
+        day -= timedelta(days=1)
+    series = []
+    for d in reversed(points):
+        change = rng.gauss(0.0003, 0.012)
+        nav = max(0.1, nav * (1 + change))
+        # 净值日期为北京时间零点
+        ms = int(datetime(d.year, d.month, d.day, tzinfo=timezone(timedelta(hours=8))).timestamp() * 1000)
+        series.append({"x": ms, "y": round(nav, 4), "equityReturn": round(change * 100, 2), "unitMoney": ""})
+    return series
+
+
+def nav_js(fund_code: str, days: int) -> str:
+    return (
+        f'var fS_name = "模拟基金{fund_code}";var fS_code = "{fund_code}";'
+        f"var Data_netWorthTrend = {json.dumps(nav_series(fund_code, days))};"
+    )
+
+
+def eastmoney_payload(boards: int = 1000, missing_rate: float = 0.01, seed: int = 42) -> bytes:
+    """完整的东方财富 JSONP 响应字节，按 missing_rate 的比例把数值替换为停牌时的 "-" """
+    rng = random.Random(seed)
+    items = eastmoney_items(boards, seed)
+    for item in items:
+        for key in ("f20", "f8", "f3", "f6"):
+            if rng.random() < missing_rate:
+                item[key] = "-"
+    return eastmoney_jsonp(items, boards, "jQuery35107_1700000000000").encode("utf-8")
+
+
+def nav_frame(years: float = 20, seed: int = 42, end: Optional[date] = None) -> pd.DataFrame:
+    """按工作日生成的单位净值序列，结构与 charts.get_historical_fund_data 的返回值一致 (索引为日期，列为 close)"""
+    end = pd.Timestamp(end or date(2026, 10, 16))
+    index = pd.bdate_range(end=end, periods=int(years * 252), name="净值日期")
+    rng = np.random.default_rng(seed)
+    close = np.maximum(0.1, np.cumprod(1 + rng.normal(0.0003, 0.012, len(index))))
+    return pd.DataFrame({"close": close.round(4)}, index=index)
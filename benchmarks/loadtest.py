@@ -0,0 +1,193 @@
+# benchmarks/loadtest.py
+"""
+压测：并发请求 FastAPI 应用，按端点统计吞吐量与 p50/p95/p99 延迟。
+
+默认在进程内通过 ASGITransport 驱动应用 (不经过网络，不触发 lifespan 中的定时任务)，
+并把东方财富、同花顺与基金净值数据源重定向到本地模拟服务 (benchmarks.upstreams)；
+也可用 --base-url 压测已启动的服务，此时需自行以 EASTMONEY_BASE_URL 等环境变量指向模拟服务。
+
+运行：python -m benchmarks.loadtest --concurrency 16 --requests 500 --upstream-latency-ms 30
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from contextlib import ExitStack
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from .upstreams import UpstreamConfig, UpstreamServer, redirect_upstreams
+
+DEFAULT_ENDPOINTS = (
+    "GET /health",
+    "GET /strategies/rsi/000001",
+    "GET /strategies/macd/000001?is_holding=true",
+    "GET /charts/rsi/000001",
+    "GET /market/df_sectors",
+    "GET /market/ths_sectors",
+)
+
+
+class Endpoint(NamedTuple):
+    method: str
+    path: str
+    body: Optional[bytes] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+class EndpointReport(NamedTuple):
+    name: str
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+def parse_endpoint(spec: str) -> Endpoint:
+    """解析 "METHOD /path [JSON 请求体]"，省略方法时为 GET"""
+    parts = spec.strip().split(None, 2)
+    if len(parts) == 1:
+        return Endpoint("GET", parts[0])
+    body = parts[2].encode("utf-8") if len(parts) == 3 else None
+    return Endpoint(parts[0].upper(), parts[1], body)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    endpoints: Sequence[Endpoint],
+    concurrency: int,
+    total_requests: Optional[int] = None,
+    duration: Optional[float] = None,
+) -> Tuple[Dict[str, List[Tuple[float, int]]], float]:
+    """
+    以 concurrency 个并发连接轮流请求各端点，直到完成 total_requests 个请求或运行满 duration 秒。
+    返回 ({端点: [(耗时秒, 状态码)]}, 总耗时)，连接失败的状态码记为 0。
+    """
+    if total_requests is None and duration is None:
+        raise ValueError("total_requests 与 duration 至少指定一个")
+    samples: Dict[str, List[Tuple[float, int]]] = {e.name: [] for e in endpoints}
+    counter = itertools.count()
+    started = perf_counter()
+    deadline = started + duration if duration else None
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if total_requests is not None and i >= total_requests:
+                return
+            if deadline is not None and perf_counter() >= deadline:
+                return
+            endpoint = endpoints[i % len(endpoints)]
+            headers = {"Content-Type": "application/json"} if endpoint.body else None
+            t0 = perf_counter()
+            try:
+                response = await client.request(endpoint.method, endpoint.path, content=endpoint.body, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            samples[endpoint.name].append((perf_counter() - t0, status))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, perf_counter() - started
+
+
+def summarize(samples: Dict[str, List[Tuple[float, int]]], elapsed: float) -> List[EndpointReport]:
+    """按端点汇总；状态码 >= 400 或连接失败计为错误，延迟分位数包含错误请求"""
+    reports = []
+    for name, points in samples.items():
+        if not points:
+            continue
+        latencies = np.array([p[0] for p in points]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        reports.append(EndpointReport(
+            name=name,
+            requests=len(points),
+            errors=sum(1 for _, status in points if status == 0 or status >= 400),
+            rps=len(points) / elapsed if elapsed else 0.0,
+            p50_ms=round(float(p50), 2),
+            p95_ms=round(float(p95), 2),
+            p99_ms=round(float(p99), 2),
+            max_ms=round(float(latencies.max()), 2),
+        ))
+    return reports
+
+
+def format_table(reports: List[EndpointReport], elapsed: float) -> str:
+    width = max([len(r.name) for r in reports] + [8])
+    lines = [f"{'endpoint':<{width}} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+    for r in reports:
+        lines.append(
+            f"{r.name:<{width}} {r.requests:>6} {r.errors:>6} {r.rps:>8.1f} "
+            f"{r.p50_ms:>7.1f}ms {r.p95_ms:>7.1f}ms {r.p99_ms:>7.1f}ms {r.max_ms:>7.1f}ms"
+        )
+    total = sum(r.requests for r in reports)
+    lines.append(f"共 {total} 个请求，耗时 {elapsed:.2f}s，总吞吐 {total / elapsed if elapsed else 0:.1f} req/s")
+    return "\n".join(lines)
+
+
+async def _run(args) -> List[EndpointReport]:
+    endpoints = [parse_endpoint(spec) for spec in (args.endpoint or DEFAULT_ENDPOINTS)]
+    with ExitStack() as stack:
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        else:
+            upstream = stack.enter_context(UpstreamServer(UpstreamConfig(
+                latency_ms=args.upstream_latency_ms,
+                jitter_ms=args.upstream_jitter_ms,
+                error_rate=args.upstream_error_rate,
+                eastmoney_boards=args.eastmoney_boards,
+                nav_days=args.nav_days,
+            )))
+            stack.enter_context(redirect_upstreams(upstream.base_url))
+            from python_cli_starter.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://loadtest", timeout=args.timeout)
+
+        async with client:
+            if args.warmup:
+                await run_load(client, endpoints, min(args.concurrency, args.warmup), total_requests=args.warmup)
+            samples, elapsed = await run_load(client, endpoints, args.concurrency, args.requests, args.duration)
+
+    reports = summarize(samples, elapsed)
+    print(format_table(reports, elapsed))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": elapsed, "concurrency": args.concurrency, "endpoints": [r._asdict() for r in reports]}, f, ensure_ascii=False, indent=2)
+    return reports
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    defaults = UpstreamConfig._field_defaults
+    parser = argparse.ArgumentParser(description="并发压测 API 端点，输出每个端点的吞吐量与 p50/p95/p99 延迟")
+    parser.add_argument("--endpoint", action="append", help='形如 "GET /market/df_sectors" 或 \'POST /path {"k": 1}\'，可重复；默认压测常用读接口')
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=None, help="总请求数 (与 --duration 二选一，默认 500)")
+    parser.add_argument("--duration", type=float, default=None, help="压测时长 (秒)")
+    parser.add_argument("--warmup", type=int, default=0, help="正式计时前的预热请求数")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--base-url", default=None, help="压测已启动的服务，而不是进程内的应用")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--eastmoney-boards", type=int, default=defaults["eastmoney_boards"])
+    parser.add_argument("--nav-days", type=int, default=defaults["nav_days"])
+    parser.add_argument("--json", default=None, help="将结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 500
+
+    reports = asyncio.run(_run(args))
+    sys.exit(0 if reports else 1)
+
+
+if __name__ == "__main__":
+    main()
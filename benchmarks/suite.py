@@ -0,0 +1,280 @@
+# benchmarks/suite.py
+"""
+热点路径基准测试套件：指标计算、信号生成、图表序列化、板块数据解析与入库。
+结果保存为 JSON，compare 子命令对比两次结果，中位数变慢超过阈值时以非零状态码退出，可作为部署前的检查。
+
+运行：
+    python -m benchmarks.suite run --output baseline.json
+    python -m benchmarks.suite run --output current.json [--filter rsi] [--db]
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.10
+
+--db 会对 DATABASE_URL 指向的库执行 save_*_sectors (写入当天日期的合成板块)，请使用已执行过迁移的本地临时库。
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from python_cli_starter import charts, market, schemas
+from python_cli_starter.strategies.bollinger_bands_strategy import calculate_bollinger_bands
+from python_cli_starter.strategies.macd_strategy import calculate_macd
+
+from .generators import eastmoney_payload, nav_frame, ths_rows, ths_table_html
+
+NAV_YEARS = 20
+EASTMONEY_BOARDS = 1000
+THS_BOARDS = 100
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD = 0.10
+
+
+class Case(NamedTuple):
+    name: str
+    # setup 返回被计时的无参函数；setup 本身不计时
+    setup: Callable[[], Callable[[], Any]]
+    params: Dict[str, Any]
+    db: bool = False
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, db: bool = False, **params):
+    def register(setup):
+        CASES.append(Case(name, setup, params, db))
+        return setup
+    return register
+
+
+# --- 指标与信号 ---
+
+@case("charts.calculate_rsi", years=NAV_YEARS)
+def _rsi():
+    frame = nav_frame(NAV_YEARS)
+    return lambda: charts.calculate_rsi(frame, charts.RSI_PERIOD)
+
+
+@case("strategies.calculate_macd", years=NAV_YEARS)
+def _macd():
+    frame = nav_frame(NAV_YEARS)
+    return lambda: calculate_macd(frame, 12, 26, 9)
+
+
+@case("strategies.calculate_bollinger_bands", years=NAV_YEARS)
+def _bollinger():
+    frame = nav_frame(NAV_YEARS)
+    return lambda: calculate_bollinger_bands(frame, 20, 2.0)
+
+
+@case("charts.generate_rsi_signals", years=NAV_YEARS)
+def _rsi_signals():
+    frame = charts.calculate_rsi(nav_frame(NAV_YEARS), charts.RSI_PERIOD)
+    return lambda: charts.generate_rsi_signals(frame)
+
+
+@case("charts.rsi_chart_json", years=NAV_YEARS)
+def _rsi_chart_json():
+    """get_rsi_chart_data 去掉网络请求后的部分：计算 RSI 图表数据并序列化为响应 JSON"""
+    frame = nav_frame(NAV_YEARS)
+    return lambda: schemas.RsiChartResponse(**charts.build_rsi_chart_data(frame.copy())).model_dump_json()
+
+
+# --- 板块数据解析 ---
+
+@case("market.parse_eastmoney_jsonp", boards=EASTMONEY_BOARDS)
+def _parse_eastmoney_models():
+    payload = eastmoney_payload(EASTMONEY_BOARDS)
+    return lambda: market.parse_eastmoney_jsonp(payload)
+
+
+@case("market.parse_eastmoney_batch", boards=EASTMONEY_BOARDS)
+def _parse_eastmoney_batch():
+    payload = eastmoney_payload(EASTMONEY_BOARDS)
+    return lambda: market.parse_eastmoney_batch(payload).rows()
+
+
+@case("market.parse_ths_html", boards=THS_BOARDS)
+def _parse_ths():
+    html = f"<html><body>{ths_table_html(ths_rows(THS_BOARDS))}</body></html>"
+    return lambda: market.parse_ths_html(html)
+
+
+# --- 入库 (需要本地 PostgreSQL) ---
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _run_async(coro):
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def _eastmoney_batches(count: int) -> List[market.EastMoneyBatch]:
+    # 不同种子生成相同板块名称、不同数值的批次
+    return [market.parse_eastmoney_batch(eastmoney_payload(EASTMONEY_BOARDS, seed=seed)) for seed in range(count)]
+
+
+def _ths_batches(count: int) -> list:
+    now = datetime.now()
+    return [
+        market.build_ths_sectors(market.parse_ths_html(ths_table_html(ths_rows(THS_BOARDS, seed=seed))), now)
+        for seed in range(count)
+    ]
+
+
+@case("database.save_eastmoney_sectors.changed", db=True, boards=EASTMONEY_BOARDS)
+def _save_eastmoney_changed():
+    from python_cli_starter.database import save_eastmoney_sectors
+    batches = itertools.cycle(_eastmoney_batches(2))  # 交替写入，每次全部板块都有变化
+    return lambda: _run_async(save_eastmoney_sectors(next(batches), fs_type=2))
+
+
+@case("database.save_eastmoney_sectors.unchanged", db=True, boards=EASTMONEY_BOARDS)
+def _save_eastmoney_unchanged():
+    from python_cli_starter.database import save_eastmoney_sectors
+    batch = _eastmoney_batches(1)[0]
+    _run_async(save_eastmoney_sectors(batch, fs_type=2))
+    return lambda: _run_async(save_eastmoney_sectors(batch, fs_type=2))
+
+
+@case("database.save_ths_sectors.changed", db=True, boards=THS_BOARDS)
+def _save_ths_changed():
+    from python_cli_starter.database import save_ths_sectors
+    batches = itertools.cycle(_ths_batches(2))
+    return lambda: _run_async(save_ths_sectors(next(batches)))
+
+
+# --- 执行与对比 ---
+
+def measure(func: Callable[[], Any], rounds: int) -> Dict[str, Any]:
+    """自动确定每轮调用次数 (每轮约 0.2s)，返回单次调用耗时 (毫秒) 的统计"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_call = [t / number * 1000 for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "unit": "ms",
+        "min": round(min(per_call), 6),
+        "median": round(statistics.median(per_call), 6),
+        "mean": round(statistics.fmean(per_call), 6),
+        "stdev": round(statistics.stdev(per_call), 6) if len(per_call) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "json_decoder": "orjson" if market.orjson else "json",
+    }
+
+
+def run_suite(name_filter: Optional[str] = None, rounds: int = DEFAULT_ROUNDS, db: bool = False) -> Dict[str, Any]:
+    results = {}
+    try:
+        for c in CASES:
+            if (name_filter and name_filter not in c.name) or (c.db and not db):
+                continue
+            stats = measure(c.setup(), rounds)
+            results[c.name] = {**stats, "params": c.params}
+            print(f"{c.name:<45} {stats['median']:>10.3f} ms (min {stats['min']:.3f}, ±{stats['stdev']:.3f})", file=sys.stderr)
+    finally:
+        if _loop is not None:
+            from python_cli_starter.database import engine
+            _loop.run_until_complete(engine.dispose())
+    return {"environment": environment(), "results": results}
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline_ms: float
+    current_ms: float
+    ratio: float
+    regressed: bool
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    """按中位数对比两次结果中共有的用例，current/baseline 超过 1 + threshold 视为退化"""
+    rows = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        ratio = cur["median"] / base["median"] if base["median"] else float("inf")
+        rows.append(Comparison(name, base["median"], cur["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def format_comparison(rows: List[Comparison], threshold: float) -> str:
+    lines = [f"{'case':<45} {'baseline':>11} {'current':>11} {'change':>8}"]
+    for r in rows:
+        flag = "  << 退化" if r.regressed else ""
+        lines.append(f"{r.name:<45} {r.baseline_ms:>9.3f}ms {r.current_ms:>9.3f}ms {(r.ratio - 1):>+8.1%}{flag}")
+    regressed = sum(r.regressed for r in rows)
+    lines.append(f"共 {len(rows)} 个用例，{regressed} 个慢于基线 {threshold:.0%} 以上")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="热点路径基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="执行基准测试并输出 JSON")
+    run.add_argument("--output", "-o", default=None, help="结果文件，默认输出到标准输出")
+    run.add_argument("--filter", "-k", default=None, help="只运行名称包含该字符串的用例")
+    run.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    run.add_argument("--db", action="store_true", help="包含入库用例 (需要 DATABASE_URL 指向本地 PostgreSQL)")
+
+    cmp = sub.add_parser("compare", help="对比两次结果")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="允许的变慢比例，默认 0.10")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        report = run_suite(args.filter, args.rounds, args.db)
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare_results(baseline, current, args.threshold)
+    print(format_comparison(rows, args.threshold))
+    sys.exit(1 if any(r.regressed for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/upstreams.py
+"""
+本地模拟数据源，供压测与基准测试使用，替代线上的：
+- 东方财富板块列表接口 push2.eastmoney.com/api/qt/clist/get (JSONP 分页)；
+- 同花顺行业板块页 q.10jqka.com.cn/thshy/ 及其 ajax 分页；
+- 天天基金净值 fund.eastmoney.com/pingzhongdata/{code}.js (akshare 的数据来源)。
+
+延迟、错误率与数据规模均可配置，数据由固定种子生成，结果可复现。
+
+单独运行：python -m benchmarks.upstreams --port 9100 --latency-ms 50 --error-rate 0.01
+随后以 EASTMONEY_BASE_URL=http://127.0.0.1:9100/api/qt/clist/get THS_BASE_URL=http://127.0.0.1:9100 启动服务即可。
+akshare 请求基金净值时使用固定域名，只能在同一进程内通过 redirect_upstreams() 重定向。
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import Iterator, NamedTuple, Optional
+from unittest import mock
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from .generators import eastmoney_items, eastmoney_jsonp, nav_js, ths_rows, ths_table_html
+
+FUND_NAV_HOST = "https://fund.eastmoney.com"
+
+
+class UpstreamConfig(NamedTuple):
+    """模拟数据源的行为配置"""
+    latency_ms: float = 0.0  # 平均响应延迟
+    jitter_ms: float = 0.0  # 延迟的标准差
+    error_rate: float = 0.0  # 返回 503 的概率
+    eastmoney_boards: int = 500  # 东方财富板块总数 (按 pz 分页)
+    ths_boards: int = 90  # 同花顺板块总数 (分两页)
+    nav_days: int = 1500  # 每只基金的净值天数
+    seed: int = 42
+
+
+# --- ASGI 应用 ---
+
+def create_app(config: UpstreamConfig = UpstreamConfig()) -> Starlette:
+    """创建模拟数据源应用；app.state.requests 记录各数据源收到的请求数"""
+    rng = random.Random(config.seed)
+    em_items = eastmoney_items(config.eastmoney_boards, config.seed)
+    ths_all = ths_rows(config.ths_boards, config.seed)
+    ths_page_size = -(-len(ths_all) // 2)
+
+    @lru_cache(maxsize=256)
+    def cached_nav_js(fund_code: str) -> str:
+        return nav_js(fund_code, config.nav_days)
+
+    async def simulate(request: Request, source: str) -> Optional[Response]:
+        """按配置注入延迟与错误，返回 None 表示正常响应"""
+        app.state.requests[source] = app.state.requests.get(source, 0) + 1
+        if config.latency_ms or config.jitter_ms:
+            await asyncio.sleep(max(0.0, rng.gauss(config.latency_ms, config.jitter_ms)) / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            return PlainTextResponse("Service Unavailable", status_code=503)
+        return None
+
+    async def eastmoney(request: Request) -> Response:
+        if (error := await simulate(request, "eastmoney")) is not None:
+            return error
+        page = int(request.query_params.get("pn", 1))
+        size = int(request.query_params.get("pz", 100))
+        start = (page - 1) * size
+        body = eastmoney_jsonp(em_items[start:start + size], len(em_items), request.query_params.get("cb", "jQuery_0"))
+        return Response(body, media_type="application/javascript")
+
+    async def ths_index(request: Request) -> Response:
+        if (error := await simulate(request, "ths")) is not None:
+            return error
+        return HTMLResponse(f"<html><body>{ths_table_html(ths_all[:ths_page_size])}</body></html>")
+
+    async def ths_page(request: Request) -> Response:
+        if (error := await simulate(request, "ths")) is not None:
+            return error
+        page = int(request.path_params["page"])
+        start = (page - 1) * ths_page_size
+        return HTMLResponse(ths_table_html(ths_all[start:start + ths_page_size], start))
+
+    async def fund_nav(request: Request) -> Response:
+        if (error := await simulate(request, "nav")) is not None:
+            return error
+        return Response(cached_nav_js(request.path_params["code"]), media_type="application/javascript")
+
+    app = Starlette(routes=[
+        Route("/api/qt/clist/get", eastmoney),
+        Route("/thshy/", ths_index),
+        Route("/thshy/index/field/199112/order/desc/page/{page:int}/ajax/1/", ths_page),
+        Route("/pingzhongdata/{code}.js", fund_nav),
+    ])
+    app.state.requests = {}
+    return app
+
+
+class UpstreamServer:
+    """在后台线程中以 uvicorn 运行模拟数据源，用作上下文管理器；port=0 时自动分配端口"""
+
+    def __init__(self, config: UpstreamConfig = UpstreamConfig(), host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self._server.run, name="upstream-stub", daemon=True)
+        self.host = host
+        self.port = port
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "UpstreamServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("模拟数据源启动失败")
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+@contextmanager
+def redirect_upstreams(base_url: str) -> Iterator[None]:
+    """
+    在当前进程内把东方财富、同花顺与基金净值请求指向 base_url。
+    akshare 的净值接口写死了域名，这里只替换其模块内引用的 requests，不影响其他模块。
+    """
+    import requests
+    from akshare.fund import fund_em
+
+    from python_cli_starter import market
+
+    def redirected_get(url, *args, **kwargs):
+        return requests.get(url.replace(FUND_NAV_HOST, base_url, 1), *args, **kwargs)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(market, "BASE_URL", f"{base_url}/api/qt/clist/get"))
+        stack.enter_context(mock.patch.object(market, "THS_BASE_URL", base_url))
+        stack.enter_context(mock.patch.object(fund_em, "requests", mock.Mock(wraps=requests, get=redirected_get)))
+        yield
+
+
+def main():
+    defaults = UpstreamConfig._field_defaults
+    parser = argparse.ArgumentParser(description="本地模拟数据源 (东方财富 / 同花顺 / 基金净值)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--eastmoney-boards", type=int, default=defaults["eastmoney_boards"])
+    parser.add_argument("--ths-boards", type=int, default=defaults["ths_boards"])
+    parser.add_argument("--nav-days", type=int, default=defaults["nav_days"])
+    parser.add_argument("--seed", type=int, default=defaults["seed"])
+    args = parser.parse_args()
+
+    config = UpstreamConfig(
+        args.latency_ms, args.jitter_ms, args.error_rate,
+        args.eastmoney_boards, args.ths_boards, args.nav_days, args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# src/python_cli_starter/backfill.py
+"""
+历史抓取文件批量回填：
+遍历磁盘上保存的东方财富 (JSON/JSONP) 与同花顺 (HTML) 原始响应，在进程池中并行解析，
+以文件修改时间作为抓取时间 (而不是 date.today())，再通过 COPY 批量写入 eastmoney_sectors / ths_sectors。
+
+- 按扩展名识别数据源：.json/.jsonp/.js/.txt 为东方财富 (可为 NDJSON 或多段 JSONP)，.html/.htm 为同花顺，均可再加 .gz；
+- 同一天有多份抓取时，每个板块以最晚的一份为准，同花顺的成交额占比按当天合并后的全部板块计算；
+- 表中已有的行只在回填数据更新 (updated_at 更晚) 时才覆盖，旧文件不会覆盖实时抓取的数据；
+- 回填只写每日表与维度表，不追加盘中快照，也不触发入库监听者 (轮动、宽度等衍生数据)。
+
+用法：python -m python_cli_starter.backfill CAPTURE_DIR [--workers N] [--batch-rows N] [--dry-run]
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from . import maintenance, market
+from .database import engine, forget_fingerprints, SOURCE_CODES
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SUFFIXES = {
+    ".json": "eastmoney",
+    ".jsonp": "eastmoney",
+    ".js": "eastmoney",
+    ".txt": "eastmoney",
+    ".html": "ths",
+    ".htm": "ths",
+}
+TABLES = {"eastmoney": "eastmoney_sectors", "ths": "ths_sectors"}
+# COPY 写入的列，顺序与 _to_records 产出的元组一致
+COPY_COLUMNS = {
+    "eastmoney": ("date", "name", "market_cap", "turnover_rate", "change_percent", "amount", "updated_at"),
+    "ths": ("date", "name", "change_percent", "net_inflow", "up_count", "down_count", "turnover_ratio", "updated_at"),
+}
+# 同花顺工作进程返回的数值字段 (成交额占比需按全天汇总后再计算)
+THS_RAW_FIELDS = ("change_percent", "raw_amount", "net_inflow", "up_count", "down_count")
+
+# 累积到该行数执行一次 COPY
+DEFAULT_BATCH_ROWS = 50_000
+# 进度日志的最小间隔 (秒)
+PROGRESS_INTERVAL = 2.0
+
+
+class Capture(NamedTuple):
+    """一个抓取文件"""
+    path: str
+    source: str
+    captured_at: datetime
+    size: int
+
+
+class BackfillResult(NamedTuple):
+    files: int
+    failed: int
+    rows: int
+    written: int
+    elapsed: float
+
+
+def classify(path: str) -> Optional[str]:
+    """按扩展名识别数据源，无法识别时返回 None"""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return SOURCE_SUFFIXES.get(os.path.splitext(name)[1])
+
+
+def discover_captures(root: str) -> List[Capture]:
+    """递归查找抓取文件，按文件修改时间排序"""
+    captures = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            source = classify(path)
+            if source is None:
+                continue
+            stat = os.stat(path)
+            captures.append(Capture(path, source, datetime.fromtimestamp(stat.st_mtime), stat.st_size))
+    captures.sort(key=lambda c: (c.captured_at, c.path))
+    return captures
+
+
+def _read_capture(path: str) -> bytes:
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+def parse_capture(capture: Capture) -> Tuple[Capture, List[tuple], Optional[str]]:
+    """
+    在工作进程中执行：解析单个抓取文件。
+    返回 (文件, [(板块名称, 各数值字段...)], 错误信息)，只包含基础类型以降低进程间传输开销。
+    """
+    try:
+        data = _read_capture(capture.path)
+        if capture.source == "eastmoney":
+            splitter = market.JsonDocumentSplitter()
+            items = []
+            for page, document in enumerate(splitter.feed(data), 1):
+                items.extend(market._parse_eastmoney_text(document, page)[0])
+            splitter.close()
+            # 含小数的抓取 (如 fltt=2) 整个文件记为失败，而不是取整后写入失真的数值
+            rows = [
+                (row.name, round(row.market_cap), round(row.turnover_rate), round(row.change_percent), round(row.amount))
+                for row in market.EastMoneyBatch.from_items(items).require_integral().rows()
+            ]
+        else:
+            raw = market.parse_ths_html(data.decode("utf-8", errors="replace"))
+            rows = [(item["name"], *(item[f] for f in THS_RAW_FIELDS)) for item in raw]
+        return capture, rows, None
+    except Exception as e:
+        return capture, [], f"{type(e).__name__}: {e}"
+
+
+class DayAccumulator:
+    """
+    按 (数据源, 日期) 累积解析结果，同一板块以最晚的抓取为准。
+    文件按修改时间顺序处理，某数据源出现更晚日期的文件时，之前的日期即已完整，可以写入。
+    """
+
+    def __init__(self):
+        self._days: Dict[Tuple[str, date], Dict[str, tuple]] = {}
+        self._latest: Dict[Tuple[str, date], datetime] = {}
+
+    def add(self, capture: Capture, rows: List[tuple]) -> None:
+        key = (capture.source, capture.captured_at.date())
+        day = self._days.setdefault(key, {})
+        for row in rows:
+            day[row[0]] = row
+        self._latest[key] = max(self._latest.get(key, capture.captured_at), capture.captured_at)
+
+    def pop_completed(self, source: str, before: date) -> List[tuple]:
+        """取出某数据源 before 之前的全部日期，转换为待写入的记录"""
+        keys = [k for k in self._days if k[0] == source and k[1] < before]
+        return self._pop(keys)
+
+    def pop_all(self) -> Dict[str, List[tuple]]:
+        return {source: self._pop([k for k in self._days if k[0] == source]) for source in TABLES}
+
+    def _pop(self, keys) -> List[tuple]:
+        records = []
+        for key in sorted(keys):
+            rows = self._days.pop(key)
+            records.extend(_to_records(key[0], key[1], self._latest.pop(key), list(rows.values())))
+        return records
+
+
+def _to_records(source: str, day: date, captured_at: datetime, rows: List[tuple]) -> List[tuple]:
+    """按 COPY_COLUMNS 的列顺序生成记录"""
+    if source == "eastmoney":
+        return [(day, *row, captured_at) for row in rows]
+    raw = [dict(zip(("name", *THS_RAW_FIELDS), row)) for row in rows]
+    return [
+        (day, s.name, s.change_percent, s.net_inflow, s.up_count, s.down_count, s.turnover_ratio, captured_at)
+        for s in market.build_ths_sectors(raw, captured_at)
+    ]
+
+
+async def bulk_load(source: str, records: Sequence[tuple]) -> int:
+    """
+    COPY 到临时表后一次性 upsert 到目标表，返回写入的行数。
+    同一事务内先创建记录涉及月份的分区，并把新板块名称登记到维度表。
+    """
+    if not records:
+        return 0
+    table = TABLES[source]
+    columns = COPY_COLUMNS[source]
+    staging = f"_backfill_{table}"
+    column_list = ", ".join(columns)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[2:])
+    async with engine.begin() as conn:
+        await maintenance.ensure_partitions(conn, {r[0] for r in records})
+        await conn.execute(text(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA"
+        ))
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(staging, records=records, columns=columns)
+        result = await conn.execute(text(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT (date, name) DO UPDATE SET {updates} "
+            f"WHERE {table}.updated_at <= EXCLUDED.updated_at"
+        ))
+        await conn.execute(text(
+            f"INSERT INTO sector_dim (source, name) SELECT DISTINCT CAST(:source AS smallint), name FROM {staging} "
+            f"ON CONFLICT (source, name) DO NOTHING"
+        ), {"source": SOURCE_CODES[source]})
+    forget_fingerprints(source, {r[0] for r in records})
+    return result.rowcount
+
+
+class Progress:
+    """定期输出进度与吞吐量"""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = self.failed = self.bytes = self.rows = self.written = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def add_file(self, capture: Capture, rows: int, failed: bool) -> None:
+        self.files += 1
+        self.failed += failed
+        self.bytes += capture.size
+        self.rows += rows
+        self.report()
+
+    def add_written(self, count: int) -> None:
+        self.written += count
+
+    def report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        elapsed = max(now - self.started, 1e-9)
+        remaining = (self.total_bytes - self.bytes) / (self.bytes / elapsed) if self.bytes else 0
+        logger.info(
+            f"[Backfill] 文件 {self.files}/{self.total_files} ({self.bytes / max(self.total_bytes, 1):.1%})，"
+            f"解析 {self.rows} 行，写入 {self.written} 行；"
+            f"{self.bytes / elapsed / 1e6:.1f} MB/s，{self.rows / elapsed:.0f} 行/s，预计剩余 {remaining:.0f}s"
+        )
+
+    def result(self) -> BackfillResult:
+        return BackfillResult(self.files, self.failed, self.rows, self.written, time.perf_counter() - self.started)
+
+
+def _iter_parsed(captures: List[Capture], workers: int) -> Iterator[Tuple[Capture, List[tuple], Optional[str]]]:
+    """按文件顺序产出解析结果；workers 为 0 时在当前进程解析 (便于调试)"""
+    if workers == 0:
+        yield from map(parse_capture, captures)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_capture, captures, chunksize=4)
+
+
+async def run_backfill(
+    root: str,
+    workers: Optional[int] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    dry_run: bool = False,
+) -> BackfillResult:
+    """回填 root 下的全部抓取文件；dry_run 时只解析不写库 (可用于评估解析吞吐量)"""
+    captures = discover_captures(root)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    logger.info(f"[Backfill] 在 {root} 下找到 {len(captures)} 个抓取文件，使用 {workers} 个工作进程解析")
+    progress = Progress(len(captures), sum(c.size for c in captures))
+    accumulator = DayAccumulator()
+    pending: Dict[str, List[tuple]] = {source: [] for source in TABLES}
+
+    async def flush(source: str) -> None:
+        records, pending[source] = pending[source], []
+        if records and not dry_run:
+            progress.add_written(await bulk_load(source, records))
+
+    for capture, rows, error in _iter_parsed(captures, workers):
+        if error:
+            logger.warning(f"[Backfill] 解析 {capture.path} 失败: {error}")
+        progress.add_file(capture, len(rows), bool(error))
+        pending[capture.source].extend(accumulator.pop_completed(capture.source, capture.captured_at.date()))
+        accumulator.add(capture, rows)
+        if len(pending[capture.source]) >= batch_rows:
+            await flush(capture.source)
+
+    for source, records in accumulator.pop_all().items():
+        pending[source].extend(records)
+        await flush(source)
+
+    progress.report(force=True)
+    result = progress.result()
+    logger.info(
+        f"[Backfill] 完成: {result.files} 个文件 (失败 {result.failed})，解析 {result.rows} 行，"
+        f"写入 {result.written} 行，耗时 {result.elapsed:.1f}s"
+    )
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m python_cli_starter.backfill", description="从历史抓取文件批量回填板块数据")
+    parser.add_argument("root", help="抓取文件所在目录 (递归查找)")
+    parser.add_argument("--workers", type=int, default=None, help="解析进程数，默认为 CPU 核数，0 表示在当前进程解析")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS, help="每次 COPY 的行数")
+    parser.add_argument("--dry-run", action="store_true", help="只解析并统计，不写入数据库")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    async def run():
+        try:
+            await run_backfill(args.root, args.workers, args.batch_rows, args.dry_run)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
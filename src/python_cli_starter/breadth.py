@@ -0,0 +1,137 @@
+# src/python_cli_starter/breadth.py
+"""
+市场宽度：汇总同花顺各板块的涨跌家数与资金净流入。
+每批数据入库后只对发生变化的板块做增量加减，无需每次对数百行重新求和；
+结果写入 market_breadth (每个快照) 与 market_breadth_daily (每日)，供接口直接读取。
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from .database import AsyncSessionLocal, MarketBreadth, MarketBreadthDaily, ThsSector
+
+logger = logging.getLogger(__name__)
+
+# (上涨家数, 下跌家数, 净流入, 涨跌幅)
+Contribution = Tuple[int, int, float, float]
+
+
+def _sign(value: float) -> Tuple[int, int]:
+    return (1 if value > 0 else 0), (1 if value < 0 else 0)
+
+
+class BreadthAccumulator:
+    """单个交易日的增量汇总状态"""
+
+    def __init__(self, day: date):
+        self.day = day
+        self.rows: Dict[str, Contribution] = {}
+        self.advancers = 0
+        self.decliners = 0
+        self.net_inflow = 0.0
+        self.sectors_up = 0
+        self.sectors_down = 0
+
+    def _add(self, row: Contribution, sign: int) -> None:
+        up_count, down_count, net_inflow, change_percent = row
+        is_up, is_down = _sign(change_percent)
+        self.advancers += sign * up_count
+        self.decliners += sign * down_count
+        self.net_inflow += sign * net_inflow
+        self.sectors_up += sign * is_up
+        self.sectors_down += sign * is_down
+
+    def apply(self, name: str, row: Contribution) -> None:
+        """用板块的最新值替换旧值：先减去旧贡献，再加上新贡献"""
+        old = self.rows.get(name)
+        if old == row:
+            return
+        if old is not None:
+            self._add(old, -1)
+        self._add(row, 1)
+        self.rows[name] = row
+
+    def totals(self) -> dict:
+        total = self.advancers + self.decliners
+        return {
+            "advancers": self.advancers,
+            "decliners": self.decliners,
+            "breadth_ratio": round(self.advancers / total, 4) if total else None,
+            "net_inflow": round(self.net_inflow, 4),
+            "sectors_up": self.sectors_up,
+            "sectors_down": self.sectors_down,
+            "sector_count": len(self.rows),
+        }
+
+
+def _contribution(sector) -> Contribution:
+    return (sector.up_count, sector.down_count, sector.net_inflow, sector.change_percent)
+
+
+_state: Optional[BreadthAccumulator] = None
+_lock = asyncio.Lock()
+
+
+async def _load_day(day: date) -> BreadthAccumulator:
+    """服务重启或跨日时，从 ths_sectors 中当天已保存的行重建汇总状态"""
+    acc = BreadthAccumulator(day)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(ThsSector).where(ThsSector.date == day))
+        for sector in result.scalars().all():
+            acc.apply(sector.name, _contribution(sector))
+    return acc
+
+
+async def on_sectors_saved(source: str, fs_type: Optional[int], changed: list, captured_at: datetime) -> None:
+    """入库监听者：仅处理同花顺数据，增量更新宽度汇总并落库"""
+    global _state
+    if source != "ths":
+        return
+    async with _lock:
+        day = captured_at.date()
+        if _state is None or _state.day != day:
+            _state = await _load_day(day)
+        for sector in changed:
+            _state.apply(sector.name, _contribution(sector))
+        totals = _state.totals()
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(MarketBreadth).values(captured_at=captured_at, date=day, **totals)
+                .on_conflict_do_nothing(index_elements=["captured_at"])
+            )
+            stmt = insert(MarketBreadthDaily).values(date=day, captured_at=captured_at, **totals)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["date"],
+                set_={"captured_at": captured_at, **totals},
+            )
+            await session.execute(stmt)
+            await session.commit()
+    logger.info(
+        f"[Breadth] 上涨 {totals['advancers']} / 下跌 {totals['decliners']} 家，"
+        f"上涨板块 {totals['sectors_up']}/{totals['sector_count']}，净流入 {totals['net_inflow']:.2f} 亿"
+    )
+
+
+async def get_breadth(day: Optional[date] = None, days: int = 30) -> Tuple[List[MarketBreadth], List[MarketBreadthDaily]]:
+    """
+    读取市场宽度：指定交易日 (默认最新) 的盘中快照序列，以及截至该日最近 days 天的每日汇总。
+    """
+    async with AsyncSessionLocal() as session:
+        if day is None:
+            day = await session.scalar(select(MarketBreadthDaily.date).order_by(MarketBreadthDaily.date.desc()).limit(1))
+            if day is None:
+                return [], []
+        intraday = await session.execute(
+            select(MarketBreadth).where(MarketBreadth.date == day).order_by(MarketBreadth.captured_at)
+        )
+        daily = await session.execute(
+            select(MarketBreadthDaily)
+            .where(MarketBreadthDaily.date <= day, MarketBreadthDaily.date > day - timedelta(days=days))
+            .order_by(MarketBreadthDaily.date)
+        )
+        return intraday.scalars().all(), daily.scalars().all()
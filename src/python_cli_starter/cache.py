@@ -0,0 +1,60 @@
+# src/python_cli_starter/cache.py
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """
+    进程内的最新板块快照缓存，保存已序列化好的 JSON 响应 (字节及其 ETag 等校验信息)。
+    每个 key 带有一个代数 (generation)：读取数据库前先记下代数，
+    写回缓存时若代数已变 (期间有新数据入库导致失效)，则放弃写入，避免把旧数据塞回缓存。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Any] = {}
+        self._generations: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        metrics.CACHE_REQUESTS.inc(key=key, result="miss" if entry is None else "hit")
+        return entry
+
+    def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    def put(self, key: str, payload: Any, generation: int) -> bool:
+        """仅当代数与读取数据前一致时写入缓存，返回是否写入成功"""
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return False
+            self._entries[key] = payload
+            return True
+
+    def invalidate(self, *keys: str) -> None:
+        """新数据入库后调用，使相关 key 失效"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+        logger.debug(f"快照缓存失效: {keys}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidate(*list(self._entries))
+
+
+# 缓存 key
+DF_SECTORS = "df_sectors"
+THS_SECTORS = "ths_sectors"
+SECTOR_NAMES = "sector_names"
+DF_SECTORS_STATS = "df_sectors:stats"
+THS_SECTORS_STATS = "ths_sectors:stats"
+SECTORS_JOINED = "sectors:joined"
+
+sector_cache = SnapshotCache()
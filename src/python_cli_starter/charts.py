@@ -7,6 +7,9 @@ import logging
 import numpy as np
 from typing import Dict, Any, Optional
 
+from . import metrics
+from . import tracing
+
 logger = logging.getLogger(__name__)
 
 # --- RSI 策略默认参数 ---
@@ -18,7 +21,8 @@ def get_historical_fund_data(fund_symbol: str) -> Optional[pd.DataFrame]:
     """获取指定基金的全部历史净值数据。"""
     logger.info(f"[Charts] 正在为基金 {fund_symbol} 获取全部历史净值数据...")
     try:
-        fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
+        with metrics.track_upstream("akshare_nav"), tracing.span("akshare.nav", fund_code=fund_symbol):
+            fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
         fund_nav_df['净值日期'] = pd.to_datetime(fund_nav_df['净值日期'])
         fund_nav_df = fund_nav_df.set_index('净值日期')
         fund_nav_df = fund_nav_df[['单位净值']]
@@ -79,7 +83,12 @@ def get_rsi_chart_data(fund_code: str) -> Optional[Dict[str, Any]]:
     df_full = get_historical_fund_data(fund_code)
     if df_full is None or df_full.empty:
         return None
+    return build_rsi_chart_data(df_full)
 
+@metrics.STRATEGY_COMPUTE_SECONDS.time(strategy="rsi_chart")
+@tracing.traced("strategy.compute", strategy="rsi_chart")
+def build_rsi_chart_data(df_full: pd.DataFrame) -> Dict[str, Any]:
+    """基于已获取的历史净值计算 RSI 图表数据"""
     df_with_rsi = calculate_rsi(df_full, period=RSI_PERIOD)
     
     signals_df = generate_rsi_signals(df_with_rsi)
@@ -0,0 +1,105 @@
+# src/python_cli_starter/events.py
+"""
+板块数据变更推送 (Server-Sent Events)：
+每次入库提交后，将本批有变化的行序列化为一条 SSE 消息，广播给所有已连接的看板。
+消息只序列化一次，N 个连接的成本是 N 次入队，而不是 N 次轮询 × 完整列表。
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Set
+
+from . import schemas
+
+logger = logging.getLogger(__name__)
+
+# 每个连接最多积压的消息数；看板消费过慢时丢弃最旧的消息，并提示客户端重新拉取全量
+QUEUE_SIZE = 32
+# 心跳间隔 (秒)，防止代理因空闲断开长连接
+HEARTBEAT_SECONDS = 15.0
+
+_CLOSE = b""  # 服务关闭时放入队列的结束标记
+RESYNC_MESSAGE = b"event: resync\ndata: {}\n\n"
+
+
+def format_sse(event: str, data: str, event_id: Optional[str] = None) -> bytes:
+    """按 SSE 协议格式化一条消息"""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class ChangeBroadcaster:
+    """进程内的一对多广播：每个订阅者一个有界队列"""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, message: bytes) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                # 慢消费者：清空积压，改为通知其重新拉取全量，避免无限占用内存
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_MESSAGE)
+                logger.warning("[Events] 订阅者消费过慢，已清空积压并要求重新同步")
+            queue.put_nowait(message)
+
+    def close(self) -> None:
+        """服务关闭时通知所有连接结束"""
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_CLOSE)
+
+
+broadcaster = ChangeBroadcaster()
+
+
+def build_change_event(source: str, fs_type: Optional[int], changed: list, captured_at: datetime) -> schemas.SectorChangeEvent:
+    """将本批变化的行转换为推送事件，日期与更新时间与入库时一致"""
+    model = schemas.SectorInfo if source == "eastmoney" else schemas.ThsSectorInfo
+    rows = [
+        model.model_validate(s).model_copy(update={"date": captured_at.date(), "updated_at": captured_at})
+        for s in changed
+    ]
+    return schemas.SectorChangeEvent(source=source, fs_type=fs_type, captured_at=captured_at, **{source: rows})
+
+
+async def on_sectors_saved(source: str, fs_type: Optional[int], changed: list, captured_at: datetime) -> None:
+    """入库监听者：向所有已连接的看板广播本批增量"""
+    if not broadcaster.subscriber_count:
+        return
+    event = build_change_event(source, fs_type, changed, captured_at)
+    broadcaster.publish(format_sse("sectors", event.model_dump_json(), captured_at.isoformat()))
+
+
+async def stream(queue: asyncio.Queue, is_disconnected, heartbeat: float = HEARTBEAT_SECONDS):
+    """逐条产出队列中的 SSE 消息，空闲时发送心跳注释行"""
+    while True:
+        try:
+            message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+        except asyncio.TimeoutError:
+            if await is_disconnected():
+                return
+            yield b": keep-alive\n\n"
+            continue
+        if message == _CLOSE:
+            return
+        yield message
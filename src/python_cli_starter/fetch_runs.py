@@ -0,0 +1,134 @@
+# src/python_cli_starter/fetch_runs.py
+"""
+抓取运行记录 (fetch_runs)：每次定时或手动抓取结束后，按数据源各写一行。
+页数、重试、字节数与各阶段耗时取自该次抓取期间收集到的 span (见 tracing.collect)，
+抓取代码本身不需要再额外传递统计信息。写入失败只记录日志，不影响抓取结果。
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal, FetchRun
+from .tracing import Span
+
+logger = logging.getLogger(__name__)
+
+PAGE_SPANS = ("eastmoney.page", "ths.page")
+
+# 阶段名称 -> 计入该阶段的 span (耗时求和；pages 为并发请求，按首个开始到最后一个结束计)
+STAGE_SPANS: Dict[str, tuple] = {
+    "playwright_launch": ("playwright.launch",),
+    "cookie_wait": ("eastmoney.cookie_wait", "ths.cookie_wait"),
+    "parse": ("eastmoney.decode", "eastmoney.parse", "ths.parse", "ths.build"),
+    "fetch": ("eastmoney.fetch", "ths.fetch"),
+    "save": ("db.save_eastmoney_sectors", "db.save_ths_sectors"),
+}
+
+
+def _span_end(span: Span) -> datetime:
+    return span.started_at + timedelta(milliseconds=span.duration_ms or 0)
+
+
+def summarize_spans(spans: Iterable[Span]) -> dict:
+    """从一次抓取的 span 中汇总页数、重试次数、响应字节数与各阶段耗时 (毫秒)"""
+    spans = list(spans)
+    pages = [s for s in spans if s.name in PAGE_SPANS]
+    stages = {}
+    for stage, names in STAGE_SPANS.items():
+        matched = [s.duration_ms or 0 for s in spans if s.name in names]
+        if matched:
+            stages[stage] = round(sum(matched), 1)
+    if pages:
+        first = min(s.started_at for s in pages)
+        stages["pages"] = round((max(_span_end(s) for s in pages) - first).total_seconds() * 1000, 1)
+    return {
+        "pages": len(pages),
+        "retries": sum(s.attributes.get("retries", 0) for s in pages),
+        "bytes": sum(s.attributes.get("bytes", 0) for s in pages),
+        "stages": stages,
+    }
+
+
+def build_run(
+    source: str,
+    fs_type: int,
+    trigger: str,
+    status: str,
+    started_at: datetime,
+    finished_at: datetime,
+    rows_fetched: int,
+    rows_changed: int,
+    spans: Iterable[Span],
+    error: Optional[str] = None,
+) -> dict:
+    """组装一行 fetch_runs 记录"""
+    return dict(
+        source=source,
+        fs_type=fs_type,
+        trigger=trigger,
+        status=status,
+        started_at=started_at,
+        finished_at=finished_at,
+        rows_fetched=rows_fetched,
+        rows_changed=rows_changed,
+        error=error[:1000] if error else None,
+        **summarize_spans(spans),
+    )
+
+
+async def record_runs(runs: List[dict]) -> None:
+    """写入抓取运行记录；失败时只记录日志"""
+    if not runs:
+        return
+    try:
+        async with AsyncSessionLocal() as session:
+            session.add_all([FetchRun(**run) for run in runs])
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"抓取运行记录写入失败: {e}")
+
+
+async def get_runs(
+    source: Optional[str] = None,
+    fs_type: Optional[int] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[FetchRun]:
+    """按开始时间倒序查询抓取运行记录"""
+    stmt = select(FetchRun)
+    if source:
+        stmt = stmt.where(FetchRun.source == source)
+    if fs_type is not None:
+        stmt = stmt.where(FetchRun.fs_type == fs_type)
+    if status:
+        stmt = stmt.where(FetchRun.status == status)
+    if since:
+        stmt = stmt.where(FetchRun.started_at >= since)
+    if until:
+        stmt = stmt.where(FetchRun.started_at < until)
+    stmt = stmt.order_by(FetchRun.started_at.desc(), FetchRun.id.desc()).limit(limit)
+    async with AsyncSessionLocal() as session:
+        return list((await session.execute(stmt)).scalars().all())
+
+
+def summarize_runs(durations_ms: List[float], statuses: List[str], rows_fetched: int, retries: int) -> dict:
+    """查询结果的汇总：次数、成功次数与耗时分位数"""
+    summary = dict(
+        count=len(durations_ms),
+        success_count=sum(1 for s in statuses if s == "success"),
+        total_rows_fetched=rows_fetched,
+        total_retries=retries,
+    )
+    if durations_ms:
+        p50, p95 = np.percentile(durations_ms, [50, 95])
+        summary.update(
+            p50_duration_ms=round(float(p50), 1),
+            p95_duration_ms=round(float(p95), 1),
+            max_duration_ms=round(max(durations_ms), 1),
+        )
+    return summary
@@ -0,0 +1,119 @@
+# src/python_cli_starter/http_cache.py
+"""
+HTTP 条件缓存：为板块列表与图表接口生成 ETag / Last-Modified / Cache-Control，
+并在客户端携带的 If-None-Match / If-Modified-Since 仍然有效时返回 304。
+
+Cache-Control 的 max-age 计算到下一次数据更新 (板块定时抓取或基金净值发布) 为止，
+浏览器在此之前不会重复请求；响应标记为 private，不由共享代理缓存。
+手动抓取、上传等计划外的更新之后，直到下一次定时更新为止改为 no-cache (每次携带 ETag 向服务端校验)。
+"""
+import hashlib
+from datetime import datetime, time, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Mapping, NamedTuple, Optional, Sequence
+
+from fastapi.responses import Response
+
+# 基金净值通常在交易日晚间公布，之后再重新请求图表
+NAV_PUBLISH_TIMES = (time(21, 0),)
+
+
+class CachedBody(NamedTuple):
+    """快照缓存中保存的响应：序列化后的字节及其校验信息"""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def make_etag(*parts) -> str:
+    """由若干组成部分 (数据版本、请求参数等) 生成强 ETag"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(dt: datetime) -> str:
+    """数据库中的时间为本地时间 (naive)，转换为 HTTP 日期格式 (GMT)"""
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match 使用弱比较
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """按 RFC 9110 判断条件请求：If-None-Match 存在时忽略 If-Modified-Since"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP 日期精确到秒
+        return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+    return False
+
+
+def seconds_until_next(times: Sequence[time], now: Optional[datetime] = None, grace: float = 0) -> int:
+    """
+    距离下一次数据更新的秒数。
+    :param times: 每天的更新时刻
+    :param grace: 更新所需时间，更新时刻之后的 grace 秒内仍视为"即将更新"，只给出很短的 max-age
+    """
+    now = now or datetime.now()
+    slots = sorted(
+        datetime.combine(now.date() + timedelta(days=offset), t) + timedelta(seconds=grace)
+        for offset in (0, 1)
+        for t in times
+    )
+    upcoming = next(slot for slot in slots if slot > now)
+    return max(int((upcoming - now).total_seconds()), 0)
+
+
+class RevalidationWindow:
+    """记录计划外的数据更新：此后直到下一次定时更新为止，max_age() 返回 None (即 no-cache)"""
+
+    def __init__(self, times: Sequence[time], grace: float = 0):
+        self.times = times
+        self.grace = grace
+        self.until: Optional[datetime] = None
+
+    def mark(self, now: Optional[datetime] = None) -> None:
+        now = now or datetime.now()
+        self.until = now + timedelta(seconds=seconds_until_next(self.times, now, self.grace))
+
+    def max_age(self, now: Optional[datetime] = None) -> Optional[int]:
+        now = now or datetime.now()
+        if self.until and now < self.until:
+            return None
+        return seconds_until_next(self.times, now, self.grace)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime], max_age: Optional[int]) -> Dict[str, str]:
+    """max_age 为 None 时返回 no-cache：客户端可以缓存，但每次使用前须向服务端校验"""
+    cache_control = "private, no-cache" if max_age is None else f"private, max-age={max_age}"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional_response(
+    request_headers: Mapping[str, str],
+    cached: CachedBody,
+    max_age: Optional[int],
+    media_type: str = "application/json",
+) -> Response:
+    """条件请求命中时返回不带响应体的 304，否则返回完整响应；两者携带相同的缓存头"""
+    headers = cache_headers(cached.etag, cached.last_modified, max_age)
+    if is_not_modified(request_headers, cached.etag, cached.last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type=media_type, headers=headers)
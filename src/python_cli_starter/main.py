@@ -1,24 +1,53 @@
 # src/python_cli_starter/main.py
 from fastapi import FastAPI, HTTPException, Query, status, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 import inspect
-from typing import Optional
+import json
+import base64
+import hashlib
+from typing import Any, Awaitable, Callable, List, Literal, NamedTuple, Optional, Tuple
 from contextlib import asynccontextmanager
 import logging
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 import asyncio
+from functools import partial
+from time import perf_counter
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from pydantic import BaseModel
 
 from .strategies import STRATEGY_REGISTRY
 from . import schemas
 from . import charts
 from . import market
+from . import maintenance
+from . import rotation
+from . import breadth
+from . import rolling_stats
+from . import sector_mapping
+from . import events
+from . import fetch_runs
+from . import http_cache
+from . import metrics
+from . import profiling
+from . import tracing
+from . import query_stats
+from .cache import sector_cache, DF_SECTORS, THS_SECTORS, SECTOR_NAMES, DF_SECTORS_STATS, THS_SECTORS_STATS, SECTORS_JOINED
 from .database import (
     save_eastmoney_sectors,
     save_ths_sectors,
     get_today_eastmoney_sectors,
     get_today_ths_sectors,
+    get_joined_sectors,
+    query_sectors,
+    get_sector_changes,
+    add_save_listener,
+    get_sector_intraday,
+    get_market_snapshot,
+    get_sector_history,
+    pool_status,
+    SOURCE_CODES,
+    SECTOR_HISTORY_SOURCES,
 )
 
 # 日志配置
@@ -80,56 +109,218 @@ def is_trading_hours(dt: datetime = None) -> bool:
 scheduler = AsyncIOScheduler()
 
 
+# 板块数据的定时抓取时刻，同时决定列表接口 Cache-Control 的有效期
+SECTOR_FETCH_TIMES = (time(11, 30), time(14, 30), time(16, 30))
+
+# 一轮抓取的全局截止时间 (秒)，超时未完成的数据源会被取消，不影响其他数据源入库
+FETCH_DEADLINE_SECONDS = 180.0
+
+# 手动抓取 / 上传在两次定时抓取之间改变了板块数据后，直到下一次定时抓取为止，列表接口改为 no-cache
+sector_revalidation = http_cache.RevalidationWindow(SECTOR_FETCH_TIMES, grace=FETCH_DEADLINE_SECONDS)
+
+class FetchStep(NamedTuple):
+    """一条 抓取 -> 保存 流水线；source / fs_type 用于写入抓取运行记录 (fetch_runs)，未设置 source 时不记录"""
+    name: str
+    fetch: Callable[[], Awaitable[Optional[list]]]
+    save: Callable[[list], Awaitable[int]]
+    source: str = ""
+    fs_type: int = 0
+
+
+async def _run_fetch_step(
+    name: str,
+    fetch: Callable[[], Awaitable[Optional[list]]],
+    save: Callable[[list], Awaitable[int]],
+    spans: Optional[List[tracing.Span]] = None,
+) -> schemas.FetchWithThsStepResult:
+    """执行单条 抓取 -> 保存 流水线，记录耗时，异常不向外抛出；期间结束的 span 收集到 spans"""
+    started = perf_counter()
+    try:
+        with tracing.collect(spans), tracing.span("pipeline.step", step=name) as step_span:
+            sectors = await fetch()
+            fetched_at = perf_counter()
+            count = len(sectors) if sectors else 0
+            changed = await save(sectors) if sectors else 0
+            finished_at = perf_counter()
+            step_span.set(count=count, changed=changed)
+        logger.info(
+            f"[{name}] 获取 {count} 条, 变更 {changed} 条, 抓取耗时 {(fetched_at - started) * 1000:.0f} ms, "
+            f"保存耗时 {(finished_at - fetched_at) * 1000:.0f} ms"
+        )
+        return schemas.FetchWithThsStepResult(
+            name=name,
+            success=count > 0,
+            status="success" if count > 0 else "empty",
+            message=f"获取并保存 {count} 条数据" if count > 0 else "未获取到数据",
+            count=count,
+            changed=changed,
+            elapsed_ms=round((finished_at - started) * 1000, 1),
+        )
+    except Exception as e:
+        logger.error(f"[{name}] 异常: {e}")
+        return schemas.FetchWithThsStepResult(
+            name=name,
+            success=False,
+            status="failed",
+            message=f"异常: {str(e)}",
+            count=0,
+            elapsed_ms=round((perf_counter() - started) * 1000, 1),
+        )
+
+
+async def run_fetch_pipelines(
+    steps: List[FetchStep], deadline: Optional[float] = None, trigger: str = "manual"
+) -> List[schemas.FetchWithThsStepResult]:
+    """
+    并发执行多条互相独立的数据源流水线，各自抓取完成后立即入库。
+    超过全局截止时间仍未完成的流水线会被取消并标记为超时，结果按 steps 的顺序返回。
+    结束后为每条流水线写入一行抓取运行记录 (fetch_runs)，trigger 为 scheduled 或 manual。
+    """
+    deadline = FETCH_DEADLINE_SECONDS if deadline is None else deadline
+    steps = [FetchStep(*step) for step in steps]
+    started_at, started = datetime.now(), perf_counter()
+    step_spans: List[List[tracing.Span]] = [[] for _ in steps]
+    tasks = [
+        asyncio.create_task(_run_fetch_step(step.name, step.fetch, step.save, spans))
+        for step, spans in zip(steps, step_spans)
+    ]
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for step, task in zip(steps, tasks):
+        if task in pending:
+            logger.error(f"[{step.name}] 超过全局截止时间 {deadline:.0f}s，已取消")
+            results.append(schemas.FetchWithThsStepResult(
+                name=step.name,
+                success=False,
+                status="timeout",
+                message=f"超时: 超过 {deadline:.0f}s 未完成",
+                count=0,
+                elapsed_ms=round((perf_counter() - started) * 1000, 1),
+            ))
+        else:
+            results.append(task.result())
+
+    await fetch_runs.record_runs([
+        fetch_runs.build_run(
+            source=step.source,
+            fs_type=step.fs_type,
+            trigger=trigger,
+            status=result.status,
+            started_at=started_at,
+            finished_at=started_at + timedelta(milliseconds=result.elapsed_ms),
+            rows_fetched=result.count,
+            rows_changed=result.changed,
+            spans=spans,
+            error=None if result.success else result.message,
+        )
+        for step, result, spans in zip(steps, results, step_spans)
+        if step.source
+    ])
+    if trigger != "scheduled" and any(result.changed for result in results):
+        sector_revalidation.mark()
+    return results
+
+
+@tracing.traced("fetch_and_save_sectors")
 async def fetch_and_save_sectors_task():
     """定时爬取与保存板块数据的后台任务"""
     now = datetime.now()
 
     if not is_trading_day(now):
         logger.info(f"定时任务跳过: {now.strftime('%Y-%m-%d')} 为非交易日")
+        tracing.set_attributes(skipped="non_trading_day")
         return
 
     if not is_trading_hours(now):
         logger.info(f"定时任务跳过: {now.strftime('%H:%M')} 为非交易时段")
+        tracing.set_attributes(skipped="non_trading_hours")
         return
 
-    logger.info("定时任务: 处于交易时段，开始获取并存储板块数据...")
+    logger.info("定时任务: 处于交易时段，开始并发获取并存储板块数据...")
+    started = perf_counter()
+    # 三个数据源互不依赖，并发执行，单个数据源变慢不会拖累其他数据源的更新
+    results = await run_fetch_pipelines([
+        FetchStep("东方财富行业板块", lambda: market.fetch_eastmoney_batch(), partial(save_eastmoney_sectors, fs_type=2), "eastmoney", 2),
+        FetchStep("东方财富概念板块", lambda: market.fetch_eastmoney_batch(None, 3), partial(save_eastmoney_sectors, fs_type=3), "eastmoney", 3),
+        FetchStep("同花顺板块", market.fetch_ths_sectors, save_ths_sectors, "ths"),
+    ], trigger="scheduled")
+    summary = ", ".join(f"{r.name}={r.count}条(变更{r.changed})/{r.elapsed_ms:.0f}ms" for r in results)
+    logger.info(f"定时任务完成，总耗时 {(perf_counter() - started) * 1000:.0f} ms: {summary}")
+
+
+# 入库监听者按顺序依次执行：SSE 推送放在最前，不等待轮动、市场宽度与滚动统计等衍生计算
+SAVE_LISTENERS = (
+    events.on_sectors_saved,
+    rotation.on_sectors_saved,
+    breadth.on_sectors_saved,
+    rolling_stats.on_sectors_saved,
+)
+
+
+async def _startup_fetch(
+    seed_job: Callable[[], Awaitable[None]],
+    fetch_job: Callable[[], Awaitable[None]],
+    mapping_job: Callable[[], Awaitable[Any]],
+) -> None:
+    """
+    启动时先从历史补齐滚动统计，再抓取一次，最后重建板块映射 (包含本次新出现的板块名称)；
+    补齐放在抓取之前，否则首次入库会为新板块写入空的统计状态，补齐时将被跳过。
+    不在启动时重建映射的话，部署或重启后 /market/sectors/joined 要等到当天 17:10 的定时任务才有数据。
+    """
     try:
-        # 1. 东方财富数据
-        eastmoney_sectors = await market.fetch_eastmoney_sectors()
-        if eastmoney_sectors:
-            await save_eastmoney_sectors(eastmoney_sectors)
-
-        eastmoney_sectors = await market.fetch_eastmoney_sectors(None, 3)
-        if eastmoney_sectors:
-            await save_eastmoney_sectors(eastmoney_sectors)
-
-        # 2. 同花顺数据
-        ths_sectors = await market.fetch_ths_sectors()
-        if ths_sectors:
-            await save_ths_sectors(ths_sectors)
+        await seed_job()
     except Exception as e:
-        logger.error(f"定时获取板块数据异常: {e}")
+        logger.error(f"启动时补齐滚动统计异常: {e}")
+    try:
+        await fetch_job()
+    except Exception as e:
+        logger.error(f"启动时抓取板块数据异常: {e}")  # 维度表中已有此前的板块名称，映射照常重建
+    await mapping_job()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("策略分析 API 服务启动")
 
-    scheduler.add_job(fetch_and_save_sectors_task, "cron", hour=11, minute=30)
-    scheduler.add_job(fetch_and_save_sectors_task, "cron", hour=14, minute=30)
-    scheduler.add_job(fetch_and_save_sectors_task, "cron", hour=16, minute=30)
+    # 板块数据入库后的实时推送与衍生计算
+    for listener in SAVE_LISTENERS:
+        add_save_listener(listener)
+
+    # 定时任务统一包装，记录每次执行耗时与失败次数
+    fetch_job = metrics.instrument_job("fetch_sectors", fetch_and_save_sectors_task)
+    maintenance_job = metrics.instrument_job("partition_maintenance", maintenance.run_partition_maintenance)
+    mapping_job = metrics.instrument_job("sector_mapping", sector_mapping.refresh_sector_mapping)
+    stats_seed_job = metrics.instrument_job("stats_seed", rolling_stats.seed_all_from_history)
+    for fetch_time in SECTOR_FETCH_TIMES:
+        scheduler.add_job(fetch_job, "cron", hour=fetch_time.hour, minute=fetch_time.minute)
+    # 每日收盘后维护分区并压缩过期的快照明细
+    scheduler.add_job(maintenance_job, "cron", hour=17, minute=0)
+    # 收盘后按维度表中的全部板块名称重建东方财富 ↔ 同花顺映射
+    scheduler.add_job(mapping_job, "cron", hour=17, minute=10)
     scheduler.start()
 
-    # 服务启动时，不等待15分钟，立即执行一次数据爬取
-    asyncio.create_task(fetch_and_save_sectors_task())
+    # 服务启动时，不等待15分钟，立即执行一次数据爬取；同时确保本月及未来的分区已存在
+    asyncio.create_task(_startup_fetch(stats_seed_job, fetch_job, mapping_job))
+    asyncio.create_task(maintenance_job())
 
     yield
 
     scheduler.shutdown()
+    events.broadcaster.close()
+    await market.close_http_client()
+    await asyncio.to_thread(tracing.flush)
     logger.info("策略分析 API 服务关闭")
 
 
 app = FastAPI(title="基金策略分析 API", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+# 按需剖析须在注册路由之前安装；未配置 PROFILE_TOKEN / PROFILE_ROUTES 时不做任何改动
+profiling.install(app)
 
 
 @app.exception_handler(RequestValidationError)
@@ -272,7 +463,7 @@ DASHBOARD_HTML = """
                     </tr>
                 </thead>
                 <tbody class="divide-y divide-gray-100">
-                    <tr v-for="item in filteredEastMoney" :key="item.name" class="hover:bg-blue-50 transition-colors">
+                    <tr v-for="item in eastMoneyData" :key="item.name" class="hover:bg-blue-50 transition-colors">
                         <td class="p-4 text-gray-800 font-medium">{{ item.name }}</td>
                         <td class="p-4 font-bold" :class="getColorClass(item.change_percent)">{{ item.change_percent_desc }}</td>
                         <td class="p-4 text-gray-600">{{ item.market_cap_desc }}</td>
@@ -281,11 +472,16 @@ DASHBOARD_HTML = """
                         <td class="p-4 text-gray-600">{{ item.date }}</td>
                         <td class="p-4 text-gray-600">{{ item.updated_at }}</td>
                     </tr>
-                    <tr v-if="filteredEastMoney.length === 0">
+                    <tr v-if="eastMoneyData.length === 0">
                         <td colspan="7" class="p-8 text-center text-gray-500">未找到匹配的板块数据</td>
                     </tr>
                 </tbody>
             </table>
+            <div v-if="eastMoneyCursor" class="p-4 text-center">
+                <button @click="fetchEastMoney(true)" class="text-blue-600 text-sm hover:underline">
+                    加载更多 (已显示 {{ eastMoneyData.length }} / {{ eastMoneyTotal }})
+                </button>
+            </div>
         </div>
 
         <!-- 同花顺数据表格 -->
@@ -304,7 +500,7 @@ DASHBOARD_HTML = """
                     </tr>
                 </thead>
                 <tbody class="divide-y divide-gray-100">
-                    <tr v-for="item in filteredThs" :key="item.name" class="hover:bg-blue-50 transition-colors">
+                    <tr v-for="item in thsData" :key="item.name" class="hover:bg-blue-50 transition-colors">
                         <td class="p-4 text-gray-800 font-medium">{{ item.name }}</td>
                         <td class="p-4 font-bold" :class="getColorClass(item.change_percent)">{{ item.change_percent }}%</td>
                         <td class="p-4 font-bold" :class="getColorClass(item.net_inflow)">{{ item.net_inflow }}</td>
@@ -314,16 +510,24 @@ DASHBOARD_HTML = """
                         <td class="p-4 text-gray-600">{{ item.date }}</td>
                         <td class="p-4 text-gray-600">{{ item.updated_at }}</td>
                     </tr>
-                    <tr v-if="filteredThs.length === 0">
+                    <tr v-if="thsData.length === 0">
                         <td colspan="8" class="p-8 text-center text-gray-500">未找到匹配的板块数据</td>
                     </tr>
                 </tbody>
             </table>
+            <div v-if="thsCursor" class="p-4 text-center">
+                <button @click="fetchThs(true)" class="text-blue-600 text-sm hover:underline">
+                    加载更多 (已显示 {{ thsData.length }} / {{ thsTotal }})
+                </button>
+            </div>
         </div>
     </div>
 
     <script>
-        const { createApp, ref, computed, onMounted } = Vue
+        const { createApp, ref, watch, onMounted } = Vue
+
+        // 每页条数；搜索、排序与分页均由服务端完成 (q / limit / cursor)
+        const PAGE_SIZE = 100
 
         createApp({
             setup() {
@@ -336,21 +540,45 @@ DASHBOARD_HTML = """
                 const isFetching = ref(false)
                 const fetchStatus = ref([])
 
-                const fetchEastMoney = async () => {
+                const eastMoneyCursor = ref(null)
+                const eastMoneyTotal = ref(0)
+                const thsCursor = ref(null)
+                const thsTotal = ref(0)
+                // 每个列表的请求序号，较早发出的请求晚于新请求返回时丢弃其结果
+                const requestSeq = { eastmoney: 0, ths: 0 }
+
+                const fetchPage = async (key, path, cursor) => {
+                    const seq = ++requestSeq[key]
+                    const params = new URLSearchParams({ limit: PAGE_SIZE })
+                    const query = searchQuery.value.trim()
+                    if (query) params.set('q', query)
+                    if (cursor) params.set('cursor', cursor)
+                    const res = await fetch(`${path}?${params}`, { cache: 'no-cache' })
+                    const data = await res.json()
+                    return seq === requestSeq[key] ? data : null
+                }
+
+                const fetchEastMoney = async (more = false) => {
                     try {
-                        const res = await fetch('/market/df_sectors')
-                        const data = await res.json()
-                        eastMoneyData.value = data.sectors ||[]
+                        const data = await fetchPage('eastmoney', '/market/df_sectors', more ? eastMoneyCursor.value : null)
+                        if (!data) return
+                        const sectors = data.sectors || []
+                        eastMoneyData.value = more ? [...eastMoneyData.value, ...sectors] : sectors
+                        eastMoneyCursor.value = data.next_cursor || null
+                        eastMoneyTotal.value = data.total || 0
                     } catch (e) {
                         console.error('获取东方财富数据失败:', e)
                     }
                 }
 
-                const fetchThs = async () => {
+                const fetchThs = async (more = false) => {
                     try {
-                        const res = await fetch('/market/ths_sectors')
-                        const data = await res.json()
-                        thsData.value = data.sectors ||[]
+                        const data = await fetchPage('ths', '/market/ths_sectors', more ? thsCursor.value : null)
+                        if (!data) return
+                        const sectors = data.sectors || []
+                        thsData.value = more ? [...thsData.value, ...sectors] : sectors
+                        thsCursor.value = data.next_cursor || null
+                        thsTotal.value = data.total || 0
                     } catch (e) {
                         console.error('获取同花顺数据失败:', e)
                     }
@@ -412,23 +640,24 @@ DASHBOARD_HTML = """
                     fetchThs()
                 })
 
-                const filteredEastMoney = computed(() => {
-                    if (!searchQuery.value) return eastMoneyData.value
-                    const query = searchQuery.value.toLowerCase()
-                    return eastMoneyData.value.filter(item => item.name.toLowerCase().includes(query))
-                })
-
-                const filteredThs = computed(() => {
-                    if (!searchQuery.value) return thsData.value
-                    const query = searchQuery.value.toLowerCase()
-                    return thsData.value.filter(item => item.name.toLowerCase().includes(query))
+                // 输入停顿 300ms 后按关键字重新从第一页查询
+                let searchTimer = null
+                watch(searchQuery, () => {
+                    clearTimeout(searchTimer)
+                    searchTimer = setTimeout(refreshData, 300)
                 })
 
                 return {
                     activeTab,
                     searchQuery,
-                    filteredEastMoney,
-                    filteredThs,
+                    eastMoneyData,
+                    eastMoneyCursor,
+                    eastMoneyTotal,
+                    thsData,
+                    thsCursor,
+                    thsTotal,
+                    fetchEastMoney,
+                    fetchThs,
                     getColorClass,
                     cookieInput,
                     selectedFsType,
@@ -513,7 +742,8 @@ def get_strategy_signal(
                 )
             params["is_holding"] = is_holding
 
-        result_dict = strategy_function(**params)
+        with tracing.span("strategy.run", strategy=strategy_name, fund_code=fund_code):
+            result_dict = strategy_function(**params)
 
         if result_dict.get("error"):
             logger.error(f"策略 '{strategy_name}' 执行失败: {result_dict['error']}")
@@ -547,71 +777,370 @@ def health_check():
     return schemas.HealthResponse(status="ok", timestamp=datetime.now().isoformat())
 
 
+@app.get(
+    "/metrics",
+    response_class=Response,
+    summary="Prometheus 指标",
+    tags=["System"],
+)
+def get_metrics():
+    """
+    以 Prometheus 文本格式输出本进程的指标：按路由的请求耗时、上游数据源耗时与失败次数、
+    策略指标计算耗时、入库行数与耗时、快照缓存命中率、定时任务耗时以及数据库连接池状态。
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _require_profile_token(request: Request) -> None:
+    token = request.headers.get(profiling.TOKEN_HEADER) or request.query_params.get(profiling.TOKEN_QUERY)
+    if not profiling.check_token(token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+@app.get(
+    "/debug/profiles",
+    summary="最近的剖析报告",
+    tags=["System"],
+)
+def list_profiles(request: Request):
+    """列出最近的按需剖析报告 (需要剖析口令，未开启或口令错误时返回 404)"""
+    _require_profile_token(request)
+    return [report.summary() for report in profiling.list_reports()]
+
+
+@app.get(
+    "/debug/profiles/{profile_id}",
+    response_class=Response,
+    summary="获取剖析报告 (折叠栈)",
+    tags=["System"],
+)
+def get_profile(profile_id: str, request: Request):
+    """
+    返回折叠栈格式的采样结果，可直接交给 flamegraph.pl 或拖入 speedscope 生成火焰图。
+    需要剖析口令，未开启、口令错误或报告已被淘汰时返回 404。
+    """
+    _require_profile_token(request)
+    report = profiling.get_report(profile_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"剖析报告 {profile_id} 不存在")
+    return Response(report.folded, media_type="text/plain; charset=utf-8")
+
+
+@app.get(
+    "/debug/traces",
+    summary="最近的追踪记录",
+    tags=["System"],
+)
+def list_traces(
+    request: Request,
+    name: Optional[str] = Query(None, description="根 span 名称，如 fetch_and_save_sectors、strategy.run"),
+    min_duration_ms: Optional[float] = Query(None, ge=0, description="只返回总耗时不低于该值的记录"),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """
+    按 trace 汇总最近结束的追踪记录 (新的在前)，span 明细见 /debug/traces/{trace_id}。
+    需要剖析口令，未配置或口令错误时返回 404。
+    """
+    _require_profile_token(request)
+    return tracing.recent_traces(limit=limit, name=name, min_duration_ms=min_duration_ms)
+
+
+@app.get(
+    "/debug/traces/{trace_id}",
+    summary="获取追踪记录的全部 span",
+    tags=["System"],
+)
+def get_trace(trace_id: str, request: Request):
+    """返回该 trace 已结束的全部 span (按开始时间排序，parent_id 指向父 span)，需要剖析口令"""
+    _require_profile_token(request)
+    spans = tracing.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"追踪记录 {trace_id} 不存在或已被淘汰")
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@app.get(
+    "/debug/queries",
+    summary="SQL 语句统计与连接池状态",
+    tags=["System"],
+)
+def list_query_stats(
+    request: Request,
+    sort_by: Literal["total_ms", "mean_ms", "max_ms", "count", "rows", "errors"] = Query("total_ms", description="排序字段 (降序)"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    按归一化语句聚合的执行次数、总耗时 / 平均 / 最大耗时、返回或影响的行数、慢查询与错误次数 (进程启动以来)，
+    以及本进程连接池的占用情况。多 worker 部署时每次请求只反映处理它的那个 worker (见 pid)。
+    需要剖析口令，未配置或口令错误时返回 404。
+    """
+    _require_profile_token(request)
+    return {
+        "slow_query_ms": query_stats.SLOW_QUERY_MS,
+        "pool": pool_status(),
+        "statements": query_stats.snapshot(sort_by=sort_by, limit=limit),
+    }
+
+
 @app.get(
     "/charts/rsi/{fund_code}",
     response_model=schemas.RsiChartResponse,
     summary="获取 RSI 策略图表数据",
     tags=["Charts"],
 )
-def get_rsi_chart(fund_code: str):
+def get_rsi_chart(fund_code: str, request: Request):
     """
     获取指定基金的 RSI 策略全量历史数据，用于前端 ECharts 绘图。
     包含：
     - 历史净值
     - RSI 指标值
     - 基于策略生成的买卖信号点
+
+    ETag 由最新净值日期与 RSI 参数决定，客户端校验值未变时跳过指标计算直接返回 304。
     """
-    chart_data = charts.get_rsi_chart_data(fund_code)
+    with tracing.span("charts.rsi", fund_code=fund_code) as chart_span:
+        nav = charts.get_historical_fund_data(fund_code)
+        if nav is None or nav.empty:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"无法获取基金 {fund_code} 的图表数据。",
+            )
 
-    if not chart_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"无法获取基金 {fund_code} 的图表数据。",
+        last_nav_date = nav.index[-1].date()
+        last_modified = datetime.combine(last_nav_date, time.min)
+        etag = http_cache.make_etag("rsi", fund_code, last_nav_date, charts.RSI_PERIOD, charts.RSI_UPPER, charts.RSI_LOWER)
+        max_age = http_cache.seconds_until_next(http_cache.NAV_PUBLISH_TIMES)
+        chart_span.set(nav_rows=len(nav))
+        if http_cache.is_not_modified(request.headers, etag, last_modified):
+            chart_span.set(not_modified=True)
+            return Response(status_code=304, headers=http_cache.cache_headers(etag, last_modified, max_age))
+
+        chart_data = schemas.RsiChartResponse(**charts.build_rsi_chart_data(nav))
+        with tracing.span("charts.serialize"):
+            body = chart_data.model_dump_json().encode("utf-8")
+        return http_cache.conditional_response(
+            request.headers, http_cache.CachedBody(body, etag, last_modified), max_age
         )
 
-    return chart_data
+
+SectorBuilder = Callable[[], Awaitable[Tuple[Any, Optional[datetime]]]]
+
+
+def _max_updated_at(*row_groups) -> Optional[datetime]:
+    return max((r.updated_at for rows in row_groups for r in rows), default=None)
+
+
+async def _cached_json_response(request: Request, key: str, build: SectorBuilder) -> Response:
+    """
+    优先返回快照缓存中预先序列化好的响应字节；未命中时查询数据库并写回缓存。
+    入库时 save_* 会使对应 key 失效，因此缓存内容始终是最新一批数据。
+    build 返回 (响应数据, 数据中最新的 updated_at)，后者用于 Last-Modified / ETag，
+    客户端携带的校验值仍然有效时返回 304。
+    """
+    cached = sector_cache.get(key)
+    if cached is None:
+        generation = sector_cache.generation(key)
+        data, last_modified = await build()
+        if isinstance(data, BaseModel):
+            payload = data.model_dump_json().encode("utf-8")
+        else:
+            payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # 统计值、映射表等衍生数据可能在 updated_at 不变时更新，因此 ETag 同时包含响应体摘要
+        etag = http_cache.make_etag(key, last_modified, hashlib.blake2b(payload, digest_size=8).hexdigest())
+        cached = http_cache.CachedBody(payload, etag, last_modified)
+        sector_cache.put(key, cached, generation)
+    return http_cache.conditional_response(request.headers, cached, sector_revalidation.max_age())
+
+
+async def _build_df_sector_list() -> Tuple[schemas.SectorListResponse, Optional[datetime]]:
+    sectors = await get_today_eastmoney_sectors()
+    return schemas.SectorListResponse(
+        count=len(sectors),
+        sectors=[schemas.SectorInfo.model_validate(s) for s in sectors],
+    ), _max_updated_at(sectors)
+
+
+async def _build_ths_sector_list() -> Tuple[schemas.ThsSectorListResponse, Optional[datetime]]:
+    sectors = await get_today_ths_sectors()
+    return schemas.ThsSectorListResponse(
+        count=len(sectors),
+        sectors=[schemas.ThsSectorInfo.model_validate(s) for s in sectors],
+    ), _max_updated_at(sectors)
+
+
+async def _build_df_sector_list_with_stats() -> Tuple[schemas.SectorListWithStatsResponse, Optional[datetime]]:
+    sectors = await get_today_eastmoney_sectors()
+    stats = await rolling_stats.load_sector_stats("eastmoney", sectors[0].date) if sectors else {}
+    return schemas.SectorListWithStatsResponse(
+        count=len(sectors),
+        sectors=[
+            schemas.SectorInfoWithStats(
+                **schemas.SectorInfo.model_validate(s).model_dump(),
+                stats=rolling_stats.describe_sector("eastmoney", s, stats),
+            )
+            for s in sectors
+        ],
+    ), _max_updated_at(sectors)
+
+
+async def _build_ths_sector_list_with_stats() -> Tuple[schemas.ThsSectorListWithStatsResponse, Optional[datetime]]:
+    sectors = await get_today_ths_sectors()
+    stats = await rolling_stats.load_sector_stats("ths", sectors[0].date) if sectors else {}
+    return schemas.ThsSectorListWithStatsResponse(
+        count=len(sectors),
+        sectors=[
+            schemas.ThsSectorInfoWithStats(
+                **schemas.ThsSectorInfo.model_validate(s).model_dump(),
+                stats=rolling_stats.describe_sector("ths", s, stats),
+            )
+            for s in sectors
+        ],
+    ), _max_updated_at(sectors)
+
+
+async def _build_sector_names() -> Tuple[dict, Optional[datetime]]:
+    # 两张表互不依赖，使用各自的 session 并发查询
+    em_sectors, ths_sectors = await asyncio.gather(
+        get_today_eastmoney_sectors(), get_today_ths_sectors()
+    )
+    return {
+        "东方财富": [s.name for s in em_sectors],
+        "同花顺": [s.name for s in ths_sectors],
+    }, _max_updated_at(em_sectors, ths_sectors)
+
+
+EastMoneySortField = Literal["change_percent", "market_cap", "turnover_rate", "amount"]
+ThsSortField = Literal["change_percent", "net_inflow", "up_count", "down_count", "turnover_ratio"]
+MAX_PAGE_SIZE = 500
+
+
+def _encode_cursor(day: date, value: float, row_id: int) -> str:
+    """keyset 分页游标：上一页最后一行的 (日期, 排序值, id)，URL 安全的 base64"""
+    raw = json.dumps([day.isoformat(), value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        day, value, row_id = json.loads(raw)
+        return date.fromisoformat(day), float(value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标")
+
+
+async def _sector_page_response(
+    source: str,
+    info_model: type[BaseModel],
+    stats_model: type[BaseModel],
+    page_model: type[BaseModel],
+    q: Optional[str],
+    sort_by: str,
+    order: str,
+    min_value: Optional[float],
+    max_value: Optional[float],
+    limit: Optional[int],
+    cursor: Optional[str],
+    with_stats: bool,
+) -> Response:
+    """带筛选/排序/分页参数的列表请求：直接在数据库中执行，不经过快照缓存"""
+    after = _decode_cursor(cursor) if cursor else None
+    # 多取一行用于判断是否还有下一页
+    day, total, rows = await query_sectors(
+        source, q, sort_by, order == "desc", min_value, max_value, after, limit + 1 if limit else None
+    )
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(day, getattr(rows[-1], sort_by), rows[-1].id)
+
+    if with_stats and rows:
+        stats = await rolling_stats.load_sector_stats(source, day)
+        sectors = [
+            stats_model(**info_model.model_validate(s).model_dump(), stats=rolling_stats.describe_sector(source, s, stats))
+            for s in rows
+        ]
+    else:
+        sectors = [info_model.model_validate(s) for s in rows]
+    page = page_model(count=len(sectors), total=total, next_cursor=next_cursor, sectors=sectors)
+    return Response(content=page.model_dump_json().encode("utf-8"), media_type="application/json")
+
+
+def _is_default_listing(q, sort_by, order, min_value, max_value, limit, cursor) -> bool:
+    """未指定任何筛选/分页参数时走快照缓存，响应与原接口完全一致"""
+    return (
+        q is None and min_value is None and max_value is None and limit is None and cursor is None
+        and sort_by == "change_percent" and order == "desc"
+    )
 
 
 @app.get(
     "/market/df_sectors",
-    response_model=schemas.SectorListResponse,
+    response_model=schemas.SectorListResponse | schemas.SectorListWithStatsResponse | schemas.SectorPageResponse,
     summary="获取行业板块数据(东方财富)",
     tags=["Market"],
 )
-async def get_df_sector_list():
+async def get_df_sector_list(
+    request: Request,
+    with_stats: bool = Query(False, description="附带涨跌幅/换手率/成交额相对自身历史的 z-score 与百分位"),
+    q: Optional[str] = Query(None, min_length=1, max_length=50, description="板块名称包含的关键字"),
+    sort_by: EastMoneySortField = Query("change_percent", description="排序字段"),
+    order: Literal["asc", "desc"] = Query("desc", description="排序方向"),
+    min_value: Optional[float] = Query(None, description="sort_by 字段的最小值 (原始值，含)"),
+    max_value: Optional[float] = Query(None, description="sort_by 字段的最大值 (原始值，含)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每页条数，不传则返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+):
     """
     从数据库获取当日（最新可用）东方财富的行业板块数据。
+    指定 q / sort_by / order / min_value / max_value / limit / cursor 任一参数时，
+    在数据库中完成筛选、排序与 keyset 分页，返回 SectorPageResponse。
     """
-    sectors = await get_today_eastmoney_sectors()
-
-    return schemas.SectorListResponse(
-        count=len(sectors),
-        sectors=[schemas.SectorInfo.model_validate(s) for s in sectors],
-    )
+    if not _is_default_listing(q, sort_by, order, min_value, max_value, limit, cursor):
+        return await _sector_page_response(
+            "eastmoney", schemas.SectorInfo, schemas.SectorInfoWithStats, schemas.SectorPageResponse,
+            q, sort_by, order, min_value, max_value, limit, cursor, with_stats,
+        )
+    if with_stats:
+        return await _cached_json_response(request, DF_SECTORS_STATS, _build_df_sector_list_with_stats)
+    return await _cached_json_response(request, DF_SECTORS, _build_df_sector_list)
 
 
 @app.get(
     "/market/ths_sectors",
-    response_model=schemas.ThsSectorListResponse,
+    response_model=schemas.ThsSectorListResponse | schemas.ThsSectorListWithStatsResponse | schemas.ThsSectorPageResponse,
     summary="获取同花顺行业板块数据",
     tags=["Market"],
 )
-async def get_ths_sector_list():
+async def get_ths_sector_list(
+    request: Request,
+    with_stats: bool = Query(False, description="附带涨跌幅/成交占比/净流入相对自身历史的 z-score 与百分位"),
+    q: Optional[str] = Query(None, min_length=1, max_length=50, description="板块名称包含的关键字"),
+    sort_by: ThsSortField = Query("change_percent", description="排序字段"),
+    order: Literal["asc", "desc"] = Query("desc", description="排序方向"),
+    min_value: Optional[float] = Query(None, description="sort_by 字段的最小值 (含)"),
+    max_value: Optional[float] = Query(None, description="sort_by 字段的最大值 (含)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每页条数，不传则返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+):
     """
     从数据库获取当日（最新可用）同花顺行业板块数据。
+    筛选/排序/分页参数同 /market/df_sectors。
     """
-    sectors = await get_today_ths_sectors()
-
-    return schemas.ThsSectorListResponse(
-        count=len(sectors),
-        sectors=[schemas.ThsSectorInfo.model_validate(s) for s in sectors],
-    )
+    if not _is_default_listing(q, sort_by, order, min_value, max_value, limit, cursor):
+        return await _sector_page_response(
+            "ths", schemas.ThsSectorInfo, schemas.ThsSectorInfoWithStats, schemas.ThsSectorPageResponse,
+            q, sort_by, order, min_value, max_value, limit, cursor, with_stats,
+        )
+    if with_stats:
+        return await _cached_json_response(request, THS_SECTORS_STATS, _build_ths_sector_list_with_stats)
+    return await _cached_json_response(request, THS_SECTORS, _build_ths_sector_list)
 
 
 @app.get(
     "/market/sector_names", summary="获取两家数据源的板块名称列表", tags=["Market"]
 )
-async def get_sector_names():
+async def get_sector_names(request: Request):
     """
     返回当日数据库中最新的东方财富和同花顺的所有板块名称。
     格式示范：
@@ -620,13 +1149,319 @@ async def get_sector_names():
         "同花顺": ["板块1"]
     }
     """
-    em_sectors = await get_today_eastmoney_sectors()
-    ths_sectors = await get_today_ths_sectors()
+    return await _cached_json_response(request, SECTOR_NAMES, _build_sector_names)
+
+
+async def _build_joined_sectors() -> Tuple[schemas.JoinedSectorListResponse, Optional[datetime]]:
+    rows = await get_joined_sectors()
+    return schemas.JoinedSectorListResponse(
+        count=len(rows),
+        sectors=[
+            schemas.JoinedSector(
+                eastmoney=schemas.SectorInfo.model_validate(em),
+                ths=schemas.ThsSectorInfo.model_validate(ths),
+                score=score,
+                method=method,
+            )
+            for em, ths, score, method in rows
+        ],
+    ), _max_updated_at([em for em, *_ in rows], [ths for _, ths, *_ in rows])
+
+
+@app.get(
+    "/market/sectors/joined",
+    response_model=schemas.JoinedSectorListResponse,
+    summary="获取按映射表合并的两家数据源板块数据",
+    tags=["Market"],
+)
+async def get_joined_sector_list(request: Request):
+    """
+    按预先构建的东方财富 ↔ 同花顺板块映射表，返回同一板块在两家数据源的最新数据，
+    每个板块一行，按同花顺涨跌幅降序。未建立映射的板块不在结果中。
+    """
+    return await _cached_json_response(request, SECTORS_JOINED, _build_joined_sectors)
+
+
+def _to_local_naive(dt: datetime) -> datetime:
+    """updated_at 列存储不带时区的本地时间；带时区的时间 (如 JS toISOString() 的 ...Z) 先换算为本地时间再去掉时区"""
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+
+
+async def _build_changes(since: datetime, sources: Tuple[str, ...]) -> schemas.SectorChangesResponse:
+    since = _to_local_naive(since)
+    changes = await get_sector_changes(since, sources)
+    em_rows, ths_rows = changes.get("eastmoney", []), changes.get("ths", [])
+    until = max((r.updated_at for r in (*em_rows, *ths_rows)), default=since)
+    return schemas.SectorChangesResponse(
+        since=since,
+        until=until,
+        eastmoney=[schemas.SectorInfo.model_validate(r) for r in em_rows],
+        ths=[schemas.ThsSectorInfo.model_validate(r) for r in ths_rows],
+    )
 
-    return {
-        "东方财富": [s.name for s in em_sectors],
-        "同花顺": [s.name for s in ths_sectors],
-    }
+
+@app.get(
+    "/market/changes",
+    response_model=schemas.SectorChangesResponse,
+    summary="获取指定时间之后有更新的板块数据",
+    tags=["Market"],
+)
+async def get_sector_changes_since(
+    since: datetime = Query(..., description="上一次获取到的 until，只返回之后有更新的行"),
+    source: Optional[Literal["eastmoney", "ths"]] = Query(None, description="数据源，默认两家都返回"),
+):
+    """
+    增量拉取：看板首次加载全量列表后，只需用上一次响应的 until 作为 since 轮询变更行，
+    或直接订阅 /market/stream 接收推送。
+    """
+    return await _build_changes(since, (source,) if source else ("eastmoney", "ths"))
+
+
+@app.get(
+    "/market/stream",
+    summary="订阅板块数据变更推送 (SSE)",
+    tags=["Market"],
+    response_class=StreamingResponse,
+)
+async def stream_sector_changes(request: Request):
+    """
+    Server-Sent Events 推送：每次板块数据入库后推送一条 `sectors` 事件，data 为本批有变化的行。
+    断线重连时浏览器会携带 Last-Event-ID，服务端先补发该时间之后的变更；
+    收到 `resync` 事件表示推送积压被丢弃，客户端应重新拉取全量列表。
+    """
+    # 先订阅再补发，避免补发查询期间入库的变更丢失
+    queue = events.broadcaster.subscribe()
+    last_event_id = request.headers.get("last-event-id")
+
+    async def body():
+        try:
+            yield f"retry: {int(events.HEARTBEAT_SECONDS * 1000)}\n\n".encode()
+            if last_event_id:
+                try:
+                    since = datetime.fromisoformat(last_event_id)
+                except ValueError:
+                    yield events.RESYNC_MESSAGE
+                else:
+                    catch_up = await _build_changes(since, ("eastmoney", "ths"))
+                    if catch_up.eastmoney or catch_up.ths:
+                        yield events.format_sse("changes", catch_up.model_dump_json(), catch_up.until.isoformat())
+            async for message in events.stream(queue, request.is_disconnected):
+                yield message
+        finally:
+            events.broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get(
+    "/market/snapshots",
+    response_model=schemas.MarketSnapshotResponse,
+    summary="获取指定时刻的全市场板块快照",
+    tags=["Market"],
+)
+async def get_market_snapshot_at(
+    source: Literal["eastmoney", "ths"] = Query("eastmoney", description="数据源"),
+    at: Optional[datetime] = Query(None, description="快照时刻，默认当前时间"),
+    fs_type: Optional[int] = Query(None, description="东方财富板块类型: 2=行业, 3=概念"),
+):
+    """
+    返回当天开盘至 `at` 之间，每个板块最后一次记录的值，
+    例如 `at=2026-03-05T11:30:00` 即为上午收盘时的全市场画面。
+    """
+    at = at or datetime.now()
+    rows = await get_market_snapshot(SOURCE_CODES[source], at, fs_type)
+    sectors = [
+        schemas.MarketSnapshotSector(
+            name=name, **schemas.SectorSnapshotPoint.model_validate(snapshot).model_dump()
+        )
+        for name, snapshot in rows
+    ]
+    return schemas.MarketSnapshotResponse(source=source, at=at, count=len(sectors), sectors=sectors)
+
+
+@app.get(
+    "/market/snapshots/{name}",
+    response_model=schemas.SectorIntradayResponse,
+    summary="获取单个板块的盘中走势",
+    tags=["Market"],
+)
+async def get_sector_intraday_path(
+    name: str,
+    source: Literal["eastmoney", "ths"] = Query("eastmoney", description="数据源"),
+    day: Optional[date] = Query(None, description="交易日，默认今天"),
+    fs_type: Optional[int] = Query(None, description="东方财富板块类型: 2=行业, 3=概念"),
+):
+    """
+    返回指定板块在某个交易日内的全部快照，按抓取时间升序排列。
+    """
+    day = day or date.today()
+    snapshots = await get_sector_intraday(SOURCE_CODES[source], name, day, fs_type)
+    return schemas.SectorIntradayResponse(
+        name=name,
+        source=source,
+        date=day,
+        count=len(snapshots),
+        points=[schemas.SectorSnapshotPoint.model_validate(s) for s in snapshots],
+    )
+
+
+# 多板块历史查询单次允许的最大板块数
+MAX_HISTORY_SECTORS = 50
+
+
+def _to_sector_history(source: str, name: str, rows: list) -> schemas.SectorHistory:
+    """将按日期升序的行转换为列式数组"""
+    _, fields = SECTOR_HISTORY_SOURCES[source]
+    return schemas.SectorHistory(
+        name=name,
+        source=source,
+        dates=[r.date for r in rows],
+        series={f: [getattr(r, f) for r in rows] for f in fields},
+    )
+
+
+@app.get(
+    "/market/sectors/history",
+    response_model=schemas.SectorHistoryBatchResponse,
+    summary="获取多个板块的历史走势",
+    tags=["Market"],
+)
+async def get_sectors_history(
+    names: List[str] = Query(..., description="板块名称，可重复传入多个"),
+    source: Literal["eastmoney", "ths"] = Query("eastmoney", description="数据源"),
+    start: Optional[date] = Query(None, description="开始日期 (含)"),
+    end: Optional[date] = Query(None, description="结束日期 (含)"),
+    days: int = Query(60, ge=1, le=1000, description="每个板块最多返回最近多少个交易日"),
+):
+    """
+    一次返回多个板块的列式历史数据，所有板块合并为一次数据库查询。
+    """
+    names = list(dict.fromkeys(names))
+    if len(names) > MAX_HISTORY_SECTORS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"单次最多查询 {MAX_HISTORY_SECTORS} 个板块",
+        )
+    history = await get_sector_history(source, names, start, end, days)
+    sectors = [_to_sector_history(source, name, rows) for name, rows in history.items()]
+    return schemas.SectorHistoryBatchResponse(source=source, count=len(sectors), sectors=sectors)
+
+
+@app.get(
+    "/market/sectors/{name}/history",
+    response_model=schemas.SectorHistory,
+    summary="获取单个板块的历史走势",
+    tags=["Market"],
+)
+async def get_sector_history_by_name(
+    name: str,
+    source: Literal["eastmoney", "ths"] = Query("eastmoney", description="数据源"),
+    start: Optional[date] = Query(None, description="开始日期 (含)"),
+    end: Optional[date] = Query(None, description="结束日期 (含)"),
+    days: int = Query(60, ge=1, le=1000, description="最多返回最近多少个交易日"),
+):
+    """
+    返回指定板块最近 `days` 个交易日的列式历史数据，例如"半导体最近 60 个交易日的走势"。
+    """
+    history = await get_sector_history(source, [name], start, end, days)
+    return _to_sector_history(source, name, history[name])
+
+
+ROTATION_SORT_FIELDS = Literal[
+    "ret_5", "ret_20", "ret_60", "rank_change_5", "rank_change_20", "rank_change_60", "flow_streak"
+]
+
+
+@app.get(
+    "/market/rotation",
+    response_model=schemas.SectorRotationResponse,
+    summary="获取板块轮动 / 动量分析",
+    tags=["Market"],
+)
+async def get_sector_rotation(
+    source: Literal["eastmoney", "ths"] = Query("ths", description="数据源"),
+    day: Optional[date] = Query(None, description="交易日，默认最新"),
+    sort_by: ROTATION_SORT_FIELDS = Query("ret_20", description="排序字段 (降序)"),
+    limit: Optional[int] = Query(None, ge=1, description="只返回排序后的前 N 个板块"),
+    fs_type: Optional[int] = Query(None, description="东方财富板块类型: 2=行业, 3=概念，默认全部"),
+):
+    """
+    返回预先计算好的 5/20/60 日累计涨跌幅、排名变化与资金连续流入天数。
+    指标在每次板块数据入库后由后台任务更新，本接口只做读取与排序。
+    东方财富的行业与概念板块分别排名，查看动量排行时宜用 fs_type 只取其中一类。
+    """
+    latest_day, rows = await rotation.get_latest_rotation(source, day, fs_type)
+    sectors = [
+        schemas.SectorRotationInfo.model_validate({
+            "name": name,
+            "fs_type": sector_fs_type,
+            **{f: getattr(r, f) for f in schemas.SectorRotationInfo.model_fields if f not in ("name", "fs_type")},
+        })
+        for name, sector_fs_type, r in rows
+    ]
+    sectors.sort(key=lambda s: (getattr(s, sort_by) is None, -(getattr(s, sort_by) or 0)))
+    if limit:
+        sectors = sectors[:limit]
+    return schemas.SectorRotationResponse(source=source, date=latest_day, count=len(sectors), sectors=sectors)
+
+
+@app.get(
+    "/market/breadth",
+    response_model=schemas.MarketBreadthResponse,
+    summary="获取市场宽度 (涨跌家数汇总)",
+    tags=["Market"],
+)
+async def get_market_breadth(
+    day: Optional[date] = Query(None, description="交易日，默认最新"),
+    days: int = Query(30, ge=1, le=365, description="每日汇总历史的天数"),
+):
+    """
+    返回同花顺全部板块的上涨/下跌家数、上涨家数占比、净流入合计与上涨板块数：
+    - **latest**: 最新快照
+    - **intraday**: 当日各快照时点
+    - **daily**: 最近 `days` 天的每日汇总
+    """
+    intraday, daily = await breadth.get_breadth(day, days)
+    intraday_points = [schemas.MarketBreadthPoint.model_validate(p) for p in intraday]
+    return schemas.MarketBreadthResponse(
+        latest=intraday_points[-1] if intraday_points else None,
+        intraday=intraday_points,
+        daily=[schemas.MarketBreadthPoint.model_validate(p) for p in daily],
+    )
+
+
+@app.get(
+    "/market/fetch_runs",
+    response_model=schemas.FetchRunListResponse,
+    summary="查询抓取运行记录",
+    tags=["Market"],
+)
+async def list_fetch_runs(
+    source: Optional[Literal["eastmoney", "ths"]] = Query(None, description="数据源"),
+    fs_type: Optional[int] = Query(None, description="东方财富板块类型: 2=行业, 3=概念；同花顺为 0"),
+    run_status: Optional[Literal["success", "empty", "failed", "timeout"]] = Query(None, alias="status", description="运行结果"),
+    since: Optional[datetime] = Query(None, description="开始时间下限 (含)"),
+    until: Optional[datetime] = Query(None, description="开始时间上限 (不含)"),
+    limit: int = Query(100, ge=1, le=1000, description="最多返回条数"),
+):
+    """
+    按开始时间倒序返回每次定时 / 手动抓取的运行记录 (每个数据源一行)：
+    页数、获取与变更行数、重试次数、响应字节数，以及浏览器启动、等待 Cookie、分页请求、解析、入库等各阶段耗时。
+    **summary** 汇总本次查询结果的成功次数与耗时 p50 / p95 / 最大值，便于观察抓取是否在变慢。
+    """
+    rows = await fetch_runs.get_runs(source, fs_type, run_status, since, until, limit)
+    runs = [schemas.FetchRunInfo.model_validate(r) for r in rows]
+    summary = fetch_runs.summarize_runs(
+        [r.duration_ms for r in runs],
+        [r.status for r in runs],
+        rows_fetched=sum(r.rows_fetched for r in runs),
+        retries=sum(r.retries for r in runs),
+    )
+    return schemas.FetchRunListResponse(summary=schemas.FetchRunSummary(**summary), runs=runs)
 
 
 @app.post(
@@ -644,14 +1479,38 @@ async def trigger_fetch_eastmoney(request: schemas.EastMoneyFetchRequest):
     logger.info(
         f"手动触发获取东方财富数据: cookie_provided={bool(request.cookie)}, fs_type={request.fs_type}"
     )
+    spans: List[tracing.Span] = []
+    started_at, started = datetime.now(), perf_counter()
+    sectors, changed, error = None, 0, None
     try:
-        sectors = await market.fetch_eastmoney_sectors(
-            cookie=request.cookie, fs_type=request.fs_type
-        )
+        with tracing.collect(spans), tracing.span("trigger_fetch_eastmoney", fs_type=request.fs_type):
+            sectors = await market.fetch_eastmoney_batch(
+                cookie=request.cookie, fs_type=request.fs_type
+            )
+            changed = await save_eastmoney_sectors(sectors, fs_type=request.fs_type) if sectors else 0
+    except Exception as e:
+        error = e
+    if changed:
+        sector_revalidation.mark()
+    await fetch_runs.record_runs([fetch_runs.build_run(
+        source="eastmoney",
+        fs_type=request.fs_type,
+        trigger="manual",
+        status="failed" if error else ("success" if sectors else "empty"),
+        started_at=started_at,
+        finished_at=started_at + timedelta(seconds=perf_counter() - started),
+        rows_fetched=len(sectors) if sectors else 0,
+        rows_changed=changed,
+        spans=spans,
+        error=repr(error) if error else None,
+    )])
+
+    try:
+        if error:
+            raise error
         if sectors:
-            await save_eastmoney_sectors(sectors)
             return schemas.EastMoneyFetchResponse(
-                success=True, message="获取并保存成功", count=len(sectors)
+                success=True, message=f"获取成功，{changed} 条有变化并已保存", count=len(sectors)
             )
         else:
             return schemas.EastMoneyFetchResponse(
@@ -681,6 +1540,10 @@ async def trigger_fetch_eastmoney(request: schemas.EastMoneyFetchRequest):
         )
 
 
+# 上传数据按批入库：累计到该行数写一次，兼顾内存占用与写入次数
+UPLOAD_BATCH_ROWS = 1000
+
+
 @app.post(
     "/market/upload/eastmoney",
     response_model=schemas.EastMoneyUploadResponse,
@@ -689,34 +1552,65 @@ async def trigger_fetch_eastmoney(request: schemas.EastMoneyFetchRequest):
 )
 async def upload_eastmoney_data(request: Request):
     """
-    接收纯文本格式的东方财富 JSONP 或 JSON 字符串，
-    无需 JSON 包裹，直接把原始文本放在请求体(Body)中发送即可。
-    解析其中的板块数据并插入/更新到数据库。支持分批次上传。
+    接收东方财富 JSONP 或 JSON 原始文本，直接放在请求体(Body)中发送即可，无需 JSON 包裹。支持：
+    - 多页：NDJSON (每行一页) 或多段 JSONP 首尾相接，一次请求即可完成整批回填；
+    - gzip 压缩：请求头 Content-Encoding: gzip，或请求体本身就是 .gz 文件 (按魔数识别)。
+    请求体边接收边解析，解析出的页累积到 UPLOAD_BATCH_ROWS 行即入库一次，内存占用只与单页大小相关。
+    响应中返回每页解析出的条数。
     """
-    # 直接读取原始的 HTTP Body 请求体并解码为字符串
-    raw_bytes = await request.body()
-    raw_data = raw_bytes.decode("utf-8")
+    gzipped = True if "gzip" in request.headers.get("content-encoding", "").lower() else None
+    logger.info(f"收到手动上传的东方财富数据: gzip={gzipped}, Content-Length={request.headers.get('content-length')}")
 
-    logger.info(f"收到手动上传的东方财富纯文本数据，数据长度: {len(raw_data)}")
+    pages: List[schemas.EastMoneyUploadPage] = []
+    pending: List[market.EastMoneyBatch] = []
+    pending_rows = count = changed = 0
+    stream_error = None
     try:
-        sectors = market.parse_eastmoney_jsonp(raw_data)
-        if sectors:
-            await save_eastmoney_sectors(sectors)
-            return schemas.EastMoneyUploadResponse(
-                success=True,
-                message=f"成功解析并保存 {len(sectors)} 条数据",
-                count=len(sectors),
-            )
-        else:
-            return schemas.EastMoneyUploadResponse(
-                success=False, message="未能从提供的数据中解析出有效内容", count=0
-            )
+        try:
+            async for document in market.iter_upload_documents(request.stream(), gzipped):
+                page_no = len(pages) + 1
+                try:
+                    batch = market.parse_eastmoney_page(document)
+                except ValueError as e:
+                    logger.warning(f"[Upload Page {page_no}] 解析失败: {e}")
+                    pages.append(schemas.EastMoneyUploadPage(page=page_no, count=0, success=False, message=f"解析失败: {e}"))
+                    continue
+                pages.append(schemas.EastMoneyUploadPage(page=page_no, count=len(batch)))
+                count += len(batch)
+                pending.append(batch)
+                pending_rows += len(batch)
+                if pending_rows >= UPLOAD_BATCH_ROWS:
+                    changed += await save_eastmoney_sectors(market.EastMoneyBatch.concat(pending))
+                    pending, pending_rows = [], 0
+        except ValueError as e:
+            # 数据流本身异常 (解压失败、单页过大、截断)：已解析的页照常入库，并在响应中说明
+            logger.warning(f"手动上传的东方财富数据流异常 (已解析 {len(pages)} 页): {e}")
+            stream_error = str(e)
+        if pending:
+            changed += await save_eastmoney_sectors(market.EastMoneyBatch.concat(pending))
     except Exception as e:
         logger.error(f"手动上传东方财富数据异常: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"数据处理异常: {str(e)}",
         )
+    finally:
+        if changed:
+            sector_revalidation.mark()
+
+    if stream_error:
+        message = f"数据流异常: {stream_error}；此前解析的 {len(pages)} 页共 {count} 条已保存"
+    elif count:
+        message = f"成功解析 {len(pages)} 页共 {count} 条数据，{changed} 条有变化并已保存"
+    else:
+        message = "未能从提供的数据中解析出有效内容"
+    return schemas.EastMoneyUploadResponse(
+        success=bool(count) and stream_error is None and all(p.success for p in pages),
+        message=message,
+        count=count,
+        changed=changed,
+        pages=pages,
+    )
 
 
 @app.post(
@@ -727,71 +1621,31 @@ async def upload_eastmoney_data(request: Request):
 )
 async def trigger_fetch_with_ths(request: schemas.FetchWithThsRequest):
     """
-    获取指定类型的东方财富板块 + 同花顺板块，按顺序执行：
-    1. 东方财富板块 (fs_type=2 或 3)
-    2. 同花顺板块
-    全部完成后返回每一步的执行结果。
+    并发获取指定类型的东方财富板块 + 同花顺板块：
+    - 东方财富板块 (fs_type=2 或 3)
+    - 同花顺板块
+    两条流水线各自抓取并入库，受全局截止时间约束，全部结束后返回每一步的结果与耗时。
     """
     fs_type_name = "东方财富行业板块" if request.fs_type == 2 else "东方财富概念板块"
     logger.info(f"开始获取 {fs_type_name} + 同花顺板块: cookie_provided={bool(request.cookie)}")
 
-    steps = []
-    all_success = True
-
-    # 步骤 1: 东方财富板块
-    try:
-        logger.info(f"步骤 1/2: 获取 {fs_type_name}...")
-        sectors = await market.fetch_eastmoney_sectors(
-            cookie=request.cookie, fs_type=request.fs_type
-        )
-        count = len(sectors) if sectors else 0
-        if sectors:
-            await save_eastmoney_sectors(sectors)
-        steps.append(schemas.FetchWithThsStepResult(
-            name=fs_type_name,
-            success=count > 0,
-            message=f"获取并保存 {count} 条数据" if count > 0 else "未获取到数据",
-            count=count
-        ))
-        if count == 0:
-            all_success = False
-    except Exception as e:
-        logger.error(f"步骤 1 异常: {e}")
-        steps.append(schemas.FetchWithThsStepResult(
-            name=fs_type_name,
-            success=False,
-            message=f"异常: {str(e)}",
-            count=0
-        ))
-        all_success = False
-
-    # 步骤 2: 同花顺板块
-    try:
-        logger.info("步骤 2/2: 获取同花顺板块...")
-        sectors = await market.fetch_ths_sectors()
-        count = len(sectors) if sectors else 0
-        if sectors:
-            await save_ths_sectors(sectors)
-        steps.append(schemas.FetchWithThsStepResult(
-            name="同花顺板块",
-            success=count > 0,
-            message=f"获取并保存 {count} 条数据" if count > 0 else "未获取到数据",
-            count=count
-        ))
-        if count == 0:
-            all_success = False
-    except Exception as e:
-        logger.error(f"步骤 2 异常: {e}")
-        steps.append(schemas.FetchWithThsStepResult(
-            name="同花顺板块",
-            success=False,
-            message=f"异常: {str(e)}",
-            count=0
-        ))
-        all_success = False
+    started = perf_counter()
+    with tracing.span("trigger_fetch_with_ths", fs_type=request.fs_type):
+        steps = await run_fetch_pipelines([
+            FetchStep(
+                fs_type_name,
+                lambda: market.fetch_eastmoney_batch(cookie=request.cookie, fs_type=request.fs_type),
+                partial(save_eastmoney_sectors, fs_type=request.fs_type),
+                "eastmoney",
+                request.fs_type,
+            ),
+            FetchStep("同花顺板块", market.fetch_ths_sectors, save_ths_sectors, "ths"),
+        ])
+    all_success = all(step.success for step in steps)
 
     return schemas.FetchWithThsResponse(
         success=all_success,
         message="获取完成" if all_success else "部分任务失败",
-        steps=steps
+        steps=steps,
+        elapsed_ms=round((perf_counter() - started) * 1000, 1),
     )
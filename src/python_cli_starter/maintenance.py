@@ -0,0 +1,215 @@
+# src/python_cli_starter/maintenance.py
+"""
+板块数据表的分区与数据保留维护任务：
+1. 为按月分区的表预先创建未来几个月的分区；
+2. 将超过保留期的旧分区从主表上 DETACH，并移动到 archive schema 归档；
+3. 将超过保留天数的盘中快照压缩为每日汇总 (sector_daily_rollups)，随后删除明细。
+"""
+import os
+import re
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+# 按月分区的表及其分区键
+PARTITIONED_TABLES = {
+    "eastmoney_sectors": "date",
+    "ths_sectors": "date",
+}
+ARCHIVE_SCHEMA = "archive"
+
+# 预先创建未来几个月的分区
+PARTITION_MONTHS_AHEAD = int(os.getenv("SECTOR_PARTITION_MONTHS_AHEAD", "2"))
+# 超过多少个月的分区会被归档；0 表示永久保留在主表中
+PARTITION_ARCHIVE_AFTER_MONTHS = int(os.getenv("SECTOR_PARTITION_ARCHIVE_AFTER_MONTHS", "0"))
+# 盘中快照明细保留天数，更早的明细压缩为每日汇总；0 表示不压缩
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SECTOR_SNAPSHOT_RETENTION_DAYS", "30"))
+
+_PARTITION_NAME_RE = re.compile(r"^(?P<table>.+)_p(?P<year>\d{4})(?P<month>\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, months: int) -> date:
+    """返回 d 所在月份偏移 months 个月后的月初"""
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_pdefault"
+
+
+def parse_partition_month(name: str) -> Optional[Tuple[str, date]]:
+    """从分区表名解析出 (主表名, 月初日期)，不符合命名规则时返回 None"""
+    m = _PARTITION_NAME_RE.match(name)
+    if not m:
+        return None
+    return m.group("table"), date(int(m.group("year")), int(m.group("month")), 1)
+
+
+def months_to_create(today: date, months_ahead: int) -> List[date]:
+    """当前月及未来 months_ahead 个月的月初列表"""
+    return [add_months(today, i) for i in range(months_ahead + 1)]
+
+
+def partitions_to_archive(partitions: List[str], today: date, archive_after_months: int) -> List[str]:
+    """筛选出整月都早于保留期的分区"""
+    if archive_after_months <= 0:
+        return []
+    cutoff = add_months(today, -archive_after_months)
+    expired = []
+    for name in partitions:
+        parsed = parse_partition_month(name)
+        if parsed and add_months(parsed[1], 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+async def _list_partitions(conn: AsyncConnection, table: str) -> List[str]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table})
+    return [row[0] for row in result.all()]
+
+
+async def _take_rows_from_default(conn: AsyncConnection, table: str, key: str, start: date, end: date) -> Optional[str]:
+    """
+    默认分区中落在 [start, end) 的行会使 Postgres 拒绝创建该范围的分区 (如维护任务错过了某个月)，
+    先将这些行移到临时表，返回临时表名；没有这样的行时返回 None
+    """
+    default = default_partition_name(table)
+    has_rows = (await conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= :start AND {key} < :end)"
+    ), {"start": start, "end": end})).scalar()
+    if not has_rows:
+        return None
+    staging = f"_moved_{table}"
+    await conn.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table}) ON COMMIT DROP"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {key} >= :start AND {key} < :end RETURNING *) "
+        f"INSERT INTO {staging} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    return staging
+
+
+async def ensure_partitions(conn: AsyncConnection, months: Iterable[date]) -> int:
+    """
+    为指定月份 (月初日期) 创建缺失的月分区，返回新建数量。
+    默认分区中已有该月的行时，在同一事务内先移出、建分区后再写回新分区。
+    """
+    months = sorted({month_start(m) for m in months})
+    created = 0
+    for table, key in PARTITIONED_TABLES.items():
+        existing = set(await _list_partitions(conn, table))
+        for month in months:
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            end = add_months(month, 1)
+            staging = None
+            if default_partition_name(table) in existing:
+                staging = await _take_rows_from_default(conn, table, key, month, end)
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            if staging:
+                moved = await conn.execute(text(f"INSERT INTO {table} SELECT * FROM {staging}"))
+                await conn.execute(text(f"TRUNCATE {staging}"))
+                logger.warning(f"[Maintenance] 已将默认分区中的 {moved.rowcount} 行移入新分区 {name}")
+            created += 1
+            logger.info(f"[Maintenance] 已创建分区 {name}")
+    return created
+
+
+async def ensure_future_partitions(conn: AsyncConnection, today: date, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """创建当前月及未来 months_ahead 个月缺失的分区，返回新建数量"""
+    return await ensure_partitions(conn, months_to_create(today, months_ahead))
+
+
+async def archive_old_partitions(conn: AsyncConnection, today: date, archive_after_months: int = PARTITION_ARCHIVE_AFTER_MONTHS) -> List[str]:
+    """将过期分区从主表分离并移动到 archive schema，返回归档的分区名"""
+    archived = []
+    for table in PARTITIONED_TABLES:
+        expired = partitions_to_archive(await _list_partitions(conn, table), today, archive_after_months)
+        if not expired:
+            continue
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        for name in expired:
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            archived.append(name)
+            logger.info(f"[Maintenance] 已归档分区 {name} -> {ARCHIVE_SCHEMA}.{name}")
+    return archived
+
+
+COMPACT_SNAPSHOTS_SQL = """
+INSERT INTO sector_daily_rollups (
+    source, fs_type, date, sector_id, samples,
+    open_change, high_change, low_change, close_change,
+    market_cap, turnover_rate, amount, net_inflow, up_count, down_count, turnover_ratio
+)
+SELECT
+    source, fs_type, captured_at::date, sector_id, count(*),
+    (array_agg(change_percent ORDER BY captured_at))[1],
+    max(change_percent),
+    min(change_percent),
+    (array_agg(change_percent ORDER BY captured_at DESC))[1],
+    (array_agg(market_cap ORDER BY captured_at DESC))[1],
+    (array_agg(turnover_rate ORDER BY captured_at DESC))[1],
+    (array_agg(amount ORDER BY captured_at DESC))[1],
+    (array_agg(net_inflow ORDER BY captured_at DESC))[1],
+    (array_agg(up_count ORDER BY captured_at DESC))[1],
+    (array_agg(down_count ORDER BY captured_at DESC))[1],
+    (array_agg(turnover_ratio ORDER BY captured_at DESC))[1]
+FROM sector_snapshots
+WHERE captured_at < :cutoff
+GROUP BY source, fs_type, captured_at::date, sector_id
+ON CONFLICT (source, fs_type, date, sector_id) DO NOTHING
+"""
+
+
+async def compact_snapshots(conn: AsyncConnection, today: date, retention_days: int = SNAPSHOT_RETENTION_DAYS) -> int:
+    """把 retention_days 天前的快照明细汇总为每日一行并删除明细，返回删除的明细行数"""
+    if retention_days <= 0:
+        return 0
+    # 以整天为边界，保证同一天的明细一次性全部汇总
+    cutoff = datetime.combine(today - timedelta(days=retention_days), datetime.min.time())
+    await conn.execute(text(COMPACT_SNAPSHOTS_SQL), {"cutoff": cutoff})
+    result = await conn.execute(text("DELETE FROM sector_snapshots WHERE captured_at < :cutoff"), {"cutoff": cutoff})
+    if result.rowcount:
+        logger.info(f"[Maintenance] 已将 {cutoff:%Y-%m-%d} 之前的 {result.rowcount} 条快照明细压缩为每日汇总")
+    return result.rowcount
+
+
+async def run_partition_maintenance(today: Optional[date] = None) -> None:
+    """定时执行的维护任务入口，各步骤独立提交，单步失败不影响其他步骤"""
+    today = today or date.today()
+    steps = [
+        ("创建未来分区", ensure_future_partitions),
+        ("归档过期分区", archive_old_partitions),
+        ("压缩快照明细", compact_snapshots),
+    ]
+    for name, step in steps:
+        try:
+            async with engine.begin() as conn:
+                await step(conn, today)
+        except Exception as e:
+            logger.error(f"[Maintenance] {name}失败: {e}")
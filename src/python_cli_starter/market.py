@@ -6,18 +6,33 @@ import logging
 import re
 import asyncio
 import math
+import os
+import random
+import zlib
+import numpy as np
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional, Tuple
+from itertools import repeat
+from time import monotonic
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
 from playwright.async_api import async_playwright, Page
 from .schemas import SectorInfo, ThsSectorInfo
+from . import metrics
+from . import tracing
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-from datetime import datetime
+from datetime import date, datetime
 
 # 常量定义
 PAGE_SIZE = 100  # 接口限制最大每页数量
-BASE_URL = "https://push2.eastmoney.com/api/qt/clist/get"
+# 数据源地址可通过环境变量替换 (如指向本地模拟服务做压测)
+BASE_URL = os.getenv("EASTMONEY_BASE_URL", "https://push2.eastmoney.com/api/qt/clist/get")
+THS_BASE_URL = os.getenv("THS_BASE_URL", "https://q.10jqka.com.cn").rstrip("/")
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     "Referer": "https://quote.eastmoney.com/center/gridlist.html"
@@ -29,30 +44,109 @@ class EastMoneyAPIException(Exception):
         self.status_code = status_code
         self.curl_cmd = curl_cmd
 
-def _parse_eastmoney_text(text: str, page: int) -> Tuple[List[Dict], int]:
+class EastMoneyFetchError(Exception):
+    """分页拉取在多次重试后仍然失败，或数据不完整"""
+    def __init__(self, message: str, failed_pages: Optional[List[int]] = None):
+        super().__init__(message)
+        self.failed_pages = failed_pages or []
+
+# --- 共享 HTTP 客户端 ---
+# 进程内复用同一个 AsyncClient，保持 keep-alive 连接；并按 host 限制并发，避免一次性打满对方接口
+HTTP_TIMEOUT = 10.0
+HOST_CONCURRENCY = 4          # 单个 host 的最大并发请求数
+MAX_RETRIES = 3               # 单页失败后的最大重试次数
+RETRY_BASE_DELAY = 0.5        # 指数退避的基础等待时间 (秒)
+RETRY_MAX_DELAY = 8.0         # 单次退避的等待上限 (秒)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+INCOMPLETE_RETRIES = 1        # 去重后板块数少于 total 时重新抓取全部分页的次数
+
+_http_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def _http2_available() -> bool:
+    """安装了 h2 (依赖 httpx[http2] 提供) 时才启用 HTTP/2，否则回退到 HTTP/1.1"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取进程级共享的 httpx 客户端 (懒加载)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """关闭共享客户端，在应用退出时调用"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _host_semaphores.clear()
+    reset_eastmoney_cookie()
+
+def reset_eastmoney_cookie() -> None:
+    """丢弃缓存的 cookie 与锁 (锁绑定事件循环，退出或切换事件循环时调用)"""
+    global _eastmoney_cookie, _eastmoney_cookie_lock
+    _eastmoney_cookie = None
+    _eastmoney_cookie_lock = None
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = httpx.URL(url).host
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+    return _host_semaphores[host]
+
+def _retry_delay(attempt: int) -> float:
+    """带抖动的指数退避 (full jitter)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _decode_eastmoney_text(text: Union[str, bytes]) -> Tuple[List[Dict], int]:
+    """
+    从 JSONP/JSON 文本中取出 diff 列表和 total，结构不合法时抛出 ValueError。
+    可直接传入响应字节，省去解码为 str 的开销 (orjson 直接解析 UTF-8 字节)。
+    """
+    open_brace, close_brace = ("{", "}") if isinstance(text, str) else (b"{", b"}")
+    start_idx = text.find(open_brace)
+    end_idx = text.rfind(close_brace)
+    if start_idx == -1 or end_idx == -1:
+        raise ValueError("无法匹配 JSON 结构")
+    data = _json_loads(text[start_idx:end_idx+1])
+    if "data" in data and data["data"]:
+        return data["data"].get("diff", []), data["data"].get("total", 0)
+    return [], 0
+
+def _parse_eastmoney_text(text: Union[str, bytes], page: int) -> Tuple[List[Dict], int]:
     """提取的通用解析逻辑"""
-    start_idx = text.find('{')
-    end_idx = text.rfind('}')
-    if start_idx != -1 and end_idx != -1:
-        json_str = text[start_idx:end_idx+1]
-        try:
-            data = json.loads(json_str)
-            if "data" in data and data["data"]:
-                total = data["data"].get("total", 0)
-                diff_list = data["data"].get("diff",[])
-                return diff_list, total
-            else:
-                return[], 0
-        except json.JSONDecodeError:
-            logger.error(f"[EastMoney Page {page}] JSON 解析失败")
-            return[], 0
-            
-    logger.error(f"[EastMoney Page {page}] 无法匹配 JSON 结构")
-    return[], 0
+    try:
+        return _decode_eastmoney_text(text)
+    except json.JSONDecodeError:
+        logger.error(f"[EastMoney Page {page}] JSON 解析失败")
+    except ValueError:
+        logger.error(f"[EastMoney Page {page}] 无法匹配 JSON 结构")
+    return [], 0
+
+def _build_curl(req: httpx.Request) -> str:
+    curl_cmd = f"curl -X {req.method} '{req.url}'"
+    for k, v in req.headers.items():
+        if k.lower() not in ("host", "connection", "accept-encoding"):
+            safe_v = v.replace("'", "'\\''")
+            curl_cmd += f" -H '{k}: {safe_v}'"
+    return curl_cmd
 
 async def _fetch_page_raw_httpx(client: httpx.AsyncClient, page: int, fs_type: int, cookie: Optional[str] = None) -> Tuple[List[Dict], int]:
     """
-    获取单页原始数据 (统一使用 httpx)
+    获取单页原始数据 (统一使用 httpx)。
+    网络错误、5xx/429 以及无法解析的响应都会抛出异常，交由上层重试。
     """
     import time
     params = {
@@ -70,102 +164,346 @@ async def _fetch_page_raw_httpx(client: httpx.AsyncClient, page: int, fs_type: i
         "wbp2u": "|0|0|0|web",
         "_": str(int(time.time() * 1000))
     }
-    logger.info(f"params = {params}")
+    logger.debug(f"params = {params}")
     headers = HEADERS.copy()
     if cookie:
         headers["Cookie"] = cookie
 
+    async with _host_semaphore(BASE_URL):
+        with metrics.track_upstream("eastmoney_page"):
+            response = await client.get(BASE_URL, params=params, headers=headers, timeout=HTTP_TIMEOUT)
+            # 当请求目标真实接口出现 422 时，生成 curl 并通过自定义异常抛出
+            if response.status_code == 422:
+                raise EastMoneyAPIException(422, _build_curl(response.request))
+            response.raise_for_status()
+
+    tracing.set_attributes(bytes=len(response.content))
+    with tracing.span("eastmoney.decode"):
+        return _decode_eastmoney_text(response.content)
+
+@tracing.traced("eastmoney.page")
+async def _fetch_page_with_retry(client: httpx.AsyncClient, page: int, fs_type: int, cookie: Optional[str] = None) -> Tuple[List[Dict], int]:
+    """单页请求 + 抖动指数退避重试；422 属于凭证问题，不重试直接抛出"""
+    attempt = 0
+    tracing.set_attributes(page=page)
+    while True:
+        tracing.set_attributes(retries=attempt)
+        try:
+            return await _fetch_page_raw_httpx(client, page, fs_type, cookie)
+        except EastMoneyAPIException:
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in RETRYABLE_STATUS or attempt >= MAX_RETRIES:
+                raise
+            error = e
+        except (httpx.TransportError, ValueError) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            error = e
+        delay = _retry_delay(attempt)
+        attempt += 1
+        logger.warning(f"[EastMoney Page {page}] 请求失败: {error!r}，{delay:.2f}s 后第 {attempt} 次重试")
+        await asyncio.sleep(delay)
+
+def _clean_float(val) -> float:
+    if val is None or val == "-": return 0.0
+    if not isinstance(val, (int, float)):
+        try: return float(val)
+        except (ValueError, TypeError): return 0.0
+    return float(val)
+
+# --- 列式解析 ---
+# 东方财富原始字段 -> 数值列
+EASTMONEY_COLUMNS = (("market_cap", "f20"), ("turnover_rate", "f8"), ("change_percent", "f3"), ("amount", "f6"))
+
+
+class EastMoneyRow(NamedTuple):
+    """轻量的板块行，字段与 SectorInfo 一致 (不含格式化字段)，供入库与入库监听者使用"""
+    name: str
+    market_cap: float
+    turnover_rate: float
+    change_percent: float
+    amount: float
+    date: date
+    updated_at: datetime
+
+
+def _clean_column(values: List[Any]) -> np.ndarray:
+    """
+    将一列原始值转换为 float64 数组：全部为数值时一次性转换，
+    含 "-" 等无法转换的值时才逐个清洗；None / NaN / Inf 统一记为 0。
+    """
     try:
-        response = await client.get(BASE_URL, params=params, headers=headers, timeout=10.0)
-        
-        # 当请求目标真实接口出现 422 时，生成 curl 并通过自定义异常抛出
-        if response.status_code == 422:
-            req = response.request
-            curl_cmd = f"curl -X {req.method} '{req.url}'"
-            for k, v in req.headers.items():
-                if k.lower() not in ("host", "connection", "accept-encoding"):
-                    safe_v = v.replace("'", "'\\''")
-                    curl_cmd += f" -H '{k}: {safe_v}'"
-            raise EastMoneyAPIException(422, curl_cmd)
-            
-        text = response.text
-        return _parse_eastmoney_text(text, page)
-    except EastMoneyAPIException:
-        raise  # 将自定义异常继续往上抛
-    except Exception as e:
-        logger.error(f"[EastMoney Page {page}] HTTPX请求失败: {e}")
-        return [], 0
+        column = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        column = np.fromiter((_clean_float(v) for v in values), dtype=np.float64, count=len(values))
+    return np.nan_to_num(column, nan=0.0, posinf=0.0, neginf=0.0)
 
-def _process_item(item: Dict) -> SectorInfo:
-    """将原始字典转换为 SectorInfo 对象"""
-    name = str(item.get("f14", "未知板块"))
-    
-    def clean_float(val):
-        if val is None or val == "-": return 0.0
-        if not isinstance(val, (int, float)):
-            try: return float(val)
-            except (ValueError, TypeError): return 0.0
-        return float(val)
-
-    raw_cap = item.get("f20", 0)
-    raw_turnover = item.get("f8", 0)
-    raw_change = item.get("f3", 0)
-    raw_amount = item.get("f6", 0)
-
-    market_cap_val = clean_float(raw_cap)
-    turnover_val = clean_float(raw_turnover)
-    change_val = clean_float(raw_change)
-    amount_val = clean_float(raw_amount)
-
-    now = datetime.now()
-    return SectorInfo(
-        name=name,
-        market_cap=market_cap_val,
-        market_cap_desc=f"{market_cap_val / 100000000:.2f} 亿",
-        turnover_rate=turnover_val,
-        turnover_rate_desc=f"{turnover_val / 100:.2f}%",
-        change_percent=change_val,
-        change_percent_desc=f"{change_val / 100:.2f}%",
-        amount=amount_val,
-        amount_desc=f"{amount_val / 100000000:.2f} 亿",
-        date=now.date(),
-        updated_at=now
-    )
 
-def parse_eastmoney_jsonp(text: str) -> List[SectorInfo]:
-    """解析东方财富的 JSONP 或 JSON 字符串并返回 SectorInfo 列表"""
+class EastMoneyBatch:
+    """
+    列式的一批东方财富板块数据：名称列表 + 每个数值字段一个 float64 数组。
+    抓取/上传链路全程使用列式数据直接入库，只有需要 API 响应时才物化为 SectorInfo。
+    """
+
+    def __init__(self, names: List[str], columns: Dict[str, np.ndarray], fetched_at: Optional[datetime] = None):
+        self.names = names
+        self.columns = columns
+        self.fetched_at = fetched_at or datetime.now()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    @classmethod
+    def from_items(cls, items: List[Dict], fetched_at: Optional[datetime] = None) -> "EastMoneyBatch":
+        names = [str(item.get("f14", "未知板块")) for item in items]
+        columns = {field: _clean_column([item.get(key, 0) for item in items]) for field, key in EASTMONEY_COLUMNS}
+        return cls(names, columns, fetched_at)
+
+    def rows(self) -> List[EastMoneyRow]:
+        """按行展开 (NamedTuple，无校验开销)"""
+        fetched_at = self.fetched_at
+        return list(map(EastMoneyRow._make, zip(
+            self.names,
+            *(self.columns[field].tolist() for field, _ in EASTMONEY_COLUMNS),
+            repeat(fetched_at.date()),
+            repeat(fetched_at),
+        )))
+
+    def require_integral(self) -> "EastMoneyBatch":
+        """
+        库中只存接口返回的原始整数 (fltt=1)；含小数的数据 (如 fltt=2 抓取的 1.23 表示 1.23%) 入库时会被取整而失真，
+        因此拒绝整批并抛出 ValueError，列出前几个受影响的板块
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        for column in self.columns.values():
+            mask |= column != np.round(column)
+        if mask.any():
+            names = [name for name, bad in zip(self.names, mask) if bad]
+            raise ValueError(
+                f"{len(names)} 个板块的数值含小数 (如 {', '.join(names[:3])})，"
+                f"应为 fltt=1 返回的原始整数，可能是 fltt=2 的数据"
+            )
+        return self
+
+    def to_sectors(self) -> List[SectorInfo]:
+        """物化为 SectorInfo 列表 (仅在需要 API 响应时使用)"""
+        return [SectorInfo.model_validate(row) for row in self.rows()]
+
+    @classmethod
+    def concat(cls, batches: Iterable["EastMoneyBatch"]) -> "EastMoneyBatch":
+        """合并多批数据，同名板块只保留最先出现的一条 (同一条 upsert 语句中不能出现重复键)"""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.from_items([])
+        names, index, seen, offset = [], [], set(), 0
+        for batch in batches:
+            for i, name in enumerate(batch.names):
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+                    index.append(offset + i)
+            offset += len(batch)
+        take = np.asarray(index, dtype=np.intp)
+        columns = {
+            field: np.concatenate([b.columns[field] for b in batches])[take]
+            for field, _ in EASTMONEY_COLUMNS
+        }
+        return cls(names, columns, batches[0].fetched_at)
+
+
+def parse_eastmoney_batch(text: Union[str, bytes]) -> EastMoneyBatch:
+    """解析东方财富的 JSONP 或 JSON 文本 (str 或 bytes) 为列式数据"""
     raw_items, _ = _parse_eastmoney_text(text, 0)
-    processed =[]
-    for item in raw_items:
-        try:
-            processed.append(_process_item(item))
-        except Exception as e:
-            logger.error(f"处理单条数据出错: {e}, item: {item}")
-    return processed
+    return EastMoneyBatch.from_items(raw_items)
+
+
+def parse_eastmoney_jsonp(text: Union[str, bytes]) -> List[SectorInfo]:
+    """解析东方财富的 JSONP 或 JSON 字符串并返回 SectorInfo 列表"""
+    return parse_eastmoney_batch(text).to_sectors()
 
-async def fetch_eastmoney_sectors(cookie: Optional[str] = None, fs_type: int = 2) -> Optional[List[SectorInfo]]:
+
+def parse_eastmoney_page(document: bytes) -> EastMoneyBatch:
     """
-    获取东方财富板块数据：
-    如果未提供 cookie，则先用无头浏览器短暂访问网页截获自动生成的 cookie，
-    随后统一使用轻量级的 httpx 进行并发数据拉取。
-    :param fs_type: 板块类型，2=行业板块，3=概念板块
+    解析单页数据，与 parse_eastmoney_batch 不同，结构不合法或数值含小数 (非 fltt=1 的数据)
+    时抛出 ValueError 而不是返回空批次
     """
-    cookie_str = cookie
+    raw_items, _ = _decode_eastmoney_text(document)
+    return EastMoneyBatch.from_items(raw_items).require_integral()
 
-    # 如果没有传入凭证，则使用 Playwright 截获
-    if not cookie_str:
-        async with async_playwright() as p:
+
+# --- 流式上传 ---
+# 单页 (单个顶层 JSON 对象) 的大小上限，超过视为数据异常，保证流式解析的内存占用有界
+MAX_UPLOAD_PAGE_BYTES = 16 * 1024 * 1024
+_DECOMPRESS_CHUNK = 256 * 1024
+_JSON_TOKEN_RE = re.compile(rb'[{}"\\]')
+
+
+class JsonDocumentSplitter:
+    """
+    从字节流中增量切分出顶层 JSON 对象。
+    对象之间的任意内容 (换行、JSONP 回调名与括号、分号) 都会被忽略，
+    因此 NDJSON、首尾相接的多段 JSONP 以及单个 JSON/JSONP 都能统一处理。
+    """
+
+    def __init__(self, max_document_bytes: int = MAX_UPLOAD_PAGE_BYTES):
+        self.max_document_bytes = max_document_bytes
+        self._buffer = bytearray()
+        self._pos = 0  # 已扫描到的位置
+        self._start = -1  # 当前对象在缓冲区中的起点
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """追加数据，返回本次新切分出的完整对象"""
+        buf = self._buffer
+        buf += data
+        documents = []
+        pos = self._pos
+        while pos < len(buf):
+            if self._escape:
+                pos += 1
+                self._escape = False
+                continue
+            match = _JSON_TOKEN_RE.search(buf, pos)
+            if not match:
+                pos = len(buf)
+                break
+            char = buf[match.start()]
+            pos = match.end()
+            if self._in_string:
+                if char == 0x5C:  # 反斜杠: 跳过下一个字节
+                    self._escape = True
+                elif char == 0x22:
+                    self._in_string = False
+            elif char == 0x22:
+                # 对象外的引号属于 JSONP 包裹，不进入字符串状态
+                self._in_string = self._depth > 0
+            elif char == 0x7B:
+                if self._depth == 0:
+                    self._start = match.start()
+                self._depth += 1
+            elif char == 0x7D and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    documents.append(bytes(buf[self._start:pos]))
+                    del buf[:pos]
+                    pos, self._start = 0, -1
+
+        if self._depth == 0:
+            # 对象之外的内容不再需要
+            del buf[:pos]
+            pos = 0
+        elif self._start > 0:
+            del buf[:self._start]
+            pos -= self._start
+            self._start = 0
+        self._pos = pos
+        if len(buf) > self.max_document_bytes:
+            raise ValueError(f"单页数据超过 {self.max_document_bytes} 字节")
+        return documents
+
+    def close(self) -> None:
+        """数据流结束时调用，若最后一个对象不完整则抛出 ValueError"""
+        if self._depth > 0:
+            raise ValueError("数据在 JSON 对象中途结束")
+
+
+class _GzipStream:
+    """增量解压 gzip，支持多个 gzip 成员首尾相接 (如 cat a.gz b.gz)，单次输出不超过固定大小"""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(wbits=31)
+        self._started = False
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        try:
+            while data:
+                self._started = True
+                out = self._decompressor.decompress(data, _DECOMPRESS_CHUNK)
+                if out:
+                    yield out
+                if self._decompressor.eof:
+                    data = self._decompressor.unused_data
+                    self._decompressor = zlib.decompressobj(wbits=31)
+                    self._started = False
+                else:
+                    data = self._decompressor.unconsumed_tail
+        except zlib.error as e:
+            raise ValueError(f"gzip 数据损坏: {e}") from e
+
+    def close(self) -> None:
+        if self._started:
+            raise ValueError("gzip 数据不完整")
+
+
+async def iter_upload_documents(
+    chunks: AsyncIterator[bytes],
+    gzipped: Optional[bool] = None,
+    max_document_bytes: int = MAX_UPLOAD_PAGE_BYTES,
+) -> AsyncIterator[bytes]:
+    """
+    将上传的请求体流切分为逐页的 JSON 文档 (字节)，边接收边产出。
+    :param gzipped: 是否为 gzip 压缩；为 None 时根据开头的 gzip 魔数自动判断
+    :raises ValueError: 解压失败、单页过大或数据不完整
+    """
+    splitter = JsonDocumentSplitter(max_document_bytes)
+    gzip_stream: Optional[_GzipStream] = None
+    first = True
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            first = False
+            if gzipped is None:
+                gzipped = chunk[:2] == b"\x1f\x8b"
+            if gzipped:
+                gzip_stream = _GzipStream()
+        pieces = gzip_stream.decompress(chunk) if gzip_stream else (chunk,)
+        for piece in pieces:
+            for document in splitter.feed(piece):
+                yield document
+    if gzip_stream:
+        gzip_stream.close()
+    splitter.close()
+
+async def fetch_eastmoney_sectors(
+    cookie: Optional[str] = None,
+    fs_type: int = 2,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[SectorInfo]:
+    """获取东方财富板块数据并物化为 SectorInfo 列表，参数同 fetch_eastmoney_batch"""
+    return (await fetch_eastmoney_batch(cookie, fs_type, client)).to_sectors()
+
+
+# --- 东方财富 Cookie ---
+# 未传入 cookie 时需启动无头浏览器截获，行业、概念板块两条流水线并发执行时只启动一次浏览器，
+# 截获的 cookie 在 EASTMONEY_COOKIE_TTL 秒 (默认 600) 内复用
+EASTMONEY_COOKIE_TTL = float(os.getenv("EASTMONEY_COOKIE_TTL", "600"))
+
+_eastmoney_cookie: Optional[Tuple[str, float]] = None  # (cookie, 截获时的 monotonic 时间)
+_eastmoney_cookie_lock: Optional[asyncio.Lock] = None
+
+async def _capture_eastmoney_cookie() -> str:
+    """用无头浏览器访问东方财富主页，截获 JS 渲染后生成的 cookie"""
+    async with async_playwright() as p:
+        with metrics.track_upstream("playwright_launch"), tracing.span("playwright.launch"):
             browser = await p.chromium.launch(
                 headless=True,
                 args=["--disable-blink-features=AutomationControlled"]
             )
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            )
+        context = await browser.new_context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        )
 
-            init_page = await context.new_page()
+        init_page = await context.new_page()
 
-            logger.info("正在访问东方财富主页，通过 JS 渲染初始化 Cookie...")
+        logger.info("正在访问东方财富主页，通过 JS 渲染初始化 Cookie...")
+        with tracing.span("eastmoney.cookie_wait"):
             try:
                 await init_page.goto("https://quote.eastmoney.com/center/gridlist.html#industry_board", wait_until="networkidle", timeout=12000)
             except Exception as e:
@@ -173,129 +511,238 @@ async def fetch_eastmoney_sectors(cookie: Optional[str] = None, fs_type: int = 2
 
             # 提取 Playwright 渲染后生成的完整 Cookie 字符串
             playwright_cookies = await context.cookies()
-            cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in playwright_cookies])
-            logger.info("成功获取动态生成的 Cookie")
-            
-            # 凭证获取完毕，立即关闭浏览器释放资源
-            await browser.close()
+        cookie_str = "; ".join([f"{c['name']}={c['value']}" for c in playwright_cookies])
+        logger.info("成功获取动态生成的 Cookie")
+
+        # 凭证获取完毕，立即关闭浏览器释放资源
+        await browser.close()
+    return cookie_str
+
+async def get_eastmoney_cookie() -> str:
+    """获取东方财富 cookie：有效期内直接复用，否则截获一次；并发调用者等待同一次截获而不各自启动浏览器"""
+    global _eastmoney_cookie, _eastmoney_cookie_lock
+    if _eastmoney_cookie_lock is None:
+        _eastmoney_cookie_lock = asyncio.Lock()
+    async with _eastmoney_cookie_lock:
+        now = monotonic()
+        if _eastmoney_cookie is not None and now - _eastmoney_cookie[1] < EASTMONEY_COOKIE_TTL:
+            logger.info("复用此前截获的东方财富 Cookie")
+            return _eastmoney_cookie[0]
+        cookie_str = await _capture_eastmoney_cookie()
+        _eastmoney_cookie = (cookie_str, monotonic())
+        return cookie_str
+
+async def _fetch_pages(http_client: httpx.AsyncClient, pages: List[int], fs_type: int, cookie: Optional[str]) -> List[Dict]:
+    """并发拉取多个分页并按页码顺序拼接；任一分页重试后仍失败时抛出 EastMoneyFetchError"""
+    results = await asyncio.gather(
+        *[_fetch_page_with_retry(http_client, page, fs_type, cookie) for page in pages],
+        return_exceptions=True,
+    )
+    items = []
+    failed_pages = []
+    for page, result in zip(pages, results):
+        if isinstance(result, EastMoneyAPIException):
+            raise result
+        if isinstance(result, BaseException):
+            logger.error(f"[EastMoney Page {page}] 重试 {MAX_RETRIES} 次后仍失败: {result!r}")
+            failed_pages.append(page)
+            continue
+        items.extend(result[0])
+    if failed_pages:
+        raise EastMoneyFetchError(f"东方财富分页数据不完整，第 {failed_pages} 页获取失败", failed_pages)
+    return items
+
+@tracing.traced("eastmoney.fetch")
+async def fetch_eastmoney_batch(
+    cookie: Optional[str] = None,
+    fs_type: int = 2,
+    client: Optional[httpx.AsyncClient] = None,
+) -> EastMoneyBatch:
+    """
+    获取东方财富板块数据 (列式)：
+    如果未提供 cookie，则先用无头浏览器短暂访问网页截获自动生成的 cookie，
+    随后统一使用共享的 httpx 客户端进行并发数据拉取 (按 host 限流，失败页自动重试)。
+    :param fs_type: 板块类型，2=行业板块，3=概念板块
+    :param client: 可选，指定 httpx 客户端 (测试时可传入指向本地模拟服务的客户端)
+    :raises EastMoneyFetchError: 某些分页在重试后仍失败，或重新抓取后板块数仍少于 total (不保存残缺的列表)
+    """
+    cookie_str = cookie
+    tracing.set_attributes(fs_type=fs_type, cookie_provided=bool(cookie))
+
+    # 如果没有传入凭证，则使用 Playwright 截获 (并发的行业、概念板块抓取共用同一次截获)
+    if not cookie_str:
+        cookie_str = await get_eastmoney_cookie()
     else:
         logger.info(f"使用传入的 cookie 和 fs_type: {fs_type} 绕过 Playwright 直接请求")
 
-    # 统一使用 httpx 拉取数据
-    all_raw_items =[]
-    async with httpx.AsyncClient() as client:
-        logger.info(f"正在获取东方财富板块数据第一页 (fs_type={fs_type})...")
-        first_page_items, total_count = await _fetch_page_raw_httpx(client, 1, fs_type, cookie_str)
+    # 统一使用共享的 httpx 客户端拉取数据
+    http_client = client or get_http_client()
+    logger.info(f"正在获取东方财富板块数据第一页 (fs_type={fs_type})...")
+    try:
+        first_page_items, total_count = await _fetch_page_with_retry(http_client, 1, fs_type, cookie_str)
+    except EastMoneyAPIException:
+        raise
+    except Exception as e:
+        logger.error(f"[EastMoney Page 1] 重试 {MAX_RETRIES} 次后仍失败: {e!r}")
+        raise EastMoneyFetchError("东方财富分页数据不完整，第 [1] 页获取失败", [1]) from e
+
+    if not first_page_items and total_count == 0:
+        logger.warning("未能获取到东方财富板块数据 (HTTPX)")
+        return EastMoneyBatch.from_items([])
+
+    total_pages = math.ceil(total_count / PAGE_SIZE)
+    logger.info(f"东方财富数据获取成功，共 {total_count} 条数据，需请求 {total_pages} 页")
+
+    # 按涨跌幅排序分页时，盘中行情变动可能让同一板块出现在相邻两页，同时挤掉另一个板块，按名称去重
+    unique_items: Dict[Any, Dict] = {}
+    for item in first_page_items:
+        unique_items.setdefault(item.get("f14"), item)
+    pages = list(range(2, total_pages + 1))
+    for attempt in range(INCOMPLETE_RETRIES + 1):
+        for item in await _fetch_pages(http_client, pages, fs_type, cookie_str):
+            unique_items.setdefault(item.get("f14"), item)
+        if len(unique_items) >= total_count:
+            break
+        # 缺失的板块可能落在任意一页，补抓全部分页，只合并此前未见过的板块
+        logger.warning(
+            f"东方财富数据完整性校验: 期望 {total_count} 条，实际获取 {len(unique_items)} 条"
+            + (f"，第 {attempt + 1} 次重新抓取全部分页" if attempt < INCOMPLETE_RETRIES else "")
+        )
+        pages = list(range(1, total_pages + 1))
+    else:
+        raise EastMoneyFetchError(
+            f"东方财富数据不完整: 期望 {total_count} 条，重新抓取 {INCOMPLETE_RETRIES} 次后仍只有 {len(unique_items)} 条"
+        )
+    all_raw_items = list(unique_items.values())
+
+    logger.info(f"东方财富所有页面获取完成，共 {len(all_raw_items)} 条记录")
+    tracing.set_attributes(pages=total_pages, rows=len(all_raw_items))
+    with tracing.span("eastmoney.parse", rows=len(all_raw_items)):
+        return EastMoneyBatch.from_items(all_raw_items)
+    
+# --- 同花顺数据处理逻辑 ---
+
+def parse_ths_html(html_content: str) -> List[Dict[str, Any]]:
+    """
+    解析同花顺板块列表页 HTML。
+    注意：返回的是包含原始成交额的字典列表，用于后续计算占比。
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    table_rows = soup.select("tbody tr")
+    
+    # 兼容处理：如果没有 tbody 标签，直接选 tr
+    if not table_rows:
+        table_rows = soup.select("tr")
         
-        if not first_page_items and total_count == 0:
-            logger.warning("未能获取到东方财富板块数据 (HTTPX)")
-            return[]
-
-        all_raw_items = list(first_page_items)
-        total_pages = math.ceil(total_count / PAGE_SIZE)
-        logger.info(f"东方财富数据获取成功，共 {total_count} 条数据，需请求 {total_pages} 页")
-
-        if total_pages > 1:
-            tasks = []
-            for page in range(2, total_pages + 1):
-                tasks.append(_fetch_page_raw_httpx(client, page, fs_type, cookie_str))
-            
-            results = await asyncio.gather(*tasks)
-            
-            for items, _ in results:
-                all_raw_items.extend(items)
+    raw_results = []
+    for row in table_rows:
+        cols = row.find_all("td")
+        if len(cols) < 8:
+            continue
+        
+        if "暂无成份股数据" in row.get_text():
+            continue
 
-    # 处理数据
-    logger.info(f"东方财富所有页面获取完成，开始处理 {len(all_raw_items)} 条记录")
-    processed_sectors = []
-    for item in all_raw_items:
         try:
-            processed_sectors.append(_process_item(item))
-        except Exception as e:
-            logger.error(f"处理单条数据出错: {e}, item: {item}")
-            continue
+            # 辅助清洗函数
+            def clean_num(text):
+                try:
+                    return float(text.strip().replace('%', ''))
+                except ValueError:
+                    return 0.0
+
+            def clean_int(text):
+                try:
+                    return int(text.strip())
+                except ValueError:
+                    return 0
+
+            name = cols[1].get_text(strip=True)
+            change_percent = clean_num(cols[2].get_text(strip=True))
+            # cols[3] 是成交量(万手)，我们不再需要，或者不需要存入结果
+            # cols[4] 是成交额(亿元)，我们需要它来计算占比
+            raw_amount = clean_num(cols[4].get_text(strip=True))
             
-    return processed_sectors
-    
-# --- 同花顺数据处理逻辑 ---
+            net_inflow = clean_num(cols[5].get_text(strip=True))
+            up_count = clean_int(cols[6].get_text(strip=True))
+            down_count = clean_int(cols[7].get_text(strip=True))
+            
+            # 暂存为字典，包含 raw_amount 以便后续聚合
+            raw_results.append({
+                "name": name,
+                "change_percent": change_percent,
+                "raw_amount": raw_amount,
+                "net_inflow": net_inflow,
+                "up_count": up_count,
+                "down_count": down_count
+            })
+        except (IndexError, ValueError) as e:
+            continue
+
+    return raw_results
+
+
+def build_ths_sectors(all_raw_data: List[Dict[str, Any]], now: datetime) -> List[ThsSectorInfo]:
+    """按全部板块的总成交额计算各板块的成交额占比，生成 ThsSectorInfo 列表"""
+    # 1. 计算所有板块的总成交额
+    total_market_amount = sum(item["raw_amount"] for item in all_raw_data)
+
+    # 防止除以零
+    if total_market_amount == 0:
+        total_market_amount = 1.0
 
+    final_sectors = []
+    for item in all_raw_data:
+        # 2. 计算占比: (板块成交额 / 总成交额) * 100
+        ratio = (item["raw_amount"] / total_market_amount) * 100
+
+        sector_info = ThsSectorInfo(
+            name=item["name"],
+            change_percent=item["change_percent"],
+            net_inflow=item["net_inflow"],
+            up_count=item["up_count"],
+            down_count=item["down_count"],
+            turnover_ratio=round(ratio, 2), # 保留两位小数
+            date=now.date(),
+            updated_at=now
+        )
+        final_sectors.append(sector_info)
+    return final_sectors
+
+
+@tracing.traced("ths.page")
 async def _fetch_ths_page(page: Page, page_num: int) -> List[Dict[str, Any]]:
     """
     获取并解析同花顺单页 HTML 数据（使用 Playwright 模拟浏览器）。
     注意：返回的是包含原始成交额的字典列表，用于后续计算占比。
     """
-    url = f"https://q.10jqka.com.cn/thshy/index/field/199112/order/desc/page/{page_num}/ajax/1/"
+    url = f"{THS_BASE_URL}/thshy/index/field/199112/order/desc/page/{page_num}/ajax/1/"
+    tracing.set_attributes(page=page_num)
     
     try:
-        # 访问页面，带有 referer 有助于绕过部分基础检测
-        response = await page.goto(url, referer="https://q.10jqka.com.cn/thshy/")
-        # 等待页面 DOM 加载完成
-        await page.wait_for_load_state("domcontentloaded")
-        
-        html_content = await page.content()
-        
+        with metrics.track_upstream("ths_page"):
+            # 访问页面，带有 referer 有助于绕过部分基础检测
+            response = await page.goto(url, referer=f"{THS_BASE_URL}/thshy/")
+            # 等待页面 DOM 加载完成
+            await page.wait_for_load_state("domcontentloaded")
+
+            html_content = await page.content()
+
+        tracing.set_attributes(bytes=len(html_content))
         if "Nginx forbidden" in html_content or (response and response.status == 403):
+            metrics.UPSTREAM_FETCH_ERRORS.inc(source="ths_page")
+            tracing.set_attributes(forbidden=True)
             logger.error(f"[THS Page {page_num}] 请求被拦截 (403/Forbidden)")
             return []
 
-        soup = BeautifulSoup(html_content, "html.parser")
-        table_rows = soup.select("tbody tr")
-        
-        # 兼容处理：如果没有 tbody 标签，直接选 tr
-        if not table_rows:
-            table_rows = soup.select("tr")
-            
-        raw_results = []
-        for row in table_rows:
-            cols = row.find_all("td")
-            if len(cols) < 8:
-                continue
-            
-            if "暂无成份股数据" in row.get_text():
-                continue
-
-            try:
-                # 辅助清洗函数
-                def clean_num(text):
-                    try:
-                        return float(text.strip().replace('%', ''))
-                    except ValueError:
-                        return 0.0
-
-                def clean_int(text):
-                    try:
-                        return int(text.strip())
-                    except ValueError:
-                        return 0
-
-                name = cols[1].get_text(strip=True)
-                change_percent = clean_num(cols[2].get_text(strip=True))
-                # cols[3] 是成交量(万手)，我们不再需要，或者不需要存入结果
-                # cols[4] 是成交额(亿元)，我们需要它来计算占比
-                raw_amount = clean_num(cols[4].get_text(strip=True))
-                
-                net_inflow = clean_num(cols[5].get_text(strip=True))
-                up_count = clean_int(cols[6].get_text(strip=True))
-                down_count = clean_int(cols[7].get_text(strip=True))
-                
-                # 暂存为字典，包含 raw_amount 以便后续聚合
-                raw_results.append({
-                    "name": name,
-                    "change_percent": change_percent,
-                    "raw_amount": raw_amount,
-                    "net_inflow": net_inflow,
-                    "up_count": up_count,
-                    "down_count": down_count
-                })
-            except (IndexError, ValueError) as e:
-                continue
-            
-        return raw_results
+        with tracing.span("ths.parse"):
+            return parse_ths_html(html_content)
 
     except Exception as e:
         logger.error(f"[THS Page {page_num}] 解析失败: {e}")
         return []
 
+@tracing.traced("ths.fetch")
 async def fetch_ths_sectors() -> List[ThsSectorInfo]:
     """
     使用 Playwright 模拟真实浏览器并发获取同花顺板块数据，并计算成交额占比。
@@ -303,10 +750,11 @@ async def fetch_ths_sectors() -> List[ThsSectorInfo]:
     """
     async with async_playwright() as p:
         # 启动无头浏览器，添加参数尽力绕过简单的机器人检测
-        browser = await p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
+        with metrics.track_upstream("playwright_launch"), tracing.span("playwright.launch"):
+            browser = await p.chromium.launch(
+                headless=True,
+                args=["--disable-blink-features=AutomationControlled"]
+            )
         
         # 创建上下文，设置常见的 User-Agent 与窗口大小
         context = await browser.new_context(
@@ -316,11 +764,12 @@ async def fetch_ths_sectors() -> List[ThsSectorInfo]:
         
         # 第一步：关键点！先访问主页，让网页自动执行 JS 生成正确的 cookie (含 v/hexin-v)
         main_page = await context.new_page()
-        try:
-            logger.info("正在访问同花顺主页以获取认证信息(自动计算 hexin-v)...")
-            await main_page.goto("https://q.10jqka.com.cn/thshy/", wait_until="networkidle", timeout=15000)
-        except Exception as e:
-            logger.warning(f"访问同花顺主页遇到异常（不一定会影响后续爬取）: {e}")
+        with tracing.span("ths.cookie_wait"):
+            try:
+                logger.info("正在访问同花顺主页以获取认证信息(自动计算 hexin-v)...")
+                await main_page.goto(f"{THS_BASE_URL}/thshy/", wait_until="networkidle", timeout=15000)
+            except Exception as e:
+                logger.warning(f"访问同花顺主页遇到异常（不一定会影响后续爬取）: {e}")
         
         # 第二步：使用已经带有有效 Cookie 的上下文请求数据页 (因为同上下文的 cookie 共享)
         page1 = await context.new_page()
@@ -342,30 +791,9 @@ async def fetch_ths_sectors() -> List[ThsSectorInfo]:
         if not all_raw_data:
             return []
 
-        # 1. 计算所有板块的总成交额
+        with tracing.span("ths.build", rows=len(all_raw_data)):
+            final_sectors = build_ths_sectors(all_raw_data, datetime.now())
+        tracing.set_attributes(pages=len(results), rows=len(final_sectors))
         total_market_amount = sum(item["raw_amount"] for item in all_raw_data)
-        
-        # 防止除以零
-        if total_market_amount == 0:
-            total_market_amount = 1.0 
-
-        final_sectors = []
-        now = datetime.now()
-        for item in all_raw_data:
-            # 2. 计算占比: (板块成交额 / 总成交额) * 100
-            ratio = (item["raw_amount"] / total_market_amount) * 100
-
-            sector_info = ThsSectorInfo(
-                name=item["name"],
-                change_percent=item["change_percent"],
-                net_inflow=item["net_inflow"],
-                up_count=item["up_count"],
-                down_count=item["down_count"],
-                turnover_ratio=round(ratio, 2), # 保留两位小数
-                date=now.date(),
-                updated_at=now
-            )
-            final_sectors.append(sector_info)
-            
         logger.info(f"同花顺数据处理完成，共 {len(final_sectors)} 条，总成交额 {total_market_amount:.2f} 亿")
         return final_sectors
\ No newline at end of file
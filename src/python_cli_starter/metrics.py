@@ -0,0 +1,322 @@
+# src/python_cli_starter/metrics.py
+"""
+进程内的轻量指标 (计数器 / 直方图 / 仪表)，以 Prometheus 文本格式通过 /metrics 暴露，不依赖外部 agent。
+记录一次观测只是一次加锁的字典累加与二分查找分桶；同步接口运行在线程池中，因此每个指标各持有一把锁。
+多 worker 部署时各进程的指标相互独立，由 Prometheus 按实例分别抓取后聚合。
+"""
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# 默认分桶 (秒)，覆盖从内存计算到慢速抓取的范围
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    """单调递增的计数器"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    仪表：可直接 set，也可传入 function 在抓取时计算当前值 (返回 {标签值元组: 数值})，
+    用于连接池占用等本身已有状态的量，避免在热点路径上维护副本。
+    """
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.function is not None:
+            items = list(self.function().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class _HistogramState:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.total = 0.0
+        self.count = 0
+
+
+class _Timer:
+    """Histogram.time() 的返回值，可用作上下文管理器或 (同步函数的) 装饰器"""
+
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(perf_counter() - self._started, **self._labels)
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(self._histogram, self._labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class Histogram(_Metric):
+    """累积分桶直方图，另记总和与次数"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._states: Dict[LabelValues, _HistogramState] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _HistogramState(len(self.buckets) + 1)
+            state.counts[index] += 1
+            state.total += value
+            state.count += 1
+
+    def time(self, **labels: str) -> _Timer:
+        return _Timer(self, labels)
+
+    def count(self, **labels: str) -> int:
+        state = self._states.get(self._key(labels))
+        return state.count if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(s.counts), s.total, s.count) for k, s in self._states.items()]
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+def render() -> str:
+    """以 Prometheus 文本格式 (0.0.4) 输出全部已注册指标"""
+    return "".join(metric.render() for metric in _registry)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# --- 指标定义 ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时 (按路由模板)", ("method", "route", "status"),
+)
+UPSTREAM_FETCH_SECONDS = Histogram(
+    "upstream_fetch_duration_seconds", "上游数据源单次请求耗时 (含失败)", ("source",),
+)
+UPSTREAM_FETCH_ERRORS = Counter(
+    "upstream_fetch_errors_total", "上游数据源请求失败次数", ("source",),
+)
+STRATEGY_COMPUTE_SECONDS = Histogram(
+    "strategy_compute_duration_seconds", "指标计算耗时 (不含净值获取)", ("strategy",),
+)
+DB_UPSERT_SECONDS = Histogram(
+    "db_upsert_duration_seconds", "板块数据入库耗时 (含变更检测)", ("table",),
+)
+DB_UPSERT_ROWS = Counter(
+    "db_upsert_rows_total", "实际写入的板块行数", ("table",),
+)
+CACHE_REQUESTS = Counter(
+    "sector_cache_requests_total", "板块快照缓存读取次数", ("key", "result"),
+)
+SCHEDULER_JOB_SECONDS = Histogram(
+    "scheduler_job_duration_seconds", "定时任务执行耗时", ("job",),
+)
+SCHEDULER_JOB_FAILURES = Counter(
+    "scheduler_job_failures_total", "定时任务异常退出次数", ("job",),
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_duration_seconds", "从连接池取得连接的耗时 (含排队等待与新建连接)",
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "等待连接池超时次数",
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "单条 SQL 语句执行耗时 (按操作类型)", ("operation",),
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total", "超过慢查询阈值的语句数", ("operation",),
+)
+
+
+def _cache_hit_ratio() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for (key, result), value in list(CACHE_REQUESTS._values.items()):
+        hits_total = totals.setdefault(key, [0.0, 0.0])
+        hits_total[1] += value
+        if result == "hit":
+            hits_total[0] += value
+    return {(key,): hits / total for key, (hits, total) in totals.items() if total}
+
+
+CACHE_HIT_RATIO = Gauge(
+    "sector_cache_hit_ratio", "板块快照缓存命中率 (进程启动以来)", ("key",), function=_cache_hit_ratio,
+)
+
+
+class track_upstream:
+    """
+    记录一次上游请求的耗时，代码块抛出异常时计一次失败 (异常照常向上抛出)。
+    用法：with metrics.track_upstream("eastmoney_page"): ...
+    """
+
+    __slots__ = ("source", "_started")
+
+    def __init__(self, source: str):
+        self.source = source
+
+    def __enter__(self) -> "track_upstream":
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        UPSTREAM_FETCH_SECONDS.observe(perf_counter() - self._started, source=self.source)
+        if exc_type is not None:
+            UPSTREAM_FETCH_ERRORS.inc(source=self.source)
+
+
+def instrument_job(name: str, func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """包装定时任务，记录每次执行耗时与异常次数"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            SCHEDULER_JOB_FAILURES.inc(job=name)
+            raise
+        finally:
+            SCHEDULER_JOB_SECONDS.observe(perf_counter() - started, job=name)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI 中间件：按路由模板 (如 /strategies/{strategy_name}/{fund_code}) 记录请求耗时与状态码，
+    避免以实际路径作标签导致基数膨胀；未匹配任何路由的请求归入 "unmatched"。
+    耗时统计到响应体发送完毕，SSE 等长连接的耗时即连接持续时间。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -0,0 +1,271 @@
+# src/python_cli_starter/profiling.py
+"""
+按需的单请求采样剖析：用于线上偶发的慢请求 (如某只基金的 /charts/rsi) 本地无法复现的情况。
+
+开启条件 (缺一不可)：
+- 环境变量 PROFILE_TOKEN 设置了管理员口令，PROFILE_ROUTES 列出允许剖析的路由模板 (逗号分隔)；
+- 请求带有 X-Profile-Token 请求头或 profile_token 查询参数，且与口令一致。
+
+未配置时不安装中间件、不包装任何端点，没有额外开销；已配置时也只有白名单内的路由被包装，
+其余请求仅多一次请求头查找。触发后，在执行端点的线程上按固定间隔采样调用栈
+(同步端点在线程池线程上，异步端点在事件循环线程上，只统计栈中包含该端点的样本，不混入其他并发请求)，
+结果为 flamegraph.pl / speedscope 可直接读取的折叠栈 (folded stacks) 文本，
+通过响应头 X-Profile-Id 返回编号，可在 /debug/profiles/{id} 获取，配置 PROFILE_DIR 时另存为文件。
+"""
+import hmac
+import logging
+import os
+import sys
+import threading
+import uuid
+from collections import Counter as TallyCounter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import FrozenSet, List, NamedTuple, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "x-profile-token"
+TOKEN_QUERY = "profile_token"
+ID_HEADER = "X-Profile-Id"
+WAITING_FRAME = "[waiting]"  # 采样时端点不在运行 (异步端点在 await，或同步端点尚未被调度)
+
+
+class ProfilingConfig(NamedTuple):
+    token: str = ""
+    routes: FrozenSet[str] = frozenset()
+    interval: float = 0.005  # 采样间隔 (秒)；CPU 密集时实际间隔受 GIL 切换间隔 (默认 5ms) 限制
+    directory: Optional[str] = None
+    keep: int = 20  # 内存中保留的最近报告数
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token and self.routes)
+
+
+def load_config() -> ProfilingConfig:
+    routes = frozenset(r.strip() for r in os.getenv("PROFILE_ROUTES", "").split(",") if r.strip())
+    return ProfilingConfig(
+        token=os.getenv("PROFILE_TOKEN", ""),
+        routes=routes,
+        interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+        directory=os.getenv("PROFILE_DIR") or None,
+        keep=int(os.getenv("PROFILE_KEEP", "20")),
+    )
+
+
+class ProfileReport(NamedTuple):
+    id: str
+    route: str
+    path: str
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    folded: str  # 每行 "帧1;帧2;...;帧N 次数"
+
+    def summary(self) -> dict:
+        return {k: v for k, v in self._asdict().items() if k != "folded"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # co_qualname 自 Python 3.11 起才有，3.10 回退到不含类名的 co_name
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """后台线程按间隔采样指定线程的调用栈，只保留以 root_code 所在帧为根的部分"""
+
+    def __init__(self, thread_id: int, root_code, root_label: str, interval: float):
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.root_label = root_label
+        self.interval = interval
+        self.stacks: TallyCounter = TallyCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        labels = []
+        while frame is not None and frame.f_code is not self.root_code:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if frame is None:
+            labels = [WAITING_FRAME]
+        labels.append(self.root_label)
+        self.stacks[";".join(reversed(labels))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _Session:
+    __slots__ = ("id", "path", "report")
+
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.report: Optional[ProfileReport] = None
+
+
+_session: ContextVar[Optional[_Session]] = ContextVar("profile_session", default=None)
+_reports: "OrderedDict[str, ProfileReport]" = OrderedDict()
+_lock = threading.Lock()
+_config = ProfilingConfig()
+
+
+def _store(report: ProfileReport) -> None:
+    with _lock:
+        _reports[report.id] = report
+        while len(_reports) > _config.keep:
+            _reports.popitem(last=False)
+    if _config.directory:
+        try:
+            os.makedirs(_config.directory, exist_ok=True)
+            with open(os.path.join(_config.directory, f"{report.id}.folded"), "w", encoding="utf-8") as f:
+                f.write(report.folded)
+        except OSError as e:
+            logger.warning(f"剖析报告 {report.id} 写入文件失败: {e}")
+
+
+def get_report(profile_id: str) -> Optional[ProfileReport]:
+    return _reports.get(profile_id)
+
+
+def list_reports() -> List[ProfileReport]:
+    """最近的报告，新的在前"""
+    with _lock:
+        return list(reversed(_reports.values()))
+
+
+def check_token(token: Optional[str]) -> bool:
+    return bool(_config.token and token and hmac.compare_digest(token, _config.token))
+
+
+def _finish(session: _Session, sampler: StackSampler, route_label: str, started: float, started_at: datetime) -> None:
+    sampler.stop()
+    report = ProfileReport(
+        id=session.id,
+        route=route_label,
+        path=session.path,
+        started_at=started_at,
+        duration_ms=round((perf_counter() - started) * 1000, 3),
+        samples=sum(sampler.stacks.values()),
+        folded=sampler.folded(),
+    )
+    session.report = report
+    _store(report)
+    logger.info(f"剖析完成 {report.id}: {route_label} {report.duration_ms:.1f} ms，{report.samples} 个样本")
+
+
+def _wrap_endpoint(endpoint, route_label: str):
+    """包装白名单内的端点：请求被标记为需要剖析时，在端点所在线程上启动采样"""
+    if iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def profiled(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            sampler = StackSampler(threading.get_ident(), profiled.__code__, route_label, _config.interval)
+            started, started_at = perf_counter(), datetime.now()
+            sampler.start()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _finish(session, sampler, route_label, started, started_at)
+    else:
+        @wraps(endpoint)
+        def profiled(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return endpoint(*args, **kwargs)
+            sampler = StackSampler(threading.get_ident(), profiled.__code__, route_label, _config.interval)
+            started, started_at = perf_counter(), datetime.now()
+            sampler.start()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _finish(session, sampler, route_label, started, started_at)
+    return profiled
+
+
+class ProfilingRoute(APIRoute):
+    """白名单内的路由在注册时包装端点，其余路由与 APIRoute 完全相同"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if path in _config.routes:
+            methods = ",".join(sorted(kwargs.get("methods") or ["GET"]))
+            endpoint = _wrap_endpoint(endpoint, f"{methods} {path}")
+        super().__init__(path, endpoint, **kwargs)
+
+
+class ProfilingMiddleware:
+    """识别携带有效口令的请求并为其开启剖析，在响应头中返回报告编号"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = _Session(scope["path"])
+        token = _session.set(session)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and session.report is not None:
+                headers = list(message.get("headers", []))
+                headers.append((ID_HEADER.lower().encode("latin-1"), session.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _session.reset(token)
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == TOKEN_HEADER.encode("latin-1"):
+                return check_token(value.decode("latin-1"))
+        query = scope.get("query_string", b"")
+        if TOKEN_QUERY.encode("latin-1") in query:
+            values = parse_qs(query.decode("latin-1")).get(TOKEN_QUERY)
+            return bool(values) and check_token(values[0])
+        return False
+
+
+def install(app: FastAPI, config: Optional[ProfilingConfig] = None) -> bool:
+    """
+    按配置为应用开启剖析，须在注册路由之前调用 (路由类只影响之后注册的路由)。
+    :return: 是否已开启
+    """
+    global _config
+    _config = config if config is not None else load_config()
+    if not _config.enabled:
+        return False
+    app.router.route_class = ProfilingRoute
+    app.add_middleware(ProfilingMiddleware)
+    logger.info(f"已开启按需剖析，允许的路由: {sorted(_config.routes)}")
+    return True
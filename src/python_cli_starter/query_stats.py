@@ -0,0 +1,187 @@
+# src/python_cli_starter/query_stats.py
+"""
+SQL 语句级统计与慢查询日志：通过引擎的 cursor 事件记录每条语句的耗时与行数。
+
+- 语句按归一化后的文本聚合 (占位符统一为 ?，IN 列表与多行 VALUES 折叠)，
+  同一条查询无论参数个数如何变化都计入同一项，/debug/queries 查看次数、总耗时、最大耗时与行数
+  (行数取自 DBAPI 的 rowcount，只有 INSERT / UPDATE / DELETE 等报告影响行数的语句才计入)；
+- 耗时超过 DB_SLOW_QUERY_MS (默认 500) 的语句以 WARNING 记录，只记录参数的形状 (个数与类型)，不记录参数值；
+- 另按操作类型 (SELECT / INSERT / ...) 记录 Prometheus 直方图 db_query_duration_seconds。
+聚合项数上限为 DB_QUERY_STATS_SIZE (默认 500)，超出后新语句计入 "[other]"。
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+MAX_STATEMENTS = int(os.getenv("DB_QUERY_STATS_SIZE", "500"))
+OTHER = "[other]"
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")  # asyncpg / psycopg / sqlite 的占位符
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:::[\w ]+)?(?:\s*,\s*\?(?:::[\w ]+)?)+\s*\)")
+_VALUES_ROWS = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """归一化语句文本：压缩空白、占位符统一为 ?、占位符列表折叠为 (?, ...)、多行 VALUES 折叠"""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _PLACEHOLDER.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?, ...)", text)
+    return _VALUES_ROWS.sub("(?, ...), ...", text)
+
+
+def operation(statement: str) -> str:
+    """语句的操作类型，用作指标标签 (取值有限)"""
+    word = statement.lstrip(" (\n\t").split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def params_shape(parameters: Any, executemany: bool = False) -> str:
+    """描述参数的形状 (个数与类型)，用于慢查询日志，不包含参数值"""
+    if executemany:
+        batches = list(parameters or ())
+        first = params_shape(batches[0]) if batches else "()"
+        return f"{len(batches)} × {first}"
+    if isinstance(parameters, dict):
+        items = parameters.values()
+    elif isinstance(parameters, (list, tuple)):
+        items = parameters
+    else:
+        return type(parameters).__name__
+    counts: Dict[str, int] = {}
+    for value in items:
+        name = type(value).__name__
+        if isinstance(value, (list, tuple)):
+            name = f"{name}[{len(value)}]"
+        counts[name] = counts.get(name, 0) + 1
+    return "(" + ", ".join(f"{n}×{c}" if c > 1 else n for n, c in counts.items()) + ")"
+
+
+class StatementStats:
+    """单条归一化语句的累计统计"""
+
+    __slots__ = ("statement", "operation", "count", "errors", "total_ms", "max_ms", "rows", "slow", "last_at")
+
+    def __init__(self, statement: str, op: str):
+        self.statement = statement
+        self.operation = op
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.last_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": hashlib.sha1(self.statement.encode("utf-8")).hexdigest()[:12],
+            "statement": self.statement,
+            "operation": self.operation,
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "slow": self.slow,
+            "last_at": self.last_at.isoformat() if self.last_at else None,
+        }
+
+
+_stats: Dict[str, StatementStats] = {}
+_lock = threading.Lock()
+
+
+def _entry(statement: str) -> StatementStats:
+    key = normalize(statement)
+    entry = _stats.get(key)
+    if entry is None:
+        if len(_stats) >= MAX_STATEMENTS:
+            key = OTHER
+            entry = _stats.get(OTHER)
+        if entry is None:
+            entry = _stats[key] = StatementStats(key, operation(statement) if key != OTHER else "OTHER")
+    return entry
+
+
+def record(statement: str, elapsed_ms: float, rows: Optional[int], parameters: Any = None, executemany: bool = False) -> None:
+    """记录一次语句执行；超过慢查询阈值时记录日志"""
+    slow = elapsed_ms >= SLOW_QUERY_MS
+    with _lock:
+        entry = _entry(statement)
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.rows += rows or 0
+        entry.slow += slow
+        entry.last_at = datetime.now()
+    metrics.DB_QUERY_SECONDS.observe(elapsed_ms / 1000, operation=entry.operation)
+    if slow:
+        metrics.DB_SLOW_QUERIES.inc(operation=entry.operation)
+        logger.warning(
+            f"慢查询 {elapsed_ms:.0f} ms (阈值 {SLOW_QUERY_MS:.0f} ms), 行数 {rows if rows is not None else '?'}, "
+            f"参数 {params_shape(parameters, executemany)}: {entry.statement[:500]}"
+        )
+
+
+def record_error(statement: str) -> None:
+    with _lock:
+        _entry(statement).errors += 1
+
+
+def snapshot(sort_by: str = "total_ms", limit: int = 50) -> List[Dict[str, Any]]:
+    """按 sort_by (total_ms / mean_ms / max_ms / count / rows / errors) 降序返回聚合结果"""
+    with _lock:
+        items = [entry.to_dict() for entry in _stats.values()]
+    items.sort(key=lambda item: item[sort_by], reverse=True)
+    return items[:limit]
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def _rowcount(cursor) -> Optional[int]:
+    """DBAPI 报告的影响行数；SELECT 等未报告时 (rowcount 为 -1) 返回 None，不计入行数"""
+    rowcount = getattr(cursor, "rowcount", -1)
+    return rowcount if rowcount is not None and rowcount >= 0 else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    record(statement, (perf_counter() - started) * 1000, _rowcount(cursor), parameters, executemany)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("query_started") if conn is not None else None
+    if starts:
+        starts.pop()
+    if exception_context.statement:
+        record_error(exception_context.statement)
+
+
+def install(engine) -> None:
+    """为引擎 (同步 Engine 或 AsyncEngine) 注册语句统计事件"""
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
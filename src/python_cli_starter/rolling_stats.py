@@ -0,0 +1,281 @@
+# src/python_cli_starter/rolling_stats.py
+"""
+板块滚动统计：为每个板块的涨跌幅、换手/成交占比、成交额/净流入维护历史统计量，
+用于把当天的数值表示为相对自身历史的 z-score 与百分位。
+
+- 均值/方差使用 Welford 在线算法，分位数使用紧凑的分层压缩草图 (KLL 简化版)；
+- 统计量按交易日累积：当天盘中的最新值暂存在 pending 中，跨日后第一次入库时才并入统计，
+  因此同一天多次抓取不会被重复计入，当天数值始终与"截至昨日"的历史比较；
+- 每次入库只更新发生变化的板块，无需在请求时扫描整张历史表；
+- 尚无统计状态的板块 (首次部署、回填导入的历史) 在服务启动时由 seed_from_history 从每日表一次性补齐，
+  避免部署后很多天内 z-score / 百分位都为空。
+"""
+import asyncio
+import logging
+import math
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .cache import sector_cache, DF_SECTORS_STATS, THS_SECTORS_STATS
+from .database import AsyncSessionLocal, SectorDim, SectorStats, SECTOR_HISTORY_SOURCES, SOURCE_CODES, get_sector_ids
+
+logger = logging.getLogger(__name__)
+
+# 每个数据源参与统计的字段
+STATS_FIELDS = {
+    "eastmoney": ("change_percent", "turnover_rate", "amount"),
+    "ths": ("change_percent", "turnover_ratio", "net_inflow"),
+}
+STATS_CACHE_KEYS = {"eastmoney": DF_SECTORS_STATS, "ths": THS_SECTORS_STATS}
+
+SKETCH_K = 64  # 草图每层容量，越大越精确
+
+
+class QuantileSketch:
+    """
+    分层压缩的分位数草图：第 h 层每个元素代表 2^h 个原始值。
+    某层超过 k 个元素时排序后隔一个取一个提升到上一层，内存占用约为 O(k·log(n/k))。
+    """
+
+    def __init__(self, k: int = SKETCH_K, levels: Optional[List[List[float]]] = None, flip: int = 0):
+        self.k = k
+        self.levels = levels or [[]]
+        self.flip = flip  # 交替选择奇/偶位置，避免系统性偏差
+
+    def add(self, value: float) -> None:
+        self.levels[0].append(value)
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.k:
+                level.sort()
+                keep = [level.pop()] if len(level) % 2 else []
+                promoted = level[self.flip::2]
+                self.flip ^= 1
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[h + 1].extend(promoted)
+            h += 1
+
+    def percentile(self, value: float) -> Optional[float]:
+        """value 在已记录数据中的百分位 (0-100)，相等的值按一半计入"""
+        below = equal = total = 0.0
+        for h, level in enumerate(self.levels):
+            weight = 2 ** h
+            ordered = sorted(level)
+            lo = bisect_left(ordered, value)
+            hi = bisect_right(ordered, value)
+            below += weight * lo
+            equal += weight * (hi - lo)
+            total += weight * len(ordered)
+        if total == 0:
+            return None
+        return (below + equal / 2) / total * 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"levels": self.levels, "flip": self.flip}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "QuantileSketch":
+        data = data or {}
+        return cls(levels=data.get("levels"), flip=data.get("flip", 0))
+
+
+class RunningStats:
+    """单个指标的历史统计：Welford 均值/方差 + 分位数草图"""
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0, sketch: Optional[QuantileSketch] = None):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.sketch = sketch or QuantileSketch()
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.sketch.add(value)
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+    def describe(self, value: float) -> Dict[str, Any]:
+        """当前值相对历史的 z-score 与百分位"""
+        std = self.std
+        return {
+            "value": value,
+            "mean": round(self.mean, 4) if self.n else None,
+            "std": round(std, 4) if std is not None else None,
+            "zscore": round((value - self.mean) / std, 4) if std else None,
+            "percentile": round(p, 2) if (p := self.sketch.percentile(value)) is not None else None,
+            "n": self.n,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RunningStats":
+        data = data or {}
+        return cls(data.get("n", 0), data.get("mean", 0.0), data.get("m2", 0.0), QuantileSketch.from_dict(data.get("sketch")))
+
+
+def fold_pending(state: Dict[str, Any], pending: Optional[Dict[str, float]]) -> Dict[str, Any]:
+    """将上一交易日的最终值并入各指标的统计量，返回新的 state"""
+    if not pending:
+        return state
+    new_state = dict(state)
+    for field, value in pending.items():
+        if value is None:
+            continue
+        stats = RunningStats.from_dict(state.get(field))
+        stats.add(value)
+        new_state[field] = stats.to_dict()
+    return new_state
+
+
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+async def on_sectors_saved(source: str, fs_type: Optional[int], changed: list, captured_at: datetime) -> None:
+    """入库监听者：更新发生变化的板块的统计状态"""
+    fields = STATS_FIELDS[source]
+    source_code = SOURCE_CODES[source]
+    day = captured_at.date()
+    lock = _locks.setdefault(source, asyncio.Lock())
+    async with lock:
+        sector_ids = await get_sector_ids(source_code, (s.name for s in changed))
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(SectorStats).where(
+                    SectorStats.source == source_code,
+                    SectorStats.sector_id.in_(list(sector_ids.values())),
+                )
+            )
+            existing = {row.sector_id: row for row in result.scalars().all()}
+
+            records = []
+            for sector in changed:
+                sector_id = sector_ids[sector.name]
+                row = existing.get(sector_id)
+                state = row.state if row else {}
+                if row and row.last_date < day:
+                    state = fold_pending(state, row.pending)
+                records.append({
+                    "source": source_code,
+                    "sector_id": sector_id,
+                    "last_date": day,
+                    "pending": {f: getattr(sector, f) for f in fields},
+                    "state": state,
+                    "updated_at": captured_at,
+                })
+
+            stmt = insert(SectorStats)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["source", "sector_id"],
+                set_={k: stmt.excluded[k] for k in ("last_date", "pending", "state", "updated_at")},
+            )
+            await session.execute(stmt, records)
+            await session.commit()
+    sector_cache.invalidate(STATS_CACHE_KEYS[source])
+
+
+def build_seed_states(rows, fields) -> Dict[str, Dict[str, Any]]:
+    """
+    由每日历史行 (name, date, *fields，按 name, date 排序) 构造各板块的初始统计状态：
+    最后一个交易日的数值作为 pending，此前各交易日依次并入 state，与逐日入库的结果一致。
+    """
+    seeds: Dict[str, Dict[str, Any]] = {}
+    for name, day, *values in rows:
+        pending = dict(zip(fields, values))
+        seed = seeds.get(name)
+        if seed is None:
+            seeds[name] = {"last_date": day, "pending": pending, "state": {}}
+        else:
+            seed["state"] = fold_pending(seed["state"], seed["pending"])
+            seed["last_date"] = day
+            seed["pending"] = pending
+    return seeds
+
+
+async def seed_from_history(source: str) -> int:
+    """
+    为尚无统计状态的板块从每日表的历史数据补齐统计量，返回补齐的板块数。
+    已有状态的板块不受影响，因此可在每次启动时执行；与入库监听者共用同一把锁，避免交错写入。
+    """
+    fields = STATS_FIELDS[source]
+    source_code = SOURCE_CODES[source]
+    model = SECTOR_HISTORY_SOURCES[source][0]
+    has_stats = exists().where(
+        SectorStats.source == source_code,
+        SectorStats.sector_id == SectorDim.id,
+        SectorDim.source == source_code,
+        SectorDim.name == model.name,
+    )
+    lock = _locks.setdefault(source, asyncio.Lock())
+    async with lock:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(model.name, model.date, *(getattr(model, f) for f in fields))
+                .where(~has_stats)
+                .order_by(model.name, model.date)
+            )
+            rows = result.all()
+        if not rows:
+            return 0
+
+        seeds = await asyncio.to_thread(build_seed_states, rows, fields)
+        sector_ids = await get_sector_ids(source_code, seeds)
+        now = datetime.now()
+        records = [
+            {"source": source_code, "sector_id": sector_ids[name], "updated_at": now, **seed}
+            for name, seed in seeds.items()
+        ]
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(SectorStats).on_conflict_do_nothing(), records)
+            await session.commit()
+    sector_cache.invalidate(STATS_CACHE_KEYS[source])
+    logger.info(f"[Stats] {source} 从 {len(rows)} 行历史数据补齐了 {len(records)} 个板块的统计状态")
+    return len(records)
+
+
+async def seed_all_from_history() -> None:
+    """启动任务：依次为各数据源补齐统计状态"""
+    for source in STATS_FIELDS:
+        await seed_from_history(source)
+
+
+async def load_sector_stats(source: str, day: date) -> Dict[str, Dict[str, RunningStats]]:
+    """
+    读取某数据源全部板块的统计量，供列表接口计算 z-score / 百分位。
+    若某板块的 pending 属于 day 之前的交易日 (尚未有新数据触发合并)，这里一并计入。
+    """
+    source_code = SOURCE_CODES[source]
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(SectorDim.name, SectorStats)
+            .join(SectorDim, SectorDim.id == SectorStats.sector_id)
+            .where(SectorStats.source == source_code)
+        )
+        rows = result.all()
+    stats = {}
+    for name, row in rows:
+        state = fold_pending(row.state, row.pending) if row.last_date < day else row.state
+        stats[name] = {field: RunningStats.from_dict(data) for field, data in state.items()}
+    return stats
+
+
+def describe_sector(source: str, sector, stats: Dict[str, Dict[str, RunningStats]]) -> Dict[str, Dict[str, Any]]:
+    """计算单个板块当前各指标的统计描述"""
+    sector_stats = stats.get(sector.name, {})
+    return {
+        field: sector_stats.get(field, RunningStats()).describe(getattr(sector, field))
+        for field in STATS_FIELDS[source]
+    }
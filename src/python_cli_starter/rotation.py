@@ -0,0 +1,245 @@
+# src/python_cli_starter/rotation.py
+"""
+板块轮动 / 动量分析：
+每次板块数据入库后，读取近期历史构建 (日期 × 板块) 矩阵，使用 NumPy 向量化计算
+5/20/60 日累计涨跌幅、强弱排名及其变化、资金连续净流入/流出天数，结果写入 sector_rotation 表。
+东方财富的行业板块与概念板块相互重叠 (概念板块包含多个行业的成分股)，排名按板块类型 (sector_dim.fs_type) 分组进行。
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+
+from .database import (
+    AsyncSessionLocal,
+    SectorDim,
+    SectorRotation,
+    SECTOR_HISTORY_SOURCES,
+    SOURCE_CODES,
+    get_sector_ids,
+)
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (5, 20, 60)
+# 60 个交易日约合 90 个自然日，多取一些以覆盖长假
+LOOKBACK_CALENDAR_DAYS = 120
+# 东方财富接口的涨跌幅为放大 100 倍的整数 (250 即 2.50%)，同花顺已是百分比
+CHANGE_PERCENT_SCALE = {"eastmoney": 100.0, "ths": 1.0}
+
+
+def build_matrix(rows: Sequence[Tuple], value_count: int) -> Tuple[List[str], List[date], List[np.ndarray]]:
+    """
+    将 (name, date, value1, value2, ...) 行透视为 (日期 × 板块) 矩阵，缺失值为 NaN。
+    :return: (板块名称列表, 日期列表, [每个数值字段的矩阵])
+    """
+    names = sorted({r[0] for r in rows})
+    dates = sorted({r[1] for r in rows})
+    name_idx = {n: i for i, n in enumerate(names)}
+    date_idx = {d: i for i, d in enumerate(dates)}
+    matrices = [np.full((len(dates), len(names)), np.nan) for _ in range(value_count)]
+    if rows:
+        ti = np.fromiter((date_idx[r[1]] for r in rows), dtype=np.intp, count=len(rows))
+        ni = np.fromiter((name_idx[r[0]] for r in rows), dtype=np.intp, count=len(rows))
+        for k, matrix in enumerate(matrices):
+            matrix[ti, ni] = np.array([np.nan if r[2 + k] is None else r[2 + k] for r in rows], dtype=float)
+    return names, dates, matrices
+
+
+def rolling_returns(change: np.ndarray, window: int) -> np.ndarray:
+    """
+    计算每个时点近 window 个交易日的复利累计涨跌幅 (%)，历史不足 window 天时使用已有天数。
+    :param change: (T, N) 日涨跌幅 (%)，NaN 视为当天无数据 (按 0 收益处理)
+    """
+    t = change.shape[0]
+    log_ret = np.log1p(np.nan_to_num(change, nan=0.0) / 100.0)
+    cum = np.vstack([np.zeros((1, change.shape[1])), np.cumsum(log_ret, axis=0)])
+    lo = np.maximum(np.arange(1, t + 1) - window, 0)
+    ret = np.expm1(cum[1:] - cum[lo]) * 100.0
+    ret[np.isnan(change)] = np.nan
+    return ret
+
+
+def rank_desc(values: np.ndarray) -> np.ndarray:
+    """逐行按数值降序排名 (1 为最大)，NaN 不参与排名并返回 NaN"""
+    t, n = values.shape
+    keys = np.where(np.isnan(values), np.inf, -values)
+    order = np.argsort(keys, axis=1, kind="stable")
+    ranks = np.empty((t, n), dtype=float)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(1, n + 1, dtype=float), (t, n)), axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def sign_streak(values: np.ndarray) -> np.ndarray:
+    """逐列计算连续同号天数：连续为正返回正数，连续为负返回负数，0/NaN 处为 0"""
+    t = values.shape[0]
+    sign = np.sign(np.nan_to_num(values, nan=0.0))
+    boundary = np.ones_like(sign, dtype=bool)
+    boundary[1:] = sign[1:] != sign[:-1]
+    idx = np.broadcast_to(np.arange(t)[:, None], sign.shape)
+    run_start = np.maximum.accumulate(np.where(boundary, idx, 0), axis=0)
+    return (idx - run_start + 1) * sign
+
+
+def compute_rotation(change: np.ndarray, inflow: Optional[np.ndarray] = None, windows: Sequence[int] = WINDOWS) -> Dict[str, np.ndarray]:
+    """
+    基于 (T, N) 矩阵计算全部轮动指标，每个返回值均为 (T, N) 矩阵。
+    rank_change_w 为与上一交易日相比排名上升的名次 (正数表示走强)。
+    """
+    result: Dict[str, np.ndarray] = {}
+    for w in windows:
+        ret = rolling_returns(change, w)
+        rank = rank_desc(ret)
+        rank_change = np.full_like(rank, np.nan)
+        rank_change[1:] = rank[:-1] - rank[1:]
+        result[f"ret_{w}"] = ret
+        result[f"rank_{w}"] = rank
+        result[f"rank_change_{w}"] = rank_change
+    if inflow is not None:
+        result["flow_streak"] = sign_streak(inflow)
+    return result
+
+
+def compute_grouped_rotation(
+    change: np.ndarray,
+    inflow: Optional[np.ndarray],
+    groups: Optional[np.ndarray],
+    windows: Sequence[int] = WINDOWS,
+) -> Dict[str, np.ndarray]:
+    """
+    按列分组分别计算轮动指标，排名只在同一组内进行。
+    :param groups: (N,) 每个板块所属的组 (如板块类型)，为 None 时全部板块一起排名
+    """
+    if groups is None:
+        return compute_rotation(change, inflow, windows)
+    result: Dict[str, np.ndarray] = {}
+    for group in np.unique(groups):
+        cols = np.flatnonzero(groups == group)
+        part = compute_rotation(change[:, cols], None if inflow is None else inflow[:, cols], windows)
+        for key, matrix in part.items():
+            result.setdefault(key, np.full(change.shape, np.nan))[:, cols] = matrix
+    return result
+
+
+def _to_db_value(value: float, as_int: bool):
+    if np.isnan(value):
+        return None
+    return int(value) if as_int else round(float(value), 4)
+
+
+async def refresh_rotation(source: str, today: Optional[date] = None) -> int:
+    """读取近期历史，重新计算最新交易日的轮动指标并写入 sector_rotation，返回写入行数"""
+    started = perf_counter()
+    today = today or date.today()
+    model, _ = SECTOR_HISTORY_SOURCES[source]
+    has_inflow = source == "ths"
+    columns = [model.name, model.date, model.change_percent] + ([model.net_inflow] if has_inflow else [])
+
+    source_code = SOURCE_CODES[source]
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(*columns).where(model.date >= today - timedelta(days=LOOKBACK_CALENDAR_DAYS))
+        )
+        rows = result.all()
+        fs_types = None
+        if source == "eastmoney":
+            result = await session.execute(
+                select(SectorDim.name, SectorDim.fs_type).where(SectorDim.source == source_code)
+            )
+            fs_types = dict(result.all())
+    if not rows:
+        return 0
+
+    names, dates, matrices = await asyncio.to_thread(build_matrix, rows, len(columns) - 2)
+    change = matrices[0] / CHANGE_PERCENT_SCALE[source]
+    # 未知类型 (如只经上传出现的板块) 单独成组
+    groups = np.array([fs_types.get(n) or 0 for n in names]) if fs_types is not None else None
+    metrics = await asyncio.to_thread(compute_grouped_rotation, change, matrices[1] if has_inflow else None, groups)
+
+    sector_ids = await get_sector_ids(source_code, names)
+    latest = len(dates) - 1
+    now = datetime.now()
+    records = []
+    for j, name in enumerate(names):
+        if np.isnan(change[latest, j]):
+            continue  # 最新交易日没有该板块的数据
+        record = {"source": source_code, "date": dates[latest], "sector_id": sector_ids[name], "updated_at": now}
+        for key, matrix in metrics.items():
+            record[key] = _to_db_value(matrix[latest, j], as_int=not key.startswith("ret_"))
+        records.append(record)
+
+    if records:
+        stmt = insert(SectorRotation)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['source', 'date', 'sector_id'],
+            set_={key: stmt.excluded[key] for key in records[0] if key not in ("source", "date", "sector_id")},
+        )
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt, records)
+            await session.commit()
+
+    logger.info(
+        f"[Rotation] {source} 轮动指标计算完成: {len(names)} 个板块 × {len(dates)} 个交易日，"
+        f"写入 {len(records)} 行，耗时 {(perf_counter() - started) * 1000:.0f} ms"
+    )
+    return len(records)
+
+
+# 同一数据源的计算串行执行；计算期间再有新数据入库时，结束后补算一次
+_running: Dict[str, asyncio.Task] = {}
+_dirty: Dict[str, bool] = {}
+
+
+async def _refresh_loop(source: str) -> None:
+    try:
+        while True:
+            _dirty[source] = False
+            try:
+                await refresh_rotation(source)
+            except Exception as e:
+                logger.error(f"[Rotation] {source} 轮动指标计算失败: {e}")
+            if not _dirty.get(source):
+                break
+    finally:
+        _running.pop(source, None)
+
+
+async def on_sectors_saved(source: str, fs_type: Optional[int], changed: list, captured_at: datetime) -> None:
+    """入库监听者：在后台触发轮动指标重算，不阻塞入库流程"""
+    if source in _running:
+        _dirty[source] = True
+        return
+    _running[source] = asyncio.create_task(_refresh_loop(source))
+
+
+async def get_latest_rotation(
+    source: str, day: Optional[date] = None, fs_type: Optional[int] = None
+) -> Tuple[Optional[date], list]:
+    """
+    读取指定 (默认最新) 交易日的轮动指标，返回 (日期, [(板块名称, 板块类型, SectorRotation), ...])。
+    :param fs_type: 只返回该类型的东方财富板块 (2=行业, 3=概念)
+    """
+    source_code = SOURCE_CODES[source]
+    async with AsyncSessionLocal() as session:
+        if day is None:
+            day = await session.scalar(
+                select(func.max(SectorRotation.date)).where(SectorRotation.source == source_code)
+            )
+            if day is None:
+                return None, []
+        stmt = (
+            select(SectorDim.name, SectorDim.fs_type, SectorRotation)
+            .join(SectorDim, SectorDim.id == SectorRotation.sector_id)
+            .where(SectorRotation.source == source_code, SectorRotation.date == day)
+        )
+        if fs_type is not None:
+            stmt = stmt.where(SectorDim.fs_type == fs_type)
+        result = await session.execute(stmt)
+        return day, result.all()
@@ -1,5 +1,5 @@
 # src/python_cli_starter/schemas.py
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, model_validator
 from typing import Dict, Any, Optional
 from datetime import date, datetime
 from enum import Enum
@@ -59,32 +59,69 @@ class RsiChartResponse(BaseModel):
     signals: ChartSignals
     config: RsiConfig
 
+def format_yi(value: float) -> str:
+    """元 -> 'xx.xx 亿'"""
+    return f"{value / 100000000:.2f} 亿"
+
+def format_percent_x100(value: float) -> str:
+    """东方财富放大 100 倍的百分比 -> 'x.xx%'"""
+    return f"{value / 100:.2f}%"
+
 class SectorInfo(BaseModel):
-    """板块简要信息"""
+    """
+    板块简要信息。
+    *_desc 为数值字段的格式化结果，不入库，在校验时由数值生成 (传入的值会被覆盖)。
+    """
     model_config = ConfigDict(from_attributes=True)
 
     name: str            # f14 板块名称
 
     market_cap: float    # f20 总市值 (原始值)
-    market_cap_desc: str # 格式化后的市值 (例如: 99186.73 亿)
+    market_cap_desc: str = "" # 格式化后的市值 (例如: 99186.73 亿)
 
     turnover_rate: float      # f8 换手率 (原始值)
-    turnover_rate_desc: str   # 格式化后的换手率 (例如: 0.16%)
+    turnover_rate_desc: str = ""  # 格式化后的换手率 (例如: 0.16%)
 
     change_percent: float     # f3 涨跌幅 (原始值)
-    change_percent_desc: str  # 格式化后的涨跌幅 (例如: 1.25%)
+    change_percent_desc: str = ""  # 格式化后的涨跌幅 (例如: 1.25%)
 
     amount: float             # f6 成交额 (原始值)
-    amount_desc: str          # 格式化后的成交额 (例如: 123.45 亿)
+    amount_desc: str = ""     # 格式化后的成交额 (例如: 123.45 亿)
 
     date: date                # 记录日期
     updated_at: datetime      # 更新时间
 
+    @model_validator(mode="after")
+    def _format_desc(self) -> "SectorInfo":
+        self.market_cap_desc = format_yi(self.market_cap)
+        self.turnover_rate_desc = format_percent_x100(self.turnover_rate)
+        self.change_percent_desc = format_percent_x100(self.change_percent)
+        self.amount_desc = format_yi(self.amount)
+        return self
+
 class SectorListResponse(BaseModel):
     """板块列表响应"""
     count: int
     sectors: list[SectorInfo]
 
+class MetricStats(BaseModel):
+    """单个指标相对自身历史的统计描述"""
+    value: float
+    mean: Optional[float] = None        # 历史均值
+    std: Optional[float] = None         # 历史标准差
+    zscore: Optional[float] = None      # (value - mean) / std，历史不足两个交易日时为空
+    percentile: Optional[float] = None  # 在历史中的百分位 (0-100)，没有历史时为空
+    n: int                              # 历史交易日数
+
+class SectorInfoWithStats(SectorInfo):
+    """附带历史统计的板块信息"""
+    stats: dict[str, MetricStats]
+
+class SectorListWithStatsResponse(BaseModel):
+    """附带历史统计的板块列表响应"""
+    count: int
+    sectors: list[SectorInfoWithStats]
+
 class ThsSectorInfo(BaseModel):
     """同花顺板块信息"""
     model_config = ConfigDict(from_attributes=True)
@@ -104,6 +141,147 @@ class ThsSectorListResponse(BaseModel):
     count: int
     sectors: list[ThsSectorInfo]
 
+class ThsSectorInfoWithStats(ThsSectorInfo):
+    """附带历史统计的同花顺板块信息"""
+    stats: dict[str, MetricStats]
+
+class ThsSectorListWithStatsResponse(BaseModel):
+    """附带历史统计的同花顺板块列表响应"""
+    count: int
+    sectors: list[ThsSectorInfoWithStats]
+
+class SectorPageResponse(BaseModel):
+    """东方财富板块列表分页响应 (带筛选/排序/分页参数时返回)"""
+    count: int                      # 本页条数
+    total: int                      # 满足筛选条件的总条数
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示已是最后一页
+    sectors: list[SectorInfoWithStats | SectorInfo]
+
+class ThsSectorPageResponse(BaseModel):
+    """同花顺板块列表分页响应"""
+    count: int
+    total: int
+    next_cursor: Optional[str] = None
+    sectors: list[ThsSectorInfoWithStats | ThsSectorInfo]
+
+class JoinedSector(BaseModel):
+    """按映射表合并的板块：同一板块在两家数据源的最新数据"""
+    eastmoney: SectorInfo
+    ths: ThsSectorInfo
+    score: float  # 名称相似度 (0-1)
+    method: str   # 匹配方式: exact / ngram / manual
+
+class JoinedSectorListResponse(BaseModel):
+    """合并板块列表响应"""
+    count: int
+    sectors: list[JoinedSector]
+
+class SectorChangesResponse(BaseModel):
+    """增量变更响应：since 之后有更新的板块行"""
+    since: datetime
+    until: datetime  # 本次返回数据中最新的更新时间，作为下一次请求的 since
+    eastmoney: list[SectorInfo] = []
+    ths: list[ThsSectorInfo] = []
+
+class SectorChangeEvent(BaseModel):
+    """入库后推送的增量事件 (SSE data)"""
+    source: str
+    fs_type: Optional[int] = None
+    captured_at: datetime
+    eastmoney: list[SectorInfo] = []
+    ths: list[ThsSectorInfo] = []
+
+class SectorSnapshotPoint(BaseModel):
+    """板块盘中快照数据点 (未提供的字段对应数据源没有该指标)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    captured_at: datetime               # 抓取时间
+    fs_type: int                        # 东方财富 2=行业, 3=概念；同花顺为 0
+    change_percent: float
+    market_cap: Optional[float] = None
+    turnover_rate: Optional[float] = None
+    amount: Optional[float] = None
+    net_inflow: Optional[float] = None
+    up_count: Optional[int] = None
+    down_count: Optional[int] = None
+    turnover_ratio: Optional[float] = None
+
+class SectorIntradayResponse(BaseModel):
+    """单个板块的盘中走势"""
+    name: str
+    source: str
+    date: date
+    count: int
+    points: list[SectorSnapshotPoint]
+
+class MarketSnapshotSector(SectorSnapshotPoint):
+    """全市场快照中的单个板块"""
+    name: str
+
+class MarketSnapshotResponse(BaseModel):
+    """指定时刻的全市场板块快照"""
+    source: str
+    at: datetime
+    count: int
+    sectors: list[MarketSnapshotSector]
+
+class SectorHistory(BaseModel):
+    """单个板块的历史时间序列 (列式：dates 与 series 中每个数组一一对应)"""
+    name: str
+    source: str
+    dates: list[date]
+    series: dict[str, list[float | None]]  # 字段名 -> 数值数组，例如 change_percent / amount / net_inflow
+
+class SectorHistoryBatchResponse(BaseModel):
+    """多板块历史时间序列"""
+    source: str
+    count: int
+    sectors: list[SectorHistory]
+
+class SectorRotationInfo(BaseModel):
+    """单个板块的轮动 / 动量指标"""
+    model_config = ConfigDict(from_attributes=True)
+
+    name: str
+    fs_type: Optional[int] = None          # 东方财富板块类型 (2=行业, 3=概念)，排名在同类型板块内进行
+    ret_5: Optional[float] = None          # 近 5 个交易日累计涨跌幅 (%)
+    ret_20: Optional[float] = None
+    ret_60: Optional[float] = None
+    rank_5: Optional[int] = None           # 累计涨跌幅排名 (1 为最强)
+    rank_20: Optional[int] = None
+    rank_60: Optional[int] = None
+    rank_change_5: Optional[int] = None    # 较上一交易日排名上升的名次
+    rank_change_20: Optional[int] = None
+    rank_change_60: Optional[int] = None
+    flow_streak: Optional[int] = None      # 资金连续净流入(+)/净流出(-)天数
+
+class SectorRotationResponse(BaseModel):
+    """板块轮动分析响应"""
+    source: str
+    date: Optional[date]
+    count: int
+    sectors: list[SectorRotationInfo]
+
+class MarketBreadthPoint(BaseModel):
+    """市场宽度汇总 (基于同花顺各板块涨跌家数)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    date: date
+    captured_at: datetime
+    advancers: int                     # 上涨家数
+    decliners: int                     # 下跌家数
+    breadth_ratio: Optional[float]     # 上涨家数占比
+    net_inflow: float                  # 净流入合计 (亿元)
+    sectors_up: int                    # 上涨板块数
+    sectors_down: int                  # 下跌板块数
+    sector_count: int                  # 板块总数
+
+class MarketBreadthResponse(BaseModel):
+    """市场宽度响应"""
+    latest: Optional[MarketBreadthPoint]
+    intraday: list[MarketBreadthPoint]   # 当日各快照时点
+    daily: list[MarketBreadthPoint]      # 每日汇总历史
+
 class EastMoneyFetchRequest(BaseModel):
     """触发获取东方财富板块数据的请求参数"""
     cookie: Optional[str] = None
@@ -116,11 +294,20 @@ class EastMoneyFetchResponse(BaseModel):
     count: int
     curl_command: Optional[str] = None
 
+class EastMoneyUploadPage(BaseModel):
+    """上传数据中单页的解析结果"""
+    page: int  # 从 1 开始
+    count: int
+    success: bool = True
+    message: Optional[str] = None
+
 class EastMoneyUploadResponse(BaseModel):
     """上传数据的响应"""
     success: bool
     message: str
     count: int
+    changed: int = 0  # 与已入库数据相比有变化并写入的行数
+    pages: list[EastMoneyUploadPage] = []
 
 class FetchWithThsRequest(BaseModel):
     """获取东方财富板块 + 同花顺的请求参数"""
@@ -133,9 +320,53 @@ class FetchWithThsStepResult(BaseModel):
     success: bool
     message: str
     count: int
+    changed: int = 0         # 数值有变化、实际写入的行数
+    elapsed_ms: float = 0.0  # 该步骤耗时 (毫秒)
+    status: str = "success"  # success / empty / failed / timeout，与 fetch_runs.status 一致
 
 class FetchWithThsResponse(BaseModel):
     """获取响应"""
     success: bool
     message: str
-    steps: list[FetchWithThsStepResult]
\ No newline at end of file
+    steps: list[FetchWithThsStepResult]
+    elapsed_ms: float = 0.0  # 总耗时 (毫秒)
+
+class FetchRunInfo(BaseModel):
+    """一次抓取 (单个数据源) 的运行记录"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    source: str                  # eastmoney / ths
+    fs_type: int                 # 东方财富 2=行业, 3=概念；同花顺为 0
+    trigger: str                 # scheduled / manual
+    status: str                  # success / empty / failed / timeout
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: float = 0.0
+    pages: int
+    rows_fetched: int
+    rows_changed: int
+    retries: int
+    bytes: int
+    stages: Dict[str, float]     # 各阶段耗时 (毫秒): playwright_launch / cookie_wait / pages / parse / fetch / save
+    error: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _fill_duration(self) -> "FetchRunInfo":
+        self.duration_ms = round((self.finished_at - self.started_at).total_seconds() * 1000, 1)
+        return self
+
+class FetchRunSummary(BaseModel):
+    """查询结果的汇总，便于观察抓取耗时趋势"""
+    count: int
+    success_count: int
+    p50_duration_ms: Optional[float] = None
+    p95_duration_ms: Optional[float] = None
+    max_duration_ms: Optional[float] = None
+    total_rows_fetched: int = 0
+    total_retries: int = 0
+
+class FetchRunListResponse(BaseModel):
+    """抓取运行记录查询响应"""
+    summary: FetchRunSummary
+    runs: list[FetchRunInfo]
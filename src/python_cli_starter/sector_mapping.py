@@ -0,0 +1,203 @@
+# src/python_cli_starter/sector_mapping.py
+"""
+东方财富 ↔ 同花顺板块名称映射：
+两家数据源的板块名称并不一致 (如 "半导体" / "半导体及元件")，这里离线构建一张一一对应的映射表，
+供 /market/sectors/joined 通过一次索引连接合并两家数据，避免每次请求都做 O(n×m) 的模糊匹配。
+
+匹配顺序：
+1. 人工覆盖：表中 method='manual' 的记录，及环境变量 SECTOR_MAPPING_OVERRIDES 指向的 JSON 文件
+   (文件优先；由文件生成的配对保存为 method='override')；
+2. 名称归一化后完全相同；
+3. 字符二元组 (bigram) 的 Dice 相似度，借助倒排索引只比较有公共二元组的候选，按分数从高到低贪心一一配对。
+
+可手动重建：python -m python_cli_starter.sector_mapping
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.orm import aliased
+
+from .cache import sector_cache, SECTORS_JOINED
+from .database import AsyncSessionLocal, SectorDim, SectorMapping, SOURCE_EASTMONEY, SOURCE_THS
+
+logger = logging.getLogger(__name__)
+
+# 人工覆盖文件：{"东方财富板块名": "同花顺板块名"}，值为 null 表示该板块不参与映射
+OVERRIDES_PATH = os.getenv("SECTOR_MAPPING_OVERRIDES", "")
+# n-gram 相似度低于该阈值的候选不做映射
+SIMILARITY_THRESHOLD = float(os.getenv("SECTOR_MAPPING_THRESHOLD", "0.5"))
+
+# 归一化时去掉的通用后缀，按长度降序以免 "行业" 先于 "行业板块" 被截掉
+_NAME_SUFFIXES = sorted(["行业", "板块", "概念", "指数", "行业板块", "概念股", "类"], key=len, reverse=True)
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_ROMAN_RE = re.compile(r"[ⅰⅱⅲⅳⅴⅠⅡⅢⅣⅤ]+$")
+
+# 映射结果：{东方财富名称: (同花顺名称, 相似度, 匹配方式)}
+Mapping = Dict[str, Tuple[str, float, str]]
+
+
+def normalize_name(name: str) -> str:
+    """全角转半角、去空白与标点、去掉通用后缀及罗马数字层级标记"""
+    # 罗马数字须在 NFKC 之前去掉，否则 "Ⅱ" 会被展开为 "II"
+    text = _ROMAN_RE.sub("", name.strip())
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _NON_WORD_RE.sub("", text).replace("_", "")
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _NAME_SUFFIXES:
+            if len(text) > len(suffix) and text.endswith(suffix):
+                text = text[: -len(suffix)]
+                stripped = True
+                break
+    return text
+
+
+def bigrams(text: str) -> Set[str]:
+    """字符二元组集合，单字名称退化为单字本身"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """两个二元组集合的 Dice 系数"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def build_mapping(
+    em_names: Iterable[str],
+    ths_names: Iterable[str],
+    overrides: Optional[Dict[str, Optional[str]]] = None,
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> Mapping:
+    """计算一一对应的名称映射 (纯函数，不访问数据库)"""
+    em_names = sorted(set(em_names))
+    ths_names = sorted(set(ths_names))
+    em_set = set(em_names)
+    ths_set = set(ths_names)
+    mapping: Mapping = {}
+    used: Set[str] = set()
+    excluded: Set[str] = set()
+
+    for em, ths in (overrides or {}).items():
+        if ths is None:
+            excluded.add(em)
+        elif em in em_set and ths in ths_set and ths not in used:
+            mapping[em] = (ths, 1.0, "manual")
+            used.add(ths)
+
+    normalized = {n: normalize_name(n) for n in ths_names}
+    by_normalized: Dict[str, str] = {}
+    for name, norm in normalized.items():
+        by_normalized.setdefault(norm, name)
+
+    pending = []
+    for em in em_names:
+        if em in mapping or em in excluded:
+            continue
+        ths = by_normalized.get(normalize_name(em))
+        if ths and ths not in used:
+            mapping[em] = (ths, 1.0, "exact")
+            used.add(ths)
+        else:
+            pending.append(em)
+
+    # 倒排索引: bigram -> 同花顺名称，只对有公共 bigram 的候选计算相似度
+    ths_grams = {n: bigrams(norm) for n, norm in normalized.items() if n not in used}
+    index: Dict[str, Set[str]] = {}
+    for name, grams in ths_grams.items():
+        for gram in grams:
+            index.setdefault(gram, set()).add(name)
+
+    candidates = []
+    for em in pending:
+        grams = bigrams(normalize_name(em))
+        for ths in set().union(*(index.get(g, ()) for g in grams)):
+            score = similarity(grams, ths_grams[ths])
+            if score >= threshold:
+                candidates.append((score, em, ths))
+
+    # 分数从高到低贪心配对，同分时按名称排序保证结果稳定
+    for score, em, ths in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if em in mapping or ths in used:
+            continue
+        mapping[em] = (ths, round(score, 4), "ngram")
+        used.add(ths)
+
+    return mapping
+
+
+def load_override_file(path: str = OVERRIDES_PATH) -> Dict[str, Optional[str]]:
+    if not path:
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"[SectorMapping] 读取人工覆盖文件 {path} 失败: {e}")
+        return {}
+
+
+async def refresh_sector_mapping() -> int:
+    """基于维度表中的全部板块名称重建映射表，返回映射条数"""
+    em_dim = aliased(SectorDim)
+    ths_dim = aliased(SectorDim)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(SectorDim.source, SectorDim.name, SectorDim.id))
+        ids: Dict[Tuple[int, str], int] = {}
+        names: Dict[int, list] = {SOURCE_EASTMONEY: [], SOURCE_THS: []}
+        for source, name, sector_id in result.all():
+            ids[(source, name)] = sector_id
+            if source in names:
+                names[source].append(name)
+
+        # 表中已有的人工映射重建时保留；覆盖文件对其列出的名称有最终决定权 (包括 null 排除)
+        manual = await session.execute(
+            select(em_dim.name, ths_dim.name)
+            .select_from(SectorMapping)
+            .join(em_dim, em_dim.id == SectorMapping.em_sector_id)
+            .join(ths_dim, ths_dim.id == SectorMapping.ths_sector_id)
+            .where(SectorMapping.method == "manual")
+        )
+        file_overrides = load_override_file()
+        overrides = {**dict(manual.all()), **file_overrides}
+
+        mapping = build_mapping(names[SOURCE_EASTMONEY], names[SOURCE_THS], overrides)
+        now = datetime.now()
+        records = [
+            {
+                "em_sector_id": ids[(SOURCE_EASTMONEY, em)],
+                "ths_sector_id": ids[(SOURCE_THS, ths)],
+                "score": score,
+                # 来自覆盖文件的配对另记为 override，下次重建时不会被当作表中的人工映射读回
+                "method": "override" if method == "manual" and em in file_overrides else method,
+                "updated_at": now,
+            }
+            for em, (ths, score, method) in mapping.items()
+        ]
+        await session.execute(delete(SectorMapping))
+        if records:
+            await session.execute(SectorMapping.__table__.insert(), records)
+        await session.commit()
+
+    sector_cache.invalidate(SECTORS_JOINED)
+    logger.info(
+        f"[SectorMapping] 映射表已重建: 东方财富 {len(names[SOURCE_EASTMONEY])} 个、同花顺 {len(names[SOURCE_THS])} 个板块，"
+        f"匹配 {len(records)} 对"
+    )
+    return len(records)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(refresh_sector_mapping())
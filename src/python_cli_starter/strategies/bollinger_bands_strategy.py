@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Any
 
+from .. import metrics
+from .. import tracing
+
 logger = logging.getLogger(__name__)
 
 # --- 策略常量 ---
@@ -19,7 +22,8 @@ def get_latest_fund_data(fund_symbol: str) -> pd.DataFrame:
     start_date = datetime.today() - timedelta(days=200)
     
     try:
-        fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
+        with metrics.track_upstream("akshare_nav"), tracing.span("akshare.nav", fund_code=fund_symbol):
+            fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
         fund_nav_df['净值日期'] = pd.to_datetime(fund_nav_df['净值日期'])
         fund_nav_df = fund_nav_df.set_index('净值日期')
         fund_nav_df = fund_nav_df[['单位净值']]
@@ -39,6 +43,8 @@ def get_latest_fund_data(fund_symbol: str) -> pd.DataFrame:
         logger.error(f"[BBands Strategy] 获取基金 {fund_symbol} 数据时发生错误: {e}")
         return None
 
+@metrics.STRATEGY_COMPUTE_SECONDS.time(strategy="bollinger_bands")
+@tracing.traced("strategy.compute", strategy="bollinger_bands")
 def calculate_bollinger_bands(data: pd.DataFrame, period: int, dev_factor: float) -> pd.DataFrame:
     """使用 pandas 手动计算布林带指标。"""
     data['bband_mid'] = data['close'].rolling(window=period).mean()
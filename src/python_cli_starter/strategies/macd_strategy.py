@@ -6,6 +6,9 @@ from datetime import datetime, timedelta
 import logging
 from typing import Dict, Any
 
+from .. import metrics
+from .. import tracing
+
 logger = logging.getLogger(__name__)
 
 # --- 策略常量 ---
@@ -20,7 +23,8 @@ def get_latest_fund_data(fund_symbol: str) -> pd.DataFrame:
     start_date = datetime.today() - timedelta(days=150)
     
     try:
-        fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
+        with metrics.track_upstream("akshare_nav"), tracing.span("akshare.nav", fund_code=fund_symbol):
+            fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
         fund_nav_df['净值日期'] = pd.to_datetime(fund_nav_df['净值日期'])
         fund_nav_df = fund_nav_df.set_index('净值日期')
         fund_nav_df = fund_nav_df[['单位净值']]
@@ -40,6 +44,8 @@ def get_latest_fund_data(fund_symbol: str) -> pd.DataFrame:
         logger.error(f"[MACD Strategy] 获取基金 {fund_symbol} 数据时发生错误: {e}")
         return None
 
+@metrics.STRATEGY_COMPUTE_SECONDS.time(strategy="macd")
+@tracing.traced("strategy.compute", strategy="macd")
 def calculate_macd(data: pd.DataFrame, short_period: int, long_period: int, signal_period: int) -> pd.DataFrame:
     """使用 pandas 手动计算MACD指标。"""
     ema_short = data['close'].ewm(span=short_period, adjust=False).mean()
@@ -5,6 +5,9 @@ import pandas as pd
 from datetime import datetime, timedelta
 import logging
 
+from .. import metrics
+from .. import tracing
+
 logger = logging.getLogger(__name__)
 
 # --- 策略常量 ---
@@ -19,7 +22,8 @@ def get_latest_fund_data(fund_symbol: str):
     
     try:
         # 使用 akshare 获取数据
-        fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
+        with metrics.track_upstream("akshare_nav"), tracing.span("akshare.nav", fund_code=fund_symbol):
+            fund_nav_df = ak.fund_open_fund_info_em(symbol=fund_symbol, indicator="单位净值走势")
         fund_nav_df['净值日期'] = pd.to_datetime(fund_nav_df['净值日期'])
         fund_nav_df = fund_nav_df.set_index('净值日期')
         fund_nav_df = fund_nav_df[['单位净值']]
@@ -40,6 +44,8 @@ def get_latest_fund_data(fund_symbol: str):
         logger.error(f"[RSI Strategy] 获取基金 {fund_symbol} 数据时发生错误: {e}")
         return None
 
+@metrics.STRATEGY_COMPUTE_SECONDS.time(strategy="rsi")
+@tracing.traced("strategy.compute", strategy="rsi")
 def calculate_rsi(data: pd.DataFrame, period: int) -> pd.DataFrame:
     """使用 pandas 手动计算 RSI 指标。"""
     delta = data['close'].diff()
@@ -0,0 +1,256 @@
+# src/python_cli_starter/tracing.py
+"""
+轻量的进程内 span 追踪：定位一次抓取 / 策略请求的耗时究竟花在浏览器启动、等待 Cookie、分页请求、解析还是入库。
+
+- span 通过 contextvars 自动形成父子关系，asyncio.create_task / gather 与线程池 (run_in_threadpool) 都会继承当前 span；
+- 结束的 span 写入内存环形缓冲区 (TRACE_BUFFER_SIZE 条，默认 5000)，配置 TRACE_FILE 时另追加到 JSON lines 文件
+  (由后台线程批量写入，不在事件循环上做文件 I/O)；
+- /debug/traces 按 trace 汇总查询最近的记录。
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "5000"))
+TRACE_FILE = os.getenv("TRACE_FILE") or None
+
+
+class Span:
+    """一个计时区间；attributes 只应放可 JSON 序列化的简单值 (不要放 cookie 等敏感信息)"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "started_at", "duration_ms", "status", "error", "_started")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.started_at = datetime.now()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._started = perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def _finish(self) -> None:
+        self.duration_ms = round((perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class RingBufferExporter:
+    """保留最近 size 个结束的 span"""
+
+    def __init__(self, size: int = BUFFER_SIZE):
+        self.spans: Deque[Span] = deque(maxlen=size)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class JsonLinesExporter:
+    """
+    每个结束的 span 追加一行 JSON：export 只把 span 放入队列，由后台线程批量序列化并写入文件。
+    队列已满 (磁盘写入跟不上) 时丢弃新的 span 并计数，不阻塞调用方。
+    """
+
+    def __init__(self, path: str, max_pending: int = 10_000):
+        self.path = path
+        self.dropped = 0
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """等待已导出的 span 全部写入文件 (服务关闭与测试时调用)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(records)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"追踪记录写入 {self.path} 失败 ({len(records)} 条): {e}")
+        if self.dropped:
+            logger.warning(f"追踪记录写入队列已满，已丢弃 {self.dropped} 条")
+            self.dropped = 0
+
+
+buffer = RingBufferExporter()
+exporters: List[Any] = [buffer] + ([JsonLinesExporter(TRACE_FILE)] if TRACE_FILE else [])
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_collector: ContextVar[Optional[List[Span]]] = ContextVar("span_collector", default=None)
+
+
+def flush() -> None:
+    """等待各导出器的后台写入完成"""
+    for exporter in exporters:
+        if hasattr(exporter, "flush"):
+            exporter.flush()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def set_attributes(**attributes: Any) -> None:
+    """为当前 span 补充属性，没有进行中的 span 时忽略"""
+    span_ = _current.get()
+    if span_ is not None:
+        span_.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """开启一个 span，作为当前 span 的子 span (没有时开启新的 trace)"""
+    span_ = Span(name, _current.get(), attributes)
+    token = _current.set(span_)
+    try:
+        yield span_
+    except asyncio.CancelledError:
+        span_.status = "cancelled"
+        raise
+    except BaseException as e:
+        span_.status = "error"
+        span_.error = repr(e)
+        raise
+    finally:
+        span_._finish()
+        _current.reset(token)
+        collector = _collector.get()
+        if collector is not None:
+            collector.append(span_)
+        for exporter in exporters:
+            exporter.export(span_)
+
+
+@contextmanager
+def collect(spans: Optional[List[Span]] = None) -> Iterator[List[Span]]:
+    """
+    收集此上下文内 (含其中创建的子任务与线程池调用) 结束的全部 span，不受环形缓冲区淘汰影响。
+    可传入外部列表，以便任务被取消后调用方仍能拿到已结束的 span。
+    """
+    spans = [] if spans is None else spans
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+
+def traced(name: str, **attributes: Any):
+    """以 span 包裹整个函数的装饰器，支持同步与异步函数"""
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- 查询 ---
+
+def get_trace(trace_id: str) -> List[Dict[str, Any]]:
+    """某个 trace 已结束的全部 span，按开始时间排序"""
+    spans = [s for s in list(buffer.spans) if s.trace_id == trace_id]
+    return [s.to_dict() for s in sorted(spans, key=lambda s: s.started_at)]
+
+
+def recent_traces(limit: int = 20, name: Optional[str] = None, min_duration_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    最近结束的 trace 摘要 (以根 span 为准，新的在前)。
+    :param name: 只返回根 span 名称等于该值的 trace
+    :param min_duration_ms: 只返回总耗时不低于该值的 trace
+    """
+    spans = list(buffer.spans)
+    counts: Dict[str, int] = {}
+    for s in spans:
+        counts[s.trace_id] = counts.get(s.trace_id, 0) + 1
+
+    traces = []
+    for s in reversed(spans):
+        if s.parent_id is not None:
+            continue
+        if name and s.name != name:
+            continue
+        if min_duration_ms is not None and s.duration_ms < min_duration_ms:
+            continue
+        traces.append({
+            "trace_id": s.trace_id,
+            "name": s.name,
+            "started_at": s.started_at.isoformat(),
+            "duration_ms": s.duration_ms,
+            "status": s.status,
+            "span_count": counts[s.trace_id],
+            "attributes": s.attributes,
+        })
+        if len(traces) >= limit:
+            break
+    return traces
@@ -3,9 +3,10 @@ import pytest
 import sys
 from pathlib import Path
 
-# 添加 src 目录到 Python 路径
-src_path = Path(__file__).parent.parent / 'src'
-sys.path.insert(0, str(src_path))
+# 添加 src 目录到 Python 路径；仓库根目录用于导入 benchmarks 中的模拟数据源
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path / 'src'))
+sys.path.insert(1, str(root_path))
 
 
 @pytest.fixture
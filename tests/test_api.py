@@ -2,10 +2,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
-from datetime import date, datetime
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
 import pandas as pd
 
 from python_cli_starter.main import app
+from python_cli_starter import schemas
 from python_cli_starter.schemas import SignalType
 
 
@@ -280,6 +282,23 @@ class TestChartsAPI:
         # 初始阶段无法计算 RSI，所以 rsiValues 前面应该是 null
         assert data['rsiValues'][0] is None
 
+    @patch('python_cli_starter.charts.ak.fund_open_fund_info_em')
+    def test_get_rsi_chart_not_modified(self, mock_akshare, mock_akshare_history):
+        """净值未更新时返回 304，不再计算指标"""
+        from python_cli_starter import charts
+        mock_akshare.return_value = mock_akshare_history
+
+        with patch.object(charts, 'build_rsi_chart_data', wraps=charts.build_rsi_chart_data) as mock_build:
+            first = client.get('/charts/rsi/161725')
+            etag = first.headers['etag']
+            assert 'max-age=' in first.headers['cache-control']
+
+            second = client.get('/charts/rsi/161725', headers={'If-None-Match': etag})
+
+        assert second.status_code == 304
+        assert second.content == b''
+        assert mock_build.call_count == 1
+
     @patch('python_cli_starter.charts.ak.fund_open_fund_info_em')
     def test_get_rsi_chart_not_found(self, mock_akshare):
         """测试获取不存在的数据"""
@@ -306,4 +325,602 @@ class TestChartsAPI:
         response = client.get('/charts/rsi/161725')
         
         assert response.status_code == 404
-        assert '无法获取' in response.json()['detail']
\ No newline at end of file
+        assert '无法获取' in response.json()['detail']
+
+class TestFetchPipelines:
+    """并发抓取流水线测试"""
+
+    @staticmethod
+    def _sectors(n):
+        return [MagicMock(name=f"sector{i}") for i in range(n)]
+
+    @patch('python_cli_starter.main.save_ths_sectors')
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    @patch('python_cli_starter.main.market.fetch_ths_sectors')
+    @patch('python_cli_starter.main.market.fetch_eastmoney_batch')
+    def test_fetch_with_ths_runs_concurrently(self, mock_em, mock_ths, mock_save_em, mock_save_ths):
+        """两个数据源并发执行，总耗时接近较慢的一路而不是两者之和"""
+        import asyncio
+
+        async def slow_em(**kwargs):
+            await asyncio.sleep(0.3)
+            return self._sectors(3)
+
+        async def slow_ths():
+            await asyncio.sleep(0.3)
+            return self._sectors(2)
+
+        mock_em.side_effect = slow_em
+        mock_ths.side_effect = slow_ths
+        mock_save_em.return_value = 3
+        mock_save_ths.return_value = 0
+
+        response = client.post('/market/fetch/with-ths', json={'fs_type': 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['success'] is True
+        assert [s['count'] for s in data['steps']] == [3, 2]
+        assert [s['changed'] for s in data['steps']] == [3, 0]
+        assert all(s['elapsed_ms'] >= 250 for s in data['steps'])
+        assert data['elapsed_ms'] < 550
+        mock_save_em.assert_awaited_once()
+        mock_save_ths.assert_awaited_once()
+
+    @patch('python_cli_starter.main.FETCH_DEADLINE_SECONDS', 0.2)
+    @patch('python_cli_starter.main.save_ths_sectors')
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    @patch('python_cli_starter.main.market.fetch_ths_sectors')
+    @patch('python_cli_starter.main.market.fetch_eastmoney_batch')
+    def test_slow_source_hits_deadline(self, mock_em, mock_ths, mock_save_em, mock_save_ths):
+        """慢数据源超时被取消，快数据源照常入库"""
+        import asyncio
+
+        async def hanging_ths():
+            await asyncio.sleep(10)
+
+        mock_em.return_value = self._sectors(3)
+        mock_ths.side_effect = hanging_ths
+        mock_save_em.return_value = 3
+
+        response = client.post('/market/fetch/with-ths', json={'fs_type': 3})
+
+        data = response.json()
+        assert data['success'] is False
+        em_step, ths_step = data['steps']
+        assert em_step['name'] == '东方财富概念板块'
+        assert em_step['success'] is True
+        assert ths_step['success'] is False
+        assert '超时' in ths_step['message']
+        mock_save_em.assert_awaited_once()
+        assert mock_save_em.await_args.kwargs == {'fs_type': 3}
+        mock_save_ths.assert_not_awaited()
+
+
+class TestStartupJobs:
+    """启动时的抓取与映射重建"""
+
+    def test_mapping_rebuilt_after_startup_fetch(self):
+        import asyncio
+        from python_cli_starter.main import _startup_fetch
+        calls = []
+
+        async def seed_job():
+            calls.append('seed')
+            raise RuntimeError('数据库不可用')
+
+        async def fetch_job():
+            calls.append('fetch')
+            raise RuntimeError('上游不可用')
+
+        async def mapping_job():
+            calls.append('mapping')
+
+        asyncio.run(_startup_fetch(seed_job, fetch_job, mapping_job))
+        assert calls == ['seed', 'fetch', 'mapping']
+
+
+class TestEastMoneyUpload:
+    """东方财富流式上传测试"""
+
+    @staticmethod
+    def _page(start, count):
+        import json
+        diff = [{"f14": f"板块{i}", "f20": 1e10, "f8": 120, "f3": 100, "f6": 5e8} for i in range(start, start + count)]
+        return f"jQuery_1({json.dumps({'data': {'total': 300, 'diff': diff}}, ensure_ascii=False)});"
+
+    @patch('python_cli_starter.main.UPLOAD_BATCH_ROWS', 5)
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    def test_gzip_multi_page_upload(self, mock_save):
+        """gzip 压缩的多段 JSONP：逐页返回条数，并按批次入库"""
+        import gzip
+        mock_save.side_effect = lambda batch: len(batch)
+        body = gzip.compress("\n".join(self._page(i * 3, 3) for i in range(3)).encode("utf-8"))
+
+        response = client.post('/market/upload/eastmoney', content=body, headers={'Content-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['success'] is True
+        assert data['count'] == 9
+        assert data['changed'] == 9
+        assert [p['count'] for p in data['pages']] == [3, 3, 3]
+        # 累计满 5 行写一次，剩余 3 行在结束时写入
+        assert [len(c.args[0]) for c in mock_save.await_args_list] == [6, 3]
+
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    def test_bad_page_and_truncated_stream(self, mock_save):
+        """单页解析失败不影响其他页；数据截断时已解析的页照常保存"""
+        mock_save.side_effect = lambda batch: len(batch)
+        body = (self._page(0, 2) + '\n{"data": [}\n' + self._page(2, 2)[:-10]).encode("utf-8")
+
+        response = client.post('/market/upload/eastmoney', content=body)
+
+        data = response.json()
+        assert data['success'] is False
+        assert data['count'] == 2
+        assert [p['success'] for p in data['pages']] == [True, False]
+        assert '中途结束' in data['message']
+        mock_save.assert_awaited_once()
+
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    def test_fractional_page_rejected(self, mock_save):
+        """fltt=2 的小数数据整页拒绝，不取整入库"""
+        import json
+        mock_save.side_effect = lambda batch: len(batch)
+        diff = [{"f14": "半导体", "f20": 9918.67, "f8": 0.16, "f3": 1.23, "f6": 123.45}]
+        fractional = f"jQuery_1({json.dumps({'data': {'total': 1, 'diff': diff}}, ensure_ascii=False)});"
+        body = "\n".join([self._page(0, 2), fractional]).encode("utf-8")
+
+        data = client.post('/market/upload/eastmoney', content=body).json()
+
+        assert [p['success'] for p in data['pages']] == [True, False]
+        assert '小数' in data['pages'][1]['message'] and '半导体' in data['pages'][1]['message']
+        assert [len(c.args[0]) for c in mock_save.await_args_list] == [2]
+
+    def test_empty_upload(self):
+        response = client.post('/market/upload/eastmoney', content=b'not json')
+        data = response.json()
+        assert data['success'] is False
+        assert data['count'] == 0
+
+
+class TestSectorListCache:
+    """板块列表快照缓存测试"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        from python_cli_starter.cache import sector_cache
+        from python_cli_starter.main import sector_revalidation
+        sector_cache.clear()
+        sector_revalidation.until = None
+        yield
+        sector_cache.clear()
+        sector_revalidation.until = None
+
+    @staticmethod
+    def _ths_rows():
+        now = datetime.now()
+        return [
+            SimpleNamespace(
+                name='半导体', change_percent=1.5, net_inflow=3.2,
+                up_count=40, down_count=10, turnover_ratio=2.1,
+                date=now.date(), updated_at=now,
+            )
+        ]
+
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    def test_second_request_served_from_cache(self, mock_query):
+        """第二次请求直接命中缓存，不再查询数据库"""
+        mock_query.return_value = self._ths_rows()
+
+        first = client.get('/market/ths_sectors')
+        second = client.get('/market/ths_sectors')
+
+        assert first.status_code == 200
+        assert first.content == second.content
+        assert first.json()['count'] == 1
+        assert first.json()['sectors'][0]['name'] == '半导体'
+        assert mock_query.await_count == 1
+
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    def test_conditional_request(self, mock_query):
+        """携带 ETag 或 Last-Modified 的条件请求返回 304"""
+        mock_query.return_value = self._ths_rows()
+
+        first = client.get('/market/ths_sectors')
+        assert first.headers['cache-control'].startswith('private, max-age=')
+
+        by_etag = client.get('/market/ths_sectors', headers={'If-None-Match': first.headers['etag']})
+        by_date = client.get('/market/ths_sectors', headers={'If-Modified-Since': first.headers['last-modified']})
+        stale = client.get('/market/ths_sectors', headers={'If-None-Match': '"stale"'})
+
+        assert by_etag.status_code == 304
+        assert by_date.status_code == 304
+        assert stale.status_code == 200
+        assert stale.content == first.content
+
+    @patch('python_cli_starter.main.fetch_runs.record_runs')
+    @patch('python_cli_starter.main.save_ths_sectors')
+    @patch('python_cli_starter.main.save_eastmoney_sectors')
+    @patch('python_cli_starter.main.market.fetch_ths_sectors')
+    @patch('python_cli_starter.main.market.fetch_eastmoney_batch')
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    def test_manual_fetch_switches_to_no_cache(self, mock_query, mock_em, mock_ths, mock_save_em, mock_save_ths, _):
+        """手动抓取改变数据后，列表响应改为 no-cache，内置页面以 no-cache 模式请求列表"""
+        mock_query.return_value = self._ths_rows()
+        mock_em.return_value = [MagicMock()]
+        mock_ths.return_value = [MagicMock()]
+        mock_save_em.return_value = 0
+        mock_save_ths.return_value = 1
+
+        assert 'max-age=' in client.get('/market/ths_sectors').headers['cache-control']
+        assert client.post('/market/fetch/with-ths', json={'fs_type': 2}).status_code == 200
+        response = client.get('/market/ths_sectors')
+        assert response.headers['cache-control'] == 'private, no-cache'
+        assert 'etag' in response.headers
+
+        page = client.get('/').text
+        assert "fetch(`${path}?${params}`, { cache: 'no-cache' })" in page
+
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    def test_invalidate_forces_reload(self, mock_query):
+        """入库触发失效后，下一次请求重新查询数据库"""
+        from python_cli_starter.cache import sector_cache, THS_SECTORS
+        mock_query.return_value = self._ths_rows()
+
+        client.get('/market/ths_sectors')
+        sector_cache.invalidate(THS_SECTORS)
+        client.get('/market/ths_sectors')
+
+        assert mock_query.await_count == 2
+
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    @patch('python_cli_starter.main.get_today_eastmoney_sectors')
+    def test_sector_names(self, mock_em, mock_ths):
+        """板块名称列表合并两家数据源"""
+        mock_em.return_value = [SimpleNamespace(name='银行', updated_at=datetime.now())]
+        mock_ths.return_value = self._ths_rows()
+
+        response = client.get('/market/sector_names')
+
+        assert response.json() == {'东方财富': ['银行'], '同花顺': ['半导体']}
+
+    @patch('python_cli_starter.main.rolling_stats.load_sector_stats')
+    @patch('python_cli_starter.main.get_today_ths_sectors')
+    def test_with_stats(self, mock_query, mock_stats):
+        """with_stats=true 时附带 z-score 与百分位，且与普通列表分开缓存"""
+        from python_cli_starter.rolling_stats import RunningStats
+        history = RunningStats()
+        for v in [0.5, 1.0, 1.5]:
+            history.add(v)
+        mock_query.return_value = self._ths_rows()
+        mock_stats.return_value = {'半导体': {'change_percent': history}}
+
+        plain = client.get('/market/ths_sectors').json()
+        data = client.get('/market/ths_sectors', params={'with_stats': True}).json()
+
+        assert 'stats' not in plain['sectors'][0]
+        stats = data['sectors'][0]['stats']
+        assert stats['change_percent']['zscore'] == pytest.approx(1.0)
+        assert stats['change_percent']['n'] == 3
+        assert stats['net_inflow']['zscore'] is None
+
+    @patch('python_cli_starter.main.get_joined_sectors')
+    def test_joined_sectors(self, mock_query):
+        """合并接口每个板块一行，同时包含两家数据源的指标"""
+        now = datetime.now()
+        em = SimpleNamespace(
+            name='半导体', market_cap=1e12, market_cap_desc='10000.00 亿',
+            turnover_rate=150, turnover_rate_desc='1.50%',
+            change_percent=120, change_percent_desc='1.20%',
+            amount=5e10, amount_desc='500.00 亿', date=now.date(), updated_at=now,
+        )
+        mock_query.return_value = [(em, self._ths_rows()[0], 0.5714, 'ngram')]
+
+        data = client.get('/market/sectors/joined').json()
+
+        assert data['count'] == 1
+        row = data['sectors'][0]
+        assert row['eastmoney']['change_percent_desc'] == '1.20%'
+        assert row['ths']['net_inflow'] == 3.2
+        assert row['method'] == 'ngram'
+
+
+class TestSectorListQuery:
+    """板块列表筛选、排序与 keyset 分页测试"""
+
+    @staticmethod
+    def _rows(count):
+        now = datetime.now()
+        return [
+            SimpleNamespace(
+                id=100 + i, name=f'板块{i}', change_percent=5.0 - i, net_inflow=1.0,
+                up_count=10, down_count=5, turnover_ratio=1.0, date=now.date(), updated_at=now,
+            )
+            for i in range(count)
+        ]
+
+    @patch('python_cli_starter.main.query_sectors')
+    def test_first_page_returns_cursor(self, mock_query):
+        """多取一行判断是否有下一页，游标指向本页最后一行"""
+        rows = self._rows(3)
+        mock_query.return_value = (rows[0].date, 10, rows)
+
+        response = client.get('/market/ths_sectors', params={'q': '板块', 'limit': 2, 'min_value': 0})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 2
+        assert data['total'] == 10
+        assert data['next_cursor']
+        args = mock_query.await_args.args
+        assert args[:6] == ('ths', '板块', 'change_percent', True, 0.0, None)
+        assert args[6] is None
+        assert args[7] == 3
+
+    @patch('python_cli_starter.main.query_sectors')
+    def test_cursor_roundtrip(self, mock_query):
+        """next_cursor 原样传回后解码为 (日期, 排序值, id)"""
+        rows = self._rows(3)
+        mock_query.return_value = (rows[0].date, 3, rows)
+        cursor = client.get('/market/ths_sectors', params={'limit': 2}).json()['next_cursor']
+
+        mock_query.return_value = (rows[0].date, 3, rows[2:])
+        data = client.get('/market/ths_sectors', params={'limit': 2, 'cursor': cursor}).json()
+
+        assert mock_query.await_args.args[6] == (rows[0].date, 4.0, 101)
+        assert data['next_cursor'] is None
+        assert data['sectors'][0]['name'] == '板块2'
+
+    def test_dashboard_uses_server_side_search_and_paging(self):
+        """内置页面的搜索框与分页直接使用 q / limit / cursor 参数，不再下载全量列表后在浏览器中筛选"""
+        page = client.get('/').text
+        assert "params.set('q', query)" in page
+        assert "params.set('cursor', cursor)" in page
+        assert "new URLSearchParams({ limit: PAGE_SIZE })" in page
+        assert "'/market/df_sectors'" in page and "'/market/ths_sectors'" in page
+        assert '.filter(item => item.name' not in page
+
+    def test_invalid_cursor(self):
+        response = client.get('/market/ths_sectors', params={'cursor': 'not-a-cursor'})
+        assert response.status_code == 400
+
+    def test_invalid_sort_field(self):
+        response = client.get('/market/df_sectors', params={'sort_by': 'net_inflow'})
+        assert response.status_code == 422
+
+
+class TestSectorChangesAPI:
+    """增量变更接口测试"""
+
+    @patch('python_cli_starter.main.get_sector_changes')
+    def test_changes_since(self, mock_query):
+        now = datetime.now()
+        row = SimpleNamespace(
+            name='半导体', change_percent=1.5, net_inflow=3.2, up_count=40, down_count=10,
+            turnover_ratio=2.1, date=now.date(), updated_at=now,
+        )
+        mock_query.return_value = {'ths': [row]}
+
+        response = client.get('/market/changes', params={'since': '2026-01-01T09:30:00', 'source': 'ths'})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['eastmoney'] == []
+        assert data['ths'][0]['name'] == '半导体'
+        assert data['until'] == now.isoformat()
+        assert mock_query.await_args.args[1] == ('ths',)
+
+    @patch('python_cli_starter.main.get_sector_changes')
+    def test_aware_since_is_converted_to_local(self, mock_query):
+        """带时区的 since (如 toISOString() 的 ...Z) 换算为本地时间后再与不带时区的 updated_at 比较"""
+        mock_query.return_value = {'eastmoney': [], 'ths': []}
+        aware = datetime(2026, 1, 1, 1, 30, tzinfo=timezone.utc)
+
+        response = client.get('/market/changes', params={'since': '2026-01-01T01:30:00Z'})
+
+        assert response.status_code == 200
+        since = mock_query.await_args.args[0]
+        assert since.tzinfo is None
+        assert since == aware.astimezone().replace(tzinfo=None)
+        assert response.json()['until'] == since.isoformat()
+
+    @patch('python_cli_starter.main.get_sector_changes')
+    def test_sse_aware_last_event_id(self, mock_query):
+        """SSE 重连携带带时区的 Last-Event-ID 时同样换算为本地时间补发"""
+        from python_cli_starter import events
+        now = datetime.now()
+        row = SimpleNamespace(
+            name='半导体', change_percent=1.5, net_inflow=3.2, up_count=40, down_count=10,
+            turnover_ratio=2.1, date=now.date(), updated_at=now,
+        )
+        mock_query.return_value = {'eastmoney': [], 'ths': [row]}
+
+        async def closed(*args, **kwargs):
+            return
+            yield
+
+        with patch.object(events, 'stream', closed):
+            response = client.get('/market/stream', headers={'Last-Event-ID': '2026-01-01T01:30:00+00:00'})
+
+        assert response.status_code == 200
+        assert 'event: changes' in response.text
+        since = mock_query.await_args.args[0]
+        assert since.tzinfo is None
+        assert since == datetime(2026, 1, 1, 1, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+    @patch('python_cli_starter.main.get_sector_changes')
+    def test_no_changes_keeps_since(self, mock_query):
+        mock_query.return_value = {'eastmoney': [], 'ths': []}
+        data = client.get('/market/changes', params={'since': '2026-01-01T09:30:00'}).json()
+        assert data['until'] == '2026-01-01T09:30:00'
+
+
+class TestSectorSnapshotsAPI:
+    """板块盘中快照接口测试"""
+
+    @staticmethod
+    def _snapshot(captured_at, change_percent):
+        return SimpleNamespace(
+            captured_at=captured_at, fs_type=0, change_percent=change_percent,
+            market_cap=None, turnover_rate=None, amount=None,
+            net_inflow=2.5, up_count=30, down_count=12, turnover_ratio=1.8,
+        )
+
+    @patch('python_cli_starter.main.get_sector_intraday')
+    def test_intraday_path(self, mock_query):
+        mock_query.return_value = [
+            self._snapshot(datetime(2026, 3, 5, 11, 30), 1.2),
+            self._snapshot(datetime(2026, 3, 5, 14, 30), -0.4),
+        ]
+
+        response = client.get('/market/snapshots/半导体', params={'source': 'ths', 'day': '2026-03-05'})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 2
+        assert [p['change_percent'] for p in data['points']] == [1.2, -0.4]
+        assert data['points'][0]['market_cap'] is None
+        source, name, day, fs_type = mock_query.await_args.args
+        assert (source, name, day, fs_type) == (2, '半导体', date(2026, 3, 5), None)
+
+    @patch('python_cli_starter.main.get_market_snapshot')
+    def test_market_snapshot_at(self, mock_query):
+        mock_query.return_value = [('半导体', self._snapshot(datetime(2026, 3, 5, 11, 30), 1.2))]
+
+        response = client.get('/market/snapshots', params={'source': 'ths', 'at': '2026-03-05T11:45:00'})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 1
+        assert data['sectors'][0]['name'] == '半导体'
+        assert data['sectors'][0]['up_count'] == 30
+
+    def test_invalid_source(self):
+        response = client.get('/market/snapshots', params={'source': 'sina'})
+        assert response.status_code == 422
+
+
+class TestMarketBreadthAPI:
+    """市场宽度接口测试"""
+
+    @staticmethod
+    def _point(day, captured_at, advancers, decliners):
+        return SimpleNamespace(
+            date=day, captured_at=captured_at, advancers=advancers, decliners=decliners,
+            breadth_ratio=advancers / (advancers + decliners), net_inflow=12.5,
+            sectors_up=60, sectors_down=30, sector_count=90,
+        )
+
+    @patch('python_cli_starter.breadth.get_breadth')
+    def test_breadth(self, mock_query):
+        day = date(2026, 3, 5)
+        mock_query.return_value = (
+            [self._point(day, datetime(2026, 3, 5, 11, 30), 2000, 3000),
+             self._point(day, datetime(2026, 3, 5, 15, 0), 3000, 2000)],
+            [self._point(date(2026, 3, 4), datetime(2026, 3, 4, 15, 0), 1000, 4000),
+             self._point(day, datetime(2026, 3, 5, 15, 0), 3000, 2000)],
+        )
+
+        response = client.get('/market/breadth', params={'day': '2026-03-05', 'days': 7})
+
+        assert response.status_code == 200
+        mock_query.assert_awaited_once_with(day, 7)
+        data = response.json()
+        assert data['latest']['captured_at'] == '2026-03-05T15:00:00'
+        assert data['latest']['breadth_ratio'] == 0.6
+        assert [p['advancers'] for p in data['intraday']] == [2000, 3000]
+        assert [p['date'] for p in data['daily']] == ['2026-03-04', '2026-03-05']
+
+    @patch('python_cli_starter.breadth.get_breadth')
+    def test_no_data(self, mock_query):
+        mock_query.return_value = ([], [])
+        data = client.get('/market/breadth').json()
+        assert data == {'latest': None, 'intraday': [], 'daily': []}
+        mock_query.assert_awaited_once_with(None, 30)
+
+    def test_invalid_days(self):
+        assert client.get('/market/breadth', params={'days': 0}).status_code == 422
+
+
+class TestSectorHistoryAPI:
+    """板块历史走势接口测试"""
+
+    @staticmethod
+    def _rows(name):
+        return [
+            SimpleNamespace(name=name, date=date(2026, 3, 2), change_percent=1.0, net_inflow=2.0,
+                            up_count=10, down_count=5, turnover_ratio=1.1),
+            SimpleNamespace(name=name, date=date(2026, 3, 3), change_percent=-0.5, net_inflow=-1.0,
+                            up_count=4, down_count=11, turnover_ratio=0.9),
+        ]
+
+    @patch('python_cli_starter.main.get_sector_history')
+    def test_single_sector_history_is_columnar(self, mock_query):
+        mock_query.return_value = {'半导体': self._rows('半导体')}
+
+        response = client.get('/market/sectors/半导体/history', params={'source': 'ths', 'days': 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['dates'] == ['2026-03-02', '2026-03-03']
+        assert data['series']['change_percent'] == [1.0, -0.5]
+        assert data['series']['net_inflow'] == [2.0, -1.0]
+        assert mock_query.await_args.args == ('ths', ['半导体'], None, None, 2)
+
+    @patch('python_cli_starter.main.get_sector_history')
+    def test_multi_sector_history(self, mock_query):
+        mock_query.return_value = {'半导体': self._rows('半导体'), '银行': []}
+
+        response = client.get('/market/sectors/history', params=[
+            ('names', '半导体'), ('names', '银行'), ('names', '半导体'), ('source', 'ths'),
+        ])
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 2
+        assert data['sectors'][1]['dates'] == []
+        assert mock_query.await_args.args[1] == ['半导体', '银行']
+
+    def test_too_many_sectors(self):
+        params = [('names', f'板块{i}') for i in range(51)]
+        response = client.get('/market/sectors/history', params=params)
+        assert response.status_code == 400
+
+
+class TestRotationAPI:
+    """板块轮动接口测试"""
+
+    @staticmethod
+    def _row(ret_20, flow_streak):
+        fields = dict.fromkeys(schemas.SectorRotationInfo.model_fields)
+        fields.pop('name')
+        fields.pop('fs_type')
+        fields.update(ret_20=ret_20, flow_streak=flow_streak)
+        return SimpleNamespace(**fields)
+
+    @patch('python_cli_starter.main.rotation.get_latest_rotation')
+    def test_rotation_sorted_and_limited(self, mock_query):
+        mock_query.return_value = (date(2026, 3, 5), [
+            ('银行', None, self._row(1.5, 3)),
+            ('半导体', None, self._row(8.2, -2)),
+            ('白酒', None, self._row(None, 0)),
+        ])
+
+        response = client.get('/market/rotation', params={'sort_by': 'ret_20', 'limit': 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['date'] == '2026-03-05'
+        assert [s['name'] for s in data['sectors']] == ['半导体', '银行']
+
+    @patch('python_cli_starter.main.rotation.get_latest_rotation')
+    def test_rotation_by_board_type(self, mock_query):
+        mock_query.return_value = (date(2026, 3, 5), [('半导体', 2, self._row(8.2, None))])
+
+        response = client.get('/market/rotation', params={'source': 'eastmoney', 'fs_type': 2})
+
+        assert response.status_code == 200
+        assert response.json()['sectors'][0]['fs_type'] == 2
+        assert mock_query.await_args.args == ('eastmoney', None, 2)
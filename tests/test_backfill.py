@@ -0,0 +1,99 @@
+# tests/test_backfill.py
+"""历史抓取文件回填测试 (数据库写入以 mock 代替)"""
+import gzip
+import json
+import os
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+
+from python_cli_starter import backfill
+
+
+def write_capture(path, content: bytes, captured_at: datetime):
+    path.write_bytes(gzip.compress(content) if path.name.endswith(".gz") else content)
+    ts = captured_at.timestamp()
+    os.utime(path, (ts, ts))
+
+
+def eastmoney_page(items):
+    payload = {"data": {"total": len(items), "diff": items}}
+    return f"jQuery_1({json.dumps(payload, ensure_ascii=False)});"
+
+
+def ths_html(rows):
+    cells = "".join(
+        f"<tr><td>{i}</td><td>{name}</td><td>{change}%</td><td>1</td><td>{amount}</td><td>0.5</td><td>3</td><td>2</td></tr>"
+        for i, (name, change, amount) in enumerate(rows)
+    )
+    return f"<table><tbody>{cells}</tbody></table>".encode("utf-8")
+
+
+@pytest.fixture
+def captures(tmp_path):
+    day1 = datetime(2026, 9, 1, 15, 0)
+    day2 = datetime(2026, 9, 2, 15, 0)
+    em = lambda name, change: {"f14": name, "f20": 1e10, "f8": 120, "f3": change, "f6": 5e8}
+    write_capture(tmp_path / "em_0901_1130.jsonp", eastmoney_page([em("半导体", 100), em("银行", -20)]).encode(), day1.replace(hour=11))
+    # 同一天更晚的抓取覆盖早先的值；多页 NDJSON + gzip
+    ndjson = "\n".join([eastmoney_page([em("半导体", 150)]), eastmoney_page([em("证券", 30)])])
+    (tmp_path / "sub").mkdir()
+    write_capture(tmp_path / "sub" / "em_0901_1500.json.gz", ndjson.encode(), day1)
+    write_capture(tmp_path / "em_0902.txt", eastmoney_page([em("半导体", -50)]).encode(), day2)
+    write_capture(tmp_path / "ths_0901.html", ths_html([("半导体", 1.5, 300), ("银行", -0.2, 100)]), day1)
+    write_capture(tmp_path / "broken.jsonp", b'cb({"data": {"diff": [', day2)
+    write_capture(tmp_path / "notes.md", b"ignored", day2)
+    return tmp_path
+
+
+class TestBackfill:
+
+    def test_discover_orders_by_mtime(self, captures):
+        found = backfill.discover_captures(str(captures))
+        assert [os.path.basename(c.path) for c in found] == [
+            "em_0901_1130.jsonp", "em_0901_1500.json.gz", "ths_0901.html", "broken.jsonp", "em_0902.txt",
+        ]
+        assert [c.source for c in found] == ["eastmoney", "eastmoney", "ths", "eastmoney", "eastmoney"]
+
+    @pytest.mark.asyncio
+    async def test_run_backfill_latest_capture_wins(self, captures):
+        loaded = {}
+
+        async def fake_load(source, records):
+            loaded.setdefault(source, []).extend(records)
+            return len(records)
+
+        with patch.object(backfill, "bulk_load", side_effect=fake_load):
+            result = await backfill.run_backfill(str(captures), workers=0, batch_rows=1)
+
+        assert result.files == 5
+        assert result.failed == 1
+        assert result.written == 6
+        em = {(r[0], r[1]): r for r in loaded["eastmoney"]}
+        assert set(em) == {
+            (date(2026, 9, 1), "半导体"), (date(2026, 9, 1), "银行"), (date(2026, 9, 1), "证券"),
+            (date(2026, 9, 2), "半导体"),
+        }
+        # 列顺序: date, name, market_cap, turnover_rate, change_percent, amount, updated_at
+        assert em[(date(2026, 9, 1), "半导体")][4] == 150
+        assert em[(date(2026, 9, 1), "银行")][6] == datetime(2026, 9, 1, 15, 0)
+        ths = {r[1]: r for r in loaded["ths"]}
+        assert ths["半导体"][6] == 75.0  # 成交额占比 300 / 400
+        assert ths["银行"][0] == date(2026, 9, 1)
+
+    @pytest.mark.asyncio
+    async def test_process_pool_dry_run(self, captures):
+        with patch.object(backfill, "bulk_load") as mock_load:
+            result = await backfill.run_backfill(str(captures), workers=2, dry_run=True)
+        assert result.rows == 7
+        assert result.written == 0
+        mock_load.assert_not_called()
+
+    def test_fractional_capture_fails(self, tmp_path):
+        """含小数的东方财富抓取 (fltt=2) 整个文件记为失败"""
+        path = tmp_path / "em_fltt2.jsonp"
+        write_capture(path, eastmoney_page([{"f14": "半导体", "f20": 9918.67, "f8": 0.16, "f3": 1.23, "f6": 123.45}]).encode(), datetime(2026, 9, 1, 15))
+        capture = backfill.discover_captures(str(tmp_path))[0]
+        _, rows, error = backfill.parse_capture(capture)
+        assert rows == [] and "小数" in error
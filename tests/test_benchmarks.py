@@ -0,0 +1,67 @@
+# tests/test_benchmarks.py
+"""基准测试套件的结果对比与快速运行测试"""
+import json
+
+import pytest
+
+from benchmarks import suite
+from benchmarks.generators import eastmoney_payload, nav_frame
+from python_cli_starter import market
+
+
+def report(**medians):
+    return {"environment": {}, "results": {name: {"median": ms} for name, ms in medians.items()}}
+
+
+class TestCompare:
+    """结果对比测试"""
+
+    def test_flags_regression_beyond_threshold(self):
+        rows = suite.compare_results(report(a=10.0, b=10.0), report(a=10.5, b=12.0), threshold=0.10)
+        assert [(r.name, r.regressed) for r in rows] == [("a", False), ("b", True)]
+        assert rows[1].ratio == pytest.approx(1.2)
+
+    def test_ignores_cases_missing_from_either_side(self):
+        rows = suite.compare_results(report(a=1.0, old=1.0), report(a=1.0, new=5.0))
+        assert [r.name for r in rows] == ["a"]
+
+    def test_compare_command_exit_code(self, tmp_path, capsys):
+        base, cur = tmp_path / "base.json", tmp_path / "cur.json"
+        base.write_text(json.dumps(report(a=1.0)))
+        cur.write_text(json.dumps(report(a=2.0)))
+        with pytest.raises(SystemExit) as exc:
+            suite.main(["compare", str(base), str(cur)])
+        assert exc.value.code == 1
+        assert "退化" in capsys.readouterr().out
+
+        cur.write_text(json.dumps(report(a=0.5)))
+        with pytest.raises(SystemExit) as exc:
+            suite.main(["compare", str(base), str(cur)])
+        assert exc.value.code == 0
+
+
+class TestSuite:
+    """套件运行测试"""
+
+    def test_generators_are_deterministic(self):
+        assert eastmoney_payload(50) == eastmoney_payload(50)
+        assert len(market.parse_eastmoney_batch(eastmoney_payload(50))) == 50
+        frame = nav_frame(1)
+        assert frame.index.name == "净值日期" and len(frame) > 200
+
+    def test_filtered_run_writes_json(self, tmp_path, monkeypatch):
+        def measure_once(func, rounds):
+            func()
+            return {"min": 1.0, "median": 1.0, "stdev": 0.0}
+
+        monkeypatch.setattr(suite, "measure", measure_once)
+        output = tmp_path / "results.json"
+        suite.main(["run", "--filter", "parse_eastmoney", "--output", str(output)])
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert set(results["results"]) == {"market.parse_eastmoney_jsonp", "market.parse_eastmoney_batch"}
+        assert results["environment"]["python"]
+
+    def test_db_cases_skipped_without_flag(self, monkeypatch):
+        monkeypatch.setattr(suite, "measure", lambda func, rounds: {"median": 1.0})
+        results = suite.run_suite(name_filter="database")
+        assert results["results"] == {}
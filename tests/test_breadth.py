@@ -0,0 +1,38 @@
+# tests/test_breadth.py
+"""市场宽度增量汇总单元测试"""
+from datetime import date
+
+from python_cli_starter.breadth import BreadthAccumulator
+
+
+class TestBreadthAccumulator:
+    """增量汇总测试"""
+
+    def test_totals(self):
+        acc = BreadthAccumulator(date(2026, 3, 5))
+        acc.apply("半导体", (40, 10, 5.5, 1.2))
+        acc.apply("银行", (5, 30, -2.0, -0.8))
+        acc.apply("白酒", (10, 10, 0.0, 0.0))
+        totals = acc.totals()
+        assert totals["advancers"] == 55
+        assert totals["decliners"] == 50
+        assert totals["breadth_ratio"] == round(55 / 105, 4)
+        assert totals["net_inflow"] == 3.5
+        assert (totals["sectors_up"], totals["sectors_down"], totals["sector_count"]) == (1, 1, 3)
+
+    def test_update_replaces_previous_contribution(self):
+        """同一板块再次更新时，先扣除旧值再累加新值，结果与全量重算一致"""
+        acc = BreadthAccumulator(date(2026, 3, 5))
+        acc.apply("半导体", (40, 10, 5.5, 1.2))
+        acc.apply("银行", (5, 30, -2.0, -0.8))
+        acc.apply("银行", (25, 10, 1.0, 0.3))
+
+        full = BreadthAccumulator(date(2026, 3, 5))
+        full.apply("半导体", (40, 10, 5.5, 1.2))
+        full.apply("银行", (25, 10, 1.0, 0.3))
+
+        assert acc.totals() == full.totals()
+        assert acc.totals()["sectors_down"] == 0
+
+    def test_empty(self):
+        assert BreadthAccumulator(date(2026, 3, 5)).totals()["breadth_ratio"] is None
@@ -0,0 +1,27 @@
+# tests/test_cache.py
+"""快照缓存单元测试"""
+from python_cli_starter.cache import SnapshotCache
+
+
+class TestSnapshotCache:
+    """进程内快照缓存测试"""
+
+    def test_put_and_get(self):
+        cache = SnapshotCache()
+        assert cache.get("k") is None
+        assert cache.put("k", b"{}", cache.generation("k"))
+        assert cache.get("k") == b"{}"
+
+    def test_invalidate_drops_entry(self):
+        cache = SnapshotCache()
+        cache.put("k", b"old", cache.generation("k"))
+        cache.invalidate("k")
+        assert cache.get("k") is None
+
+    def test_stale_put_is_rejected(self):
+        """读取数据库期间发生了失效，旧数据不能写回缓存"""
+        cache = SnapshotCache()
+        generation = cache.generation("k")
+        cache.invalidate("k")
+        assert not cache.put("k", b"stale", generation)
+        assert cache.get("k") is None
@@ -0,0 +1,291 @@
+# tests/test_database.py
+"""数据库层纯逻辑单元测试 (不依赖真实数据库连接)"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from python_cli_starter import database
+from python_cli_starter.schemas import ThsSectorInfo
+
+
+def make_ths(name, change_percent, net_inflow=1.0):
+    now = datetime.now()
+    return ThsSectorInfo(
+        name=name, change_percent=change_percent, net_inflow=net_inflow,
+        up_count=10, down_count=5, turnover_ratio=1.2, date=now.date(), updated_at=now,
+    )
+
+
+class TestChangeDetection:
+    """板块数据变更检测测试"""
+
+    def test_first_batch_is_all_changed(self):
+        batch = [make_ths("半导体", 1.5), make_ths("银行", -0.3)]
+        changed, current = database.diff_changed_rows(batch, database.THS_VALUE_FIELDS, {})
+        assert [s.name for s in changed] == ["半导体", "银行"]
+        assert set(current) == {"半导体", "银行"}
+
+    def test_only_changed_rows_are_returned(self):
+        batch = [make_ths("半导体", 1.5), make_ths("银行", -0.3)]
+        _, previous = database.diff_changed_rows(batch, database.THS_VALUE_FIELDS, {})
+
+        next_batch = [make_ths("半导体", 1.5), make_ths("银行", -0.1), make_ths("白酒", 0.2)]
+        changed, _ = database.diff_changed_rows(next_batch, database.THS_VALUE_FIELDS, previous)
+        assert [s.name for s in changed] == ["银行", "白酒"]
+
+    def test_fingerprint_ignores_timestamps(self):
+        a = make_ths("半导体", 1.5)
+        b = a.model_copy(update={"updated_at": datetime(2030, 1, 1)})
+        fields = database.THS_VALUE_FIELDS
+        assert database.row_fingerprint(getattr(a, f) for f in fields) == \
+            database.row_fingerprint(getattr(b, f) for f in fields)
+
+    def test_fingerprint_matches_integer_storage(self):
+        """库中按整数存储的东方财富数值，重建的指纹与抓取到的浮点值一致"""
+        assert database.row_fingerprint([250.0, 1e10, 1.5]) == database.row_fingerprint([250, 10000000000, 1.5])
+
+
+class TestCompactEastMoneyRow:
+    """东方财富板块表紧凑存储测试"""
+
+    def test_no_desc_columns(self):
+        columns = set(database.EastMoneySector.__table__.columns.keys())
+        assert not {c for c in columns if c.endswith("_desc")}
+
+    def test_serialization_is_unchanged(self):
+        """从整数列读取的行，序列化结果与原先存储格式化字符串时逐字节一致"""
+        from types import SimpleNamespace
+        from python_cli_starter.schemas import SectorInfo
+        now = datetime(2026, 10, 19, 14, 30)
+        row = SimpleNamespace(
+            name="半导体", market_cap=9918673000000, turnover_rate=16, change_percent=-125,
+            amount=12345678901, date=now.date(), updated_at=now,
+        )
+        expected = (
+            '{"name":"半导体","market_cap":9918673000000.0,"market_cap_desc":"99186.73 亿",'
+            '"turnover_rate":16.0,"turnover_rate_desc":"0.16%","change_percent":-125.0,'
+            '"change_percent_desc":"-1.25%","amount":12345678901.0,"amount_desc":"123.46 亿",'
+            '"date":"2026-10-19","updated_at":"2026-10-19T14:30:00"}'
+        )
+        assert SectorInfo.model_validate(row).model_dump_json() == expected
+
+
+class TestSectorHistoryQuery:
+    """板块历史查询测试"""
+
+    @staticmethod
+    def _covering_columns(model, index_name):
+        index = next(i for i in model.__table__.indexes if i.name == index_name)
+        key_columns = {c.name for c in index.columns}
+        return key_columns | set(index.dialect_options['postgresql']['include'])
+
+    def test_query_is_covered_by_index(self):
+        """查询引用的列必须全部包含在 (name, date) 覆盖索引中，才能走 index-only scan"""
+        from datetime import date
+        for source, index_name in [
+            ("eastmoney", "ix_eastmoney_sectors_name_date"),
+            ("ths", "ix_ths_sectors_name_date"),
+        ]:
+            model, _ = database.SECTOR_HISTORY_SOURCES[source]
+            stmt = database.build_sector_history_query(source, ["半导体", "银行"], date(2026, 1, 1), None, 60)
+            referenced = {c.name for c in stmt.selected_columns}
+            assert referenced <= self._covering_columns(model, index_name)
+
+    def test_explain_binds_names_as_parameters(self):
+        """EXPLAIN 包装后的语句中板块名称仍是绑定参数，不拼接进 SQL 文本"""
+        from sqlalchemy.dialects.postgresql import asyncpg
+        names = ["半导体", "x'); DROP TABLE ths_sectors; --"]
+        stmt = database.build_sector_history_query("ths", names, None, None, 20)
+        compiled = database.ExplainAnalyze(stmt).compile(dialect=asyncpg.dialect())
+        assert compiled.string.startswith("EXPLAIN (ANALYZE, BUFFERS) SELECT")
+        assert "DROP" not in compiled.string and "半导体" not in compiled.string
+        assert [v for k, v in compiled.params.items() if k.startswith("name")] == names
+
+    def test_explain_sector_history(self):
+        executed = []
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def execute(self, stmt):
+                executed.append(stmt)
+                result = MagicMock()
+                result.all.return_value = [("Append",), ("  ->  Index Only Scan using ths_sectors_2026_03_name_date_idx",)]
+                return result
+
+        with patch.object(database, "AsyncSessionLocal", Session):
+            plan = asyncio.run(database.explain_sector_history("ths", ["半导体"], days=20))
+        assert "Index Only Scan" in plan.splitlines()[1]
+        assert isinstance(executed[0], database.ExplainAnalyze)
+
+    def test_one_branch_per_sector(self):
+        from sqlalchemy.dialects import postgresql
+        stmt = database.build_sector_history_query("ths", ["半导体", "银行", "白酒"], None, None, 20)
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        assert sql.count("UNION ALL") == 2
+        assert sql.count("ORDER BY ths_sectors.date DESC") == 3
+
+
+class FakeDatabase:
+    """模拟 Postgres 的事务级 advisory 锁：记录每批写入的 updated_at 与实际提交顺序"""
+
+    def __init__(self, insert_delays, stored=None):
+        self.lock = asyncio.Lock()
+        self.insert_delays = insert_delays  # {表名: 插入耗时 (秒)}
+        self.stored = stored or []  # 查询当天已保存行时返回的 (name, *数值字段)
+        self.commits = []  # [(表名, updated_at)]，按提交顺序
+
+    def session(self):
+        db = self
+
+        class Session:
+            held = False
+
+            def __init__(self):
+                self.pending = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                self._release()
+
+            def _release(self):
+                if self.held:
+                    self.held = False
+                    db.lock.release()
+
+            async def execute(self, stmt, params=None):
+                if "pg_advisory_xact_lock" in str(stmt):
+                    await db.lock.acquire()
+                    self.held = True
+                elif isinstance(params, list) and params and "updated_at" in params[0]:
+                    await asyncio.sleep(db.insert_delays.get(stmt.table.name, 0))
+                    self.pending.append((stmt.table.name, params[0]["updated_at"]))
+                result = MagicMock()
+                result.all.return_value = db.stored if getattr(stmt, "is_select", False) else []
+                return result
+
+            async def commit(self):
+                db.commits.extend(self.pending)
+                self._release()
+
+        return Session()
+
+
+class TestConcurrentSaves:
+    """并发入库时 updated_at 与提交顺序一致，增量拉取不会漏行"""
+
+    def test_interleaved_saves_commit_in_timestamp_order(self):
+        today = datetime.now().date()
+        em = [SimpleNamespace(name="半导体", market_cap=1e10, turnover_rate=120, change_percent=100, amount=5e8)]
+        ths = [make_ths("银行", -0.3)]
+        # 东方财富先开始保存但写入较慢，同花顺随后开始、写入很快
+        db = FakeDatabase({"eastmoney_sectors": 0.1})
+
+        async def run():
+            em_save = asyncio.create_task(database.save_eastmoney_sectors(em, fs_type=3))
+            await asyncio.sleep(0.01)
+            await asyncio.gather(em_save, database.save_ths_sectors(ths))
+
+        with patch.object(database, "AsyncSessionLocal", db.session), \
+                patch.object(database, "_append_snapshots", new=AsyncMock()), \
+                patch.object(database, "_save_listeners", []), \
+                patch.dict(database._fingerprints, clear=True):
+            asyncio.run(run())
+
+        assert [table for table, _ in db.commits] == ["eastmoney_sectors", "ths_sectors"]
+        # 只看到第一批提交时 until 取其 updated_at，第二批的时间戳严格更晚，下一次 since=until 仍能拿到
+        (_, first), (_, second) = db.commits
+        assert first < second and first.date() == today
+
+
+class TestFingerprintScope:
+    """指纹按 (source, date) 共享，与表的主键一致"""
+
+    def test_upload_then_scheduled_fetch_with_old_values(self):
+        def board(change_percent):
+            return [SimpleNamespace(name="半导体", market_cap=1e10, turnover_rate=120, change_percent=change_percent, amount=5e8)]
+
+        async def run():
+            return [
+                await database.save_eastmoney_sectors(board(100), fs_type=2),
+                await database.save_eastmoney_sectors(board(250)),  # 上传覆盖了该板块
+                await database.save_eastmoney_sectors(board(100), fs_type=2),  # 定时抓取仍是旧值
+            ]
+
+        with patch.object(database, "AsyncSessionLocal", FakeDatabase({}).session), \
+                patch.object(database, "_append_snapshots", new=AsyncMock()), \
+                patch.object(database, "_save_listeners", []), \
+                patch.dict(database._fingerprints, clear=True):
+            assert asyncio.run(run()) == [1, 1, 1]
+            assert list(database._fingerprints) == [("eastmoney", datetime.now().date())]
+
+    def test_restart_then_industry_then_concept(self):
+        """重启后先保存行业板块 (fs_type=2)、再保存概念板块 (fs_type=3)，数值未变的概念板块不应被重写"""
+        stored = [("半导体", 10000000000, 120, 100, 500000000), ("芯片概念", 20000000000, 80, -50, 700000000)]
+
+        def board(name, market_cap, turnover_rate, change_percent, amount):
+            return [SimpleNamespace(name=name, market_cap=float(market_cap), turnover_rate=float(turnover_rate),
+                                    change_percent=float(change_percent), amount=float(amount))]
+
+        async def run():
+            return [
+                await database.save_eastmoney_sectors(board(*stored[0]), fs_type=2),
+                await database.save_eastmoney_sectors(board(*stored[1]), fs_type=3),
+            ]
+
+        with patch.object(database, "AsyncSessionLocal", FakeDatabase({}, stored).session), \
+                patch.object(database, "_append_snapshots", new=AsyncMock()), \
+                patch.object(database, "_save_listeners", []), \
+                patch.dict(database._fingerprints, clear=True):
+            assert asyncio.run(run()) == [0, 0]
+            assert set(database._fingerprints[("eastmoney", datetime.now().date())]) == {"半导体", "芯片概念"}
+
+    def test_forget_fingerprints(self):
+        day = datetime.now().date()
+        with patch.dict(database._fingerprints, {("ths", day): {"银行": "x"}, ("eastmoney", day): {}}, clear=True):
+            database.forget_fingerprints("ths", [day])
+            assert list(database._fingerprints) == [("eastmoney", day)]
+
+
+class TestSectorDimFsType:
+    """维度表记录东方财富板块类型，供轮动分析按类型分组排名"""
+
+    def test_fs_type_written_once_per_process(self):
+        statements = []
+
+        class Session:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                pass
+
+            async def execute(self, stmt, params=None):
+                statements.append((stmt, params))
+                result = MagicMock()
+                result.all.return_value = [("半导体", 7)]
+                return result
+
+            async def commit(self):
+                pass
+
+        async def run():
+            await database.get_sector_ids(1, ["半导体"], 2)
+            await database.get_sector_ids(1, ["半导体"], 2)
+
+        with patch.object(database, "AsyncSessionLocal", Session), \
+                patch.dict(database._sector_ids, clear=True), \
+                patch.dict(database._sector_fs_types, clear=True):
+            asyncio.run(run())
+            assert database._sector_ids == {(1, "半导体"): 7}
+
+        inserted, selected, updated = statements  # 第二次调用命中缓存，不再访问数据库
+        assert inserted[1] == [{"source": 1, "name": "半导体", "fs_type": 2}]
+        assert updated[0].table.name == "sector_dim" and "fs_type" in str(updated[0])
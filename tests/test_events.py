@@ -0,0 +1,108 @@
+# tests/test_events.py
+"""板块变更推送 (SSE) 单元测试"""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from python_cli_starter import events
+from python_cli_starter.schemas import ThsSectorInfo
+
+
+def make_ths(name, change):
+    return ThsSectorInfo(
+        name=name, change_percent=change, net_inflow=1.0, up_count=10, down_count=5,
+        turnover_ratio=1.0, date=datetime(2026, 1, 1).date(), updated_at=datetime(2026, 1, 1),
+    )
+
+
+class TestFormatSse:
+    """SSE 消息格式测试"""
+
+    def test_format(self):
+        assert events.format_sse("sectors", '{"a":1}', "id1") == b'id: id1\nevent: sectors\ndata: {"a":1}\n\n'
+
+    def test_multiline_data(self):
+        assert events.format_sse("x", "a\nb") == b"event: x\ndata: a\ndata: b\n\n"
+
+
+class TestBroadcaster:
+    """广播与慢消费者处理测试"""
+
+    @pytest.mark.asyncio
+    async def test_publish_to_all_subscribers(self):
+        broadcaster = events.ChangeBroadcaster()
+        q1, q2 = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.publish(b"m")
+        assert q1.get_nowait() == b"m"
+        assert q2.get_nowait() == b"m"
+        broadcaster.unsubscribe(q1)
+        assert broadcaster.subscriber_count == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_gets_resync(self):
+        broadcaster = events.ChangeBroadcaster(queue_size=3)
+        queue = broadcaster.subscribe()
+        for i in range(4):
+            broadcaster.publish(f"m{i}".encode())
+        assert queue.get_nowait() == events.RESYNC_MESSAGE
+        assert queue.get_nowait() == b"m3"
+        assert queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_stream_heartbeat_and_close(self):
+        broadcaster = events.ChangeBroadcaster()
+        queue = broadcaster.subscribe()
+
+        async def connected():
+            return False
+
+        received = []
+
+        async def consume():
+            async for message in events.stream(queue, connected, heartbeat=0.01):
+                received.append(message)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.03)
+        broadcaster.publish(b"data")
+        await asyncio.sleep(0.01)
+        broadcaster.close()
+        await asyncio.wait_for(task, 1)
+        assert b": keep-alive\n\n" in received
+        assert b"data" in received
+
+
+class TestChangeEvent:
+    """入库事件转换测试"""
+
+    @pytest.mark.asyncio
+    async def test_on_sectors_saved_broadcasts_once(self, monkeypatch):
+        broadcaster = events.ChangeBroadcaster()
+        monkeypatch.setattr(events, "broadcaster", broadcaster)
+        q1, q2 = broadcaster.subscribe(), broadcaster.subscribe()
+        captured_at = datetime(2026, 10, 19, 14, 30)
+
+        await events.on_sectors_saved("ths", None, [make_ths("半导体", 1.5)], captured_at)
+
+        message = q1.get_nowait()
+        assert message is q2.get_nowait()
+        data = json.loads(message.decode().split("data: ", 1)[1])
+        assert data["source"] == "ths"
+        assert data["eastmoney"] == []
+        assert data["ths"][0]["name"] == "半导体"
+        assert data["ths"][0]["updated_at"] == "2026-10-19T14:30:00"
+        assert data["ths"][0]["date"] == "2026-10-19"
+
+    @pytest.mark.asyncio
+    async def test_no_subscribers_skips_serialization(self, monkeypatch):
+        broadcaster = events.ChangeBroadcaster()
+        monkeypatch.setattr(events, "broadcaster", broadcaster)
+        monkeypatch.setattr(events, "build_change_event", None)  # 若被调用会抛出 TypeError
+        await events.on_sectors_saved("ths", None, [make_ths("半导体", 1.5)], datetime.now())
+
+    def test_broadcast_registered_before_derived_listeners(self):
+        """入库监听者依次执行，SSE 推送排在最前，不等待轮动、宽度等衍生计算"""
+        from python_cli_starter.main import SAVE_LISTENERS
+        assert SAVE_LISTENERS[0] is events.on_sectors_saved
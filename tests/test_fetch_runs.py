@@ -0,0 +1,120 @@
+# tests/test_fetch_runs.py
+"""抓取运行记录测试"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from python_cli_starter import fetch_runs, tracing
+from python_cli_starter.main import FetchStep, app, run_fetch_pipelines
+
+
+def make_span(name, started_at, duration_ms, **attributes):
+    span = tracing.Span(name, None, attributes)
+    span.started_at = started_at
+    span.duration_ms = duration_ms
+    return span
+
+
+class TestSummarizeSpans:
+    """由 span 汇总页数与阶段耗时"""
+
+    def test_stages_pages_and_bytes(self):
+        t0 = datetime(2026, 10, 19, 11, 30)
+        spans = [
+            make_span("playwright.launch", t0, 800.0),
+            make_span("eastmoney.cookie_wait", t0, 1200.0),
+            make_span("eastmoney.page", t0 + timedelta(seconds=2), 300.0, page=1, retries=0, bytes=1000),
+            make_span("eastmoney.page", t0 + timedelta(seconds=2.1), 500.0, page=2, retries=2, bytes=2000),
+            make_span("eastmoney.decode", t0, 5.0),
+            make_span("eastmoney.parse", t0, 10.0, rows=200),
+            make_span("eastmoney.fetch", t0, 2700.0),
+            make_span("db.save_eastmoney_sectors", t0, 40.0),
+            make_span("unrelated", t0, 99.0),
+        ]
+        summary = fetch_runs.summarize_spans(spans)
+        assert summary["pages"] == 2 and summary["retries"] == 2 and summary["bytes"] == 3000
+        assert summary["stages"] == {
+            "playwright_launch": 800.0,
+            "cookie_wait": 1200.0,
+            "parse": 15.0,
+            "fetch": 2700.0,
+            "save": 40.0,
+            "pages": 600.0,  # 第 1 页开始到第 2 页结束
+        }
+
+    def test_no_spans(self):
+        assert fetch_runs.summarize_spans([]) == {"pages": 0, "retries": 0, "bytes": 0, "stages": {}}
+
+    def test_summarize_runs_percentiles(self):
+        summary = fetch_runs.summarize_runs([100.0, 200.0, 300.0], ["success", "failed", "success"], 50, 3)
+        assert summary["count"] == 3 and summary["success_count"] == 2
+        assert summary["p50_duration_ms"] == 200.0 and summary["max_duration_ms"] == 300.0
+        assert fetch_runs.summarize_runs([], [], 0, 0) == {"count": 0, "success_count": 0, "total_rows_fetched": 0, "total_retries": 0}
+
+
+class TestPipelineRecording:
+    """流水线结束后按数据源写入运行记录"""
+
+    @pytest.mark.asyncio
+    async def test_records_each_source(self):
+        async def fetch_em():
+            with tracing.span("eastmoney.page", page=1, retries=1, bytes=512):
+                pass
+            return [1, 2, 3]
+
+        async def save_em(rows):
+            with tracing.span("db.save_eastmoney_sectors"):
+                return 2
+
+        async def hanging():
+            await asyncio.sleep(10)
+
+        with patch.object(fetch_runs, "record_runs", new=AsyncMock()) as record:
+            results = await run_fetch_pipelines([
+                FetchStep("东方财富行业板块", fetch_em, save_em, "eastmoney", 2),
+                FetchStep("同花顺板块", hanging, save_em, "ths"),
+                ("无来源", fetch_em, save_em),
+            ], deadline=0.2, trigger="scheduled")
+
+        assert [r.status for r in results] == ["success", "timeout", "success"]
+        runs = record.await_args.args[0]
+        assert len(runs) == 2  # 未设置 source 的流水线不记录
+        em, ths = runs
+        assert (em["source"], em["fs_type"], em["trigger"], em["status"]) == ("eastmoney", 2, "scheduled", "success")
+        assert (em["rows_fetched"], em["rows_changed"], em["pages"], em["retries"], em["bytes"]) == (3, 2, 1, 1, 512)
+        assert set(em["stages"]) == {"pages", "save"} and em["error"] is None
+        assert (ths["source"], ths["fs_type"], ths["status"]) == ("ths", 0, "timeout")
+        assert "超时" in ths["error"] and ths["finished_at"] >= ths["started_at"]
+
+
+class TestFetchRunsEndpoint:
+    """GET /market/fetch_runs"""
+
+    def test_list_with_summary(self):
+        t0 = datetime(2026, 10, 19, 11, 30)
+        rows = [
+            SimpleNamespace(
+                id=i, source="ths", fs_type=0, trigger="scheduled", status=status,
+                started_at=t0, finished_at=t0 + timedelta(milliseconds=ms), pages=5,
+                rows_fetched=400, rows_changed=10, retries=i, bytes=10_000,
+                stages={"pages": ms - 100.0}, error=None,
+            )
+            for i, (status, ms) in enumerate([("success", 1000), ("success", 3000), ("failed", 2000)])
+        ]
+        with patch.object(fetch_runs, "get_runs", new=AsyncMock(return_value=rows)) as get_runs:
+            response = TestClient(app).get("/market/fetch_runs", params={"source": "ths", "status": "success", "limit": 10})
+
+        assert response.status_code == 200
+        get_runs.assert_awaited_once_with("ths", None, "success", None, None, 10)
+        data = response.json()
+        assert [r["duration_ms"] for r in data["runs"]] == [1000.0, 3000.0, 2000.0]
+        assert data["summary"]["count"] == 3 and data["summary"]["success_count"] == 2
+        assert data["summary"]["p50_duration_ms"] == 2000.0 and data["summary"]["max_duration_ms"] == 3000.0
+        assert data["summary"]["total_rows_fetched"] == 1200 and data["summary"]["total_retries"] == 3
+
+    def test_invalid_status(self):
+        assert TestClient(app).get("/market/fetch_runs", params={"status": "bogus"}).status_code == 422
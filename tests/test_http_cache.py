@@ -0,0 +1,69 @@
+# tests/test_http_cache.py
+"""HTTP 条件缓存单元测试"""
+from datetime import datetime, time, timezone
+
+from python_cli_starter import http_cache
+
+
+class TestConditional:
+    """条件请求判断测试"""
+
+    def test_if_none_match(self):
+        etag = http_cache.make_etag("k", 1)
+        assert http_cache.is_not_modified({"if-none-match": etag}, etag, None)
+        assert http_cache.is_not_modified({"if-none-match": f'"x", W/{etag}'}, etag, None)
+        assert http_cache.is_not_modified({"if-none-match": "*"}, etag, None)
+        assert not http_cache.is_not_modified({"if-none-match": '"other"'}, etag, None)
+
+    def test_if_none_match_takes_precedence(self):
+        modified = datetime(2026, 10, 19, 14, 30)
+        headers = {"if-none-match": '"other"', "if-modified-since": http_cache.http_date(modified)}
+        assert not http_cache.is_not_modified(headers, '"etag"', modified)
+
+    def test_if_modified_since(self):
+        modified = datetime(2026, 10, 19, 14, 30, 5, 123456)
+        header = http_cache.http_date(modified)
+        assert http_cache.is_not_modified({"if-modified-since": header}, '"e"', modified)
+        later = datetime(2026, 10, 19, 14, 30, 6)
+        assert not http_cache.is_not_modified({"if-modified-since": header}, '"e"', later)
+        assert not http_cache.is_not_modified({"if-modified-since": "garbage"}, '"e"', modified)
+
+    def test_http_date_is_gmt(self):
+        dt = datetime(2026, 10, 19, 6, 0, tzinfo=timezone.utc)
+        assert http_cache.http_date(dt) == "Mon, 19 Oct 2026 06:00:00 GMT"
+
+
+class TestMaxAge:
+    """距离下一次更新的秒数测试"""
+
+    TIMES = (time(11, 30), time(14, 30))
+
+    def test_next_slot_today(self):
+        now = datetime(2026, 10, 19, 12, 0)
+        assert http_cache.seconds_until_next(self.TIMES, now) == 2.5 * 3600
+
+    def test_wraps_to_tomorrow(self):
+        now = datetime(2026, 10, 19, 15, 0)
+        assert http_cache.seconds_until_next(self.TIMES, now) == 20.5 * 3600
+
+    def test_grace_during_update(self):
+        """更新时刻后 grace 秒内只给很短的有效期，避免缓存住更新前的数据"""
+        now = datetime(2026, 10, 19, 11, 31)
+        assert http_cache.seconds_until_next(self.TIMES, now, grace=180) == 120
+
+
+class TestRevalidationWindow:
+    """计划外更新后的 no-cache 窗口测试"""
+
+    TIMES = (time(11, 30), time(14, 30))
+
+    def test_no_cache_until_next_update(self):
+        window = http_cache.RevalidationWindow(self.TIMES, grace=180)
+        assert window.max_age(datetime(2026, 10, 19, 12, 0)) == 2.5 * 3600 + 180
+        window.mark(datetime(2026, 10, 19, 12, 0))
+        assert window.max_age(datetime(2026, 10, 19, 14, 0)) is None
+        assert window.max_age(datetime(2026, 10, 19, 14, 40)) == 20 * 3600 + 53 * 60
+
+    def test_cache_headers(self):
+        assert http_cache.cache_headers('"e"', None, 60)["Cache-Control"] == "private, max-age=60"
+        assert http_cache.cache_headers('"e"', None, None)["Cache-Control"] == "private, no-cache"
@@ -0,0 +1,100 @@
+# tests/test_loadtest.py
+"""本地模拟数据源与压测工具测试"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks import loadtest, upstreams
+from python_cli_starter import charts, market
+
+
+def stub_client(config: upstreams.UpstreamConfig):
+    app = upstreams.create_app(config)
+    return app, httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+
+@pytest.fixture(autouse=True)
+def fast_retry(monkeypatch):
+    monkeypatch.setattr(market, "RETRY_BASE_DELAY", 0)
+    market._host_semaphores.clear()
+    yield
+    market._host_semaphores.clear()
+
+
+class TestUpstreamStubs:
+    """模拟数据源测试"""
+
+    @pytest.mark.asyncio
+    async def test_eastmoney_stub_paginates(self):
+        app, client = stub_client(upstreams.UpstreamConfig(eastmoney_boards=250))
+        async with client:
+            batch = await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+        assert len(batch) == 250
+        assert app.state.requests["eastmoney"] == 3
+        # 按涨跌幅降序，与真实接口一致
+        changes = batch.columns["change_percent"].tolist()
+        assert changes == sorted(changes, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_error_rate_triggers_retries(self):
+        app, client = stub_client(upstreams.UpstreamConfig(eastmoney_boards=500, error_rate=0.3, seed=7))
+        async with client:
+            batch = await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+        assert len(batch) == 500
+        assert app.state.requests["eastmoney"] > 5
+
+    @pytest.mark.asyncio
+    async def test_ths_stub_matches_parser(self):
+        _, client = stub_client(upstreams.UpstreamConfig(ths_boards=11))
+        async with client:
+            pages = [
+                (await client.get(f"http://stub/thshy/index/field/199112/order/desc/page/{n}/ajax/1/")).text
+                for n in (1, 2)
+            ]
+        rows = [row for html in pages for row in market.parse_ths_html(html)]
+        assert len(rows) == 11
+        assert rows[0]["name"] == "同花顺板块000"
+
+    def test_fund_nav_redirect(self):
+        """akshare 的净值请求被重定向到本地模拟服务，结果可复现"""
+        config = upstreams.UpstreamConfig(nav_days=300)
+        with upstreams.UpstreamServer(config) as server, upstreams.redirect_upstreams(server.base_url):
+            first = charts.get_historical_fund_data("000001")
+            second = charts.get_historical_fund_data("000001")
+        assert len(first) == 300
+        assert first["close"].tolist() == second["close"].tolist()
+        assert server.app.state.requests["nav"] == 2
+
+
+class TestLoadRunner:
+    """压测工具测试"""
+
+    def test_parse_endpoint(self):
+        assert loadtest.parse_endpoint("/health") == loadtest.Endpoint("GET", "/health")
+        endpoint = loadtest.parse_endpoint('post /market/fetch/eastmoney {"cookie": "a=b"}')
+        assert endpoint.method == "POST"
+        assert endpoint.body == b'{"cookie": "a=b"}'
+
+    @pytest.mark.asyncio
+    async def test_run_load_reports_per_endpoint(self):
+        app = FastAPI()
+
+        @app.get("/ok")
+        async def ok():
+            return {"ok": True}
+
+        @app.get("/fail")
+        async def fail():
+            raise RuntimeError("boom")
+
+        endpoints = [loadtest.Endpoint("GET", "/ok"), loadtest.Endpoint("GET", "/fail")]
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            samples, elapsed = await loadtest.run_load(client, endpoints, concurrency=4, total_requests=40)
+
+        reports = {r.name: r for r in loadtest.summarize(samples, elapsed)}
+        assert reports["GET /ok"].requests == 20
+        assert reports["GET /ok"].errors == 0
+        assert reports["GET /fail"].errors == 20
+        assert reports["GET /ok"].p50_ms <= reports["GET /ok"].p99_ms <= reports["GET /ok"].max_ms
+        assert "GET /fail" in loadtest.format_table(list(reports.values()), elapsed)
@@ -0,0 +1,82 @@
+# tests/test_maintenance.py
+"""分区维护任务的纯逻辑单元测试"""
+import asyncio
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from python_cli_starter import maintenance
+
+
+class FakeConnection:
+    """记录执行的 SQL；pg_inherits 查询返回 partitions，默认分区的 EXISTS 查询返回 default_has_rows"""
+
+    def __init__(self, partitions, default_has_rows):
+        self.partitions = partitions
+        self.default_has_rows = default_has_rows
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.statements.append(sql)
+        result = MagicMock()
+        result.all.return_value = [(p,) for p in self.partitions if "pg_inherits" in sql]
+        result.scalar.return_value = self.default_has_rows
+        result.rowcount = 3
+        return result
+
+
+class TestPartitionPlanning:
+    """月分区规划测试"""
+
+    def test_add_months_across_year(self):
+        assert maintenance.add_months(date(2026, 11, 15), 2) == date(2027, 1, 1)
+        assert maintenance.add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+
+    def test_months_to_create(self):
+        months = maintenance.months_to_create(date(2026, 12, 5), 2)
+        assert months == [date(2026, 12, 1), date(2027, 1, 1), date(2027, 2, 1)]
+
+    def test_partition_name_roundtrip(self):
+        name = maintenance.partition_name("ths_sectors", date(2026, 3, 1))
+        assert name == "ths_sectors_p202603"
+        assert maintenance.parse_partition_month(name) == ("ths_sectors", date(2026, 3, 1))
+        assert maintenance.parse_partition_month("ths_sectors_pdefault") is None
+
+    def test_partitions_to_archive(self):
+        partitions = [
+            "eastmoney_sectors_p202601",
+            "eastmoney_sectors_p202604",
+            "eastmoney_sectors_p202605",
+            "eastmoney_sectors_pdefault",
+        ]
+        # 保留 6 个月：截止月为 2026-04，只有整月早于该月的分区才会被归档
+        assert maintenance.partitions_to_archive(partitions, date(2026, 10, 19), 6) == [
+            "eastmoney_sectors_p202601",
+        ]
+        assert maintenance.partitions_to_archive(partitions, date(2026, 10, 19), 0) == []
+
+
+class TestEnsurePartitions:
+    """创建分区时默认分区中已有该月数据的处理"""
+
+    def test_rows_moved_out_of_default_first(self):
+        conn = FakeConnection(["eastmoney_sectors_pdefault"], default_has_rows=True)
+        with patch.dict(maintenance.PARTITIONED_TABLES, {"eastmoney_sectors": "date"}, clear=True):
+            assert asyncio.run(maintenance.ensure_partitions(conn, [date(2026, 11, 5)])) == 1
+
+        steps = [sql.split(" (")[0].split(" WHERE")[0] for sql in conn.statements[1:]]
+        assert steps == [
+            "SELECT EXISTS",
+            "CREATE TEMP TABLE IF NOT EXISTS _moved_eastmoney_sectors",
+            "WITH moved AS",
+            "CREATE TABLE IF NOT EXISTS eastmoney_sectors_p202611 PARTITION OF eastmoney_sectors FOR VALUES FROM",
+            "INSERT INTO eastmoney_sectors SELECT * FROM _moved_eastmoney_sectors",
+            "TRUNCATE _moved_eastmoney_sectors",
+        ]
+        assert "DELETE FROM eastmoney_sectors_pdefault" in conn.statements[3]
+
+    def test_default_without_rows_creates_directly(self):
+        conn = FakeConnection(["ths_sectors_pdefault", "ths_sectors_p202610"], default_has_rows=False)
+        with patch.dict(maintenance.PARTITIONED_TABLES, {"ths_sectors": "date"}, clear=True):
+            assert asyncio.run(maintenance.ensure_partitions(conn, [date(2026, 10, 1), date(2026, 11, 1)])) == 1
+        assert [sql.split()[0] for sql in conn.statements[1:]] == ["SELECT", "CREATE"]
@@ -0,0 +1,262 @@
+# tests/test_market.py
+"""板块数据抓取模块单元测试"""
+import asyncio
+import json
+import pytest
+import httpx
+
+from python_cli_starter import market
+
+
+def make_jsonp(items, total):
+    """构造东方财富 JSONP 响应文本"""
+    payload = {"data": {"total": total, "diff": items}}
+    return f"jQuery123_456({json.dumps(payload, ensure_ascii=False)});"
+
+
+def make_items(start, count):
+    return [
+        {"f14": f"板块{i}", "f20": 1e10, "f8": 120, "f3": 250 - i, "f6": 5e8}
+        for i in range(start, start + count)
+    ]
+
+
+class MockEastMoneyServer:
+    """基于 httpx.MockTransport 的本地东方财富分页接口模拟"""
+
+    def __init__(self, total, fail_plan=None, drift_plan=None):
+        self.total = total
+        self.fail_plan = dict(fail_plan or {})  # {页码: 需要失败的次数}
+        self.drift_plan = dict(drift_plan or {})  # {页码: 需要错位的次数}，错位时该页整体前移一条，模拟盘中排序变动
+        self.calls = {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["pn"])
+        size = int(request.url.params["pz"])
+        self.calls[page] = self.calls.get(page, 0) + 1
+        if self.fail_plan.get(page, 0) > 0:
+            self.fail_plan[page] -= 1
+            return httpx.Response(502, text="Bad Gateway")
+        start = (page - 1) * size
+        if self.drift_plan.get(page, 0) > 0:
+            self.drift_plan[page] -= 1
+            start -= 1
+        count = max(0, min(size, self.total - start))
+        return httpx.Response(200, text=make_jsonp(make_items(start, count), self.total))
+
+    def client(self):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture(autouse=True)
+def fast_retry(monkeypatch):
+    """测试中取消退避等待，并清理跨事件循环的 host 信号量"""
+    monkeypatch.setattr(market, "RETRY_BASE_DELAY", 0)
+    market._host_semaphores.clear()
+    market.reset_eastmoney_cookie()
+    yield
+    market._host_semaphores.clear()
+    market.reset_eastmoney_cookie()
+
+
+class TestEastMoneyParse:
+    """JSONP 解析测试"""
+
+    def test_parse_eastmoney_jsonp(self):
+        sectors = market.parse_eastmoney_jsonp(make_jsonp(make_items(0, 3), 3))
+        assert len(sectors) == 3
+        assert sectors[0].name == "板块0"
+        assert sectors[0].change_percent_desc == "2.50%"
+        assert sectors[0].market_cap_desc == "100.00 亿"
+
+    def test_parse_invalid_text(self):
+        assert market.parse_eastmoney_jsonp("not json") == []
+        assert len(market.parse_eastmoney_batch(b"not json")) == 0
+
+    def test_parse_batch_from_bytes(self):
+        """列式解析直接接受字节，展开的行与 SectorInfo 字段一致"""
+        text = make_jsonp(make_items(0, 3), 3)
+        batch = market.parse_eastmoney_batch(text.encode("utf-8"))
+        rows = batch.rows()
+        assert len(batch) == 3
+        assert rows[1].name == "板块1"
+        assert rows[1].change_percent == 249.0
+        assert rows[1].market_cap == 1e10
+        sectors = market.parse_eastmoney_jsonp(text)
+        assert [(s.name, s.market_cap, s.turnover_rate, s.change_percent, s.amount) for s in sectors] == \
+            [r[:5] for r in rows]
+
+    def test_batch_cleans_invalid_values(self):
+        """停牌等情况返回的 "-"、null、缺失字段及非法字符串统一记为 0"""
+        items = [
+            {"f14": "甲", "f20": "-", "f8": None, "f3": "1.5", "f6": 10},
+            {"f14": "乙", "f20": 2e10, "f3": "abc", "f6": 20},
+        ]
+        batch = market.EastMoneyBatch.from_items(items)
+        assert batch.columns["market_cap"].tolist() == [0.0, 2e10]
+        assert batch.columns["turnover_rate"].tolist() == [0.0, 0.0]
+        assert batch.columns["change_percent"].tolist() == [1.5, 0.0]
+        assert batch.columns["amount"].tolist() == [10.0, 20.0]
+        assert [s.name for s in batch] == ["甲", "乙"]
+
+
+class TestEastMoneyFetch:
+    """分页拉取、重试与完整性校验测试"""
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_pages(self):
+        server = MockEastMoneyServer(total=250)
+        async with server.client() as client:
+            sectors = await market.fetch_eastmoney_sectors(cookie="a=b", client=client)
+        assert len(sectors) == 250
+        assert set(server.calls) == {1, 2, 3}
+
+    @pytest.mark.asyncio
+    async def test_fetch_batch(self):
+        server = MockEastMoneyServer(total=150)
+        async with server.client() as client:
+            batch = await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+        assert isinstance(batch, market.EastMoneyBatch)
+        assert len(batch) == 150
+        assert batch.names[-1] == "板块149"
+
+    @pytest.mark.asyncio
+    async def test_retry_transient_failure(self):
+        server = MockEastMoneyServer(total=250, fail_plan={2: 2})
+        async with server.client() as client:
+            sectors = await market.fetch_eastmoney_sectors(cookie="a=b", client=client)
+        assert len(sectors) == 250
+        assert server.calls[2] == 3
+
+    @pytest.mark.asyncio
+    async def test_persistent_failure_raises(self):
+        server = MockEastMoneyServer(total=250, fail_plan={3: market.MAX_RETRIES + 1})
+        async with server.client() as client:
+            with pytest.raises(market.EastMoneyFetchError) as exc_info:
+                await market.fetch_eastmoney_sectors(cookie="a=b", client=client)
+        assert exc_info.value.failed_pages == [3]
+
+    @pytest.mark.asyncio
+    async def test_incomplete_pages_refetched(self):
+        """排序变动导致某板块重复、另一板块缺失时，重新抓取全部分页补齐"""
+        server = MockEastMoneyServer(total=250, drift_plan={2: 1})
+        async with server.client() as client:
+            batch = await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+        assert len(batch) == 250
+        assert "板块199" in batch.names
+        assert server.calls == {1: 2, 2: 2, 3: 2}
+
+    @pytest.mark.asyncio
+    async def test_persistently_incomplete_raises(self):
+        """重新抓取后仍不完整时抛出 EastMoneyFetchError，不返回残缺的板块列表"""
+        server = MockEastMoneyServer(total=250, drift_plan={2: market.INCOMPLETE_RETRIES + 1})
+        async with server.client() as client:
+            with pytest.raises(market.EastMoneyFetchError, match="期望 250 条"):
+                await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+        assert server.calls[2] == market.INCOMPLETE_RETRIES + 1
+
+    @pytest.mark.asyncio
+    async def test_first_page_failure_raises(self):
+        """第 1 页失败同样包装为 EastMoneyFetchError，而不是抛出原始 httpx 异常"""
+        server = MockEastMoneyServer(total=250, fail_plan={1: market.MAX_RETRIES + 1})
+        async with server.client() as client:
+            with pytest.raises(market.EastMoneyFetchError) as exc_info:
+                await market.fetch_eastmoney_sectors(cookie="a=b", client=client)
+        assert exc_info.value.failed_pages == [1]
+        assert set(server.calls) == {1}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fetches_share_one_cookie_capture(self, monkeypatch):
+        """行业、概念板块并发抓取且未传入 cookie 时，只启动一次浏览器截获 cookie"""
+        captures = []
+
+        async def capture():
+            captures.append(1)
+            await asyncio.sleep(0.05)
+            return "qgqp_b_id=abc"
+
+        monkeypatch.setattr(market, "_capture_eastmoney_cookie", capture)
+        server = MockEastMoneyServer(total=150)
+        async with server.client() as client:
+            industry, concept = await asyncio.gather(
+                market.fetch_eastmoney_batch(fs_type=2, client=client),
+                market.fetch_eastmoney_batch(fs_type=3, client=client),
+            )
+            assert len(industry) == len(concept) == 150
+            assert len(captures) == 1
+
+            monkeypatch.setattr(market, "EASTMONEY_COOKIE_TTL", 0)
+            await market.fetch_eastmoney_batch(fs_type=2, client=client)
+            assert len(captures) == 2
+
+    @pytest.mark.asyncio
+    async def test_422_is_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(422, text="")
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with pytest.raises(market.EastMoneyAPIException) as exc_info:
+                await market.fetch_eastmoney_sectors(cookie="a=b", client=client)
+        assert exc_info.value.status_code == 422
+        assert "curl -X GET" in exc_info.value.curl_cmd
+        assert len(calls) == 1
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect_documents(data: bytes, size: int = 7, **kwargs):
+    return [doc async for doc in market.iter_upload_documents(_chunks(data, size), **kwargs)]
+
+
+class TestUploadStream:
+    """流式上传切分与解压测试"""
+
+    def test_splitter_handles_braces_in_strings(self):
+        """字符串中的大括号、引号与转义不影响对象边界，按任意字节切块结果一致"""
+        doc = json.dumps({"data": {"diff": [{"f14": 'a{b}"c\\', "f3": 1}]}}, ensure_ascii=False).encode("utf-8")
+        data = b"cb(" + doc + b");\ncb(" + doc + b");"
+        for size in (1, 3, len(data)):
+            splitter = market.JsonDocumentSplitter()
+            documents = []
+            for i in range(0, len(data), size):
+                documents.extend(splitter.feed(data[i:i + size]))
+            splitter.close()
+            assert documents == [doc, doc]
+
+    @pytest.mark.asyncio
+    async def test_ndjson_and_concatenated_jsonp(self):
+        pages = [make_jsonp(make_items(i * 3, 3), 9) for i in range(3)]
+        jsonp_docs = await _collect_documents("".join(pages).encode("utf-8"))
+        ndjson = "\n".join(json.dumps({"data": {"total": 9, "diff": make_items(i * 3, 3)}}) for i in range(3))
+        ndjson_docs = await _collect_documents(ndjson.encode("utf-8"))
+        for documents in (jsonp_docs, ndjson_docs):
+            batches = [market.parse_eastmoney_page(d) for d in documents]
+            assert [b.names[0] for b in batches] == ["板块0", "板块3", "板块6"]
+
+    @pytest.mark.asyncio
+    async def test_gzip_multi_member_autodetect(self):
+        """未声明 gzip 时按魔数识别，多个 gzip 成员首尾相接也能完整解出"""
+        import gzip
+        data = b"".join(gzip.compress(make_jsonp(make_items(i, 1), 2).encode("utf-8")) for i in range(2))
+        documents = await _collect_documents(data, size=16)
+        assert [market.parse_eastmoney_page(d).names for d in documents] == [["板块0"], ["板块1"]]
+
+    @pytest.mark.asyncio
+    async def test_truncated_and_oversized_input(self):
+        with pytest.raises(ValueError, match="中途结束"):
+            await _collect_documents(b'cb({"data": {"diff": [')
+        with pytest.raises(ValueError, match="单页数据超过"):
+            await _collect_documents(b'{"data": "' + b"x" * 100, max_document_bytes=64)
+
+    def test_concat_dedupes_names(self):
+        first = market.EastMoneyBatch.from_items(make_items(0, 3))
+        second = market.EastMoneyBatch.from_items(make_items(2, 3))
+        merged = market.EastMoneyBatch.concat([first, second])
+        assert merged.names == ["板块0", "板块1", "板块2", "板块3", "板块4"]
+        assert merged.columns["change_percent"].tolist() == [250, 249, 248, 247, 246]
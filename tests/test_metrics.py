@@ -0,0 +1,128 @@
+# tests/test_metrics.py
+"""进程内指标与 /metrics 端点测试"""
+import asyncio
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from python_cli_starter import metrics
+from python_cli_starter.cache import SnapshotCache
+from python_cli_starter.main import app
+
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def registry():
+    """测试中临时创建的指标不留在全局注册表里"""
+    saved = list(metrics._registry)
+    yield
+    metrics._registry[:] = saved
+
+
+def sample_lines(text: str, prefix: str) -> list:
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+class TestMetricTypes:
+    """指标类型与文本格式测试"""
+
+    def test_counter_render(self, registry):
+        counter = metrics.Counter("test_events_total", "测试计数", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind='quote"d')
+        text = counter.render()
+        assert "# TYPE test_events_total counter" in text
+        assert 'test_events_total{kind="a"} 3' in text
+        assert 'test_events_total{kind="quote\\"d"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        histogram = metrics.Histogram("test_seconds", "测试耗时", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, op="x")
+        lines = sample_lines(histogram.render(), "test_seconds")
+        assert lines == [
+            'test_seconds_bucket{op="x",le="0.1"} 2',
+            'test_seconds_bucket{op="x",le="1"} 3',
+            'test_seconds_bucket{op="x",le="+Inf"} 4',
+            'test_seconds_sum{op="x"} 3.65',
+            'test_seconds_count{op="x"} 4',
+        ]
+
+    def test_timer_as_decorator(self, registry):
+        histogram = metrics.Histogram("test_compute_seconds", "测试", ("name",))
+
+        @histogram.time(name="f")
+        def compute(x):
+            return x * 2
+
+        assert compute(21) == 42
+        assert histogram.count(name="f") == 1
+
+    def test_gauge_function_read_at_scrape(self, registry):
+        state = {"value": 1}
+        metrics.Gauge("test_level", "测试", ("state",), function=lambda: {("now",): state["value"]})
+        state["value"] = 7
+        assert 'test_level{state="now"} 7' in metrics.render()
+
+
+class TestInstrumentation:
+    """埋点测试"""
+
+    def test_track_upstream_counts_errors(self):
+        errors = metrics.UPSTREAM_FETCH_ERRORS.value(source="test_source")
+        with metrics.track_upstream("test_source"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.track_upstream("test_source"):
+                raise RuntimeError("boom")
+        assert metrics.UPSTREAM_FETCH_SECONDS.count(source="test_source") == 2
+        assert metrics.UPSTREAM_FETCH_ERRORS.value(source="test_source") == errors + 1
+
+    def test_instrument_job_records_failures(self):
+        async def failing_job():
+            raise ValueError("boom")
+
+        job = metrics.instrument_job("test_job", failing_job)
+        with pytest.raises(ValueError):
+            asyncio.run(job())
+        assert metrics.SCHEDULER_JOB_SECONDS.count(job="test_job") == 1
+        assert metrics.SCHEDULER_JOB_FAILURES.value(job="test_job") == 1
+
+    def test_cache_hit_ratio(self):
+        cache = SnapshotCache()
+        cache.get("test_key")
+        cache.put("test_key", b"{}", cache.generation("test_key"))
+        cache.get("test_key")
+        cache.get("test_key")
+        assert metrics._cache_hit_ratio()[("test_key",)] == pytest.approx(2 / 3)
+
+    def test_strategy_compute_timed_separately_from_fetch(self):
+        from python_cli_starter.strategies import rsi_strategy
+
+        nav = pd.DataFrame({"close": [1.0 + i * 0.01 for i in range(40)]}, index=pd.date_range("2026-01-01", periods=40))
+        before = metrics.STRATEGY_COMPUTE_SECONDS.count(strategy="rsi")
+        with patch.object(rsi_strategy, "get_latest_fund_data", return_value=nav):
+            rsi_strategy.run_strategy("000001")
+        assert metrics.STRATEGY_COMPUTE_SECONDS.count(strategy="rsi") == before + 1
+
+
+class TestMetricsEndpoint:
+    """/metrics 端点测试"""
+
+    def test_route_template_labels(self):
+        client.get("/strategies/not_a_strategy/000001")
+        client.get("/definitely/not/a/route")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert 'route="/strategies/{strategy_name}/{fund_code}",status="404"' in text
+        assert 'route="unmatched",status="404"' in text
+        # 只检查标签部分，样本值 (如 _sum 的浮点数) 中可能恰好出现相同的数字
+        assert "000001" not in "".join(line.rsplit(" ", 1)[0] for line in sample_lines(text, "http_request_duration_seconds"))
+        assert 'db_pool_connections{state="size"}' in text
@@ -0,0 +1,46 @@
+# tests/test_migrations.py
+"""数据迁移中的数据检查测试"""
+import importlib.util
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+def load_migration(filename):
+    spec = importlib.util.spec_from_file_location(filename.removesuffix(".py"), VERSIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestCompactEastMoney:
+    """转为整数列之前检查含小数的行"""
+
+    @pytest.fixture
+    def migration(self):
+        return load_migration("6d4e1b8f2c90_compact_eastmoney_sectors.py")
+
+    @staticmethod
+    def fake_bind(count):
+        bind = MagicMock()
+        bind.execute.return_value.scalar.return_value = count
+        bind.execute.return_value.all.return_value = [("2026-03-05", "半导体", 1.2e12, 1.5, 2.5, 3.4e9)]
+        return bind
+
+    def test_clean_table_passes(self, migration):
+        bind = self.fake_bind(0)
+        assert migration.check_integral_values(bind) == 0
+        assert "round(change_percent)" in str(bind.execute.call_args.args[0])
+
+    def test_fractional_rows_abort(self, migration, monkeypatch):
+        monkeypatch.delenv("EASTMONEY_ALLOW_ROUNDING", raising=False)
+        with pytest.raises(RuntimeError, match="3 行数值含小数.*半导体"):
+            migration.check_integral_values(self.fake_bind(3))
+
+    def test_fractional_rows_allowed_explicitly(self, migration, monkeypatch, caplog):
+        monkeypatch.setenv("EASTMONEY_ALLOW_ROUNDING", "1")
+        assert migration.check_integral_values(self.fake_bind(3)) == 3
+        assert "已按 EASTMONEY_ALLOW_ROUNDING=1 取整" in caplog.text
@@ -0,0 +1,109 @@
+# tests/test_profiling.py
+"""按需剖析测试"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from python_cli_starter import profiling
+
+
+def busy_loop(n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    config = profiling.ProfilingConfig(
+        token="secret",
+        routes=frozenset({"/slow/{code}", "/slow_async/{code}"}),
+        interval=0.001,
+        directory=str(tmp_path),
+    )
+    app = FastAPI()
+    assert profiling.install(app, config)
+
+    @app.get("/slow/{code}")
+    def slow(code: str):
+        return {"code": code, "total": busy_loop(300_000)}
+
+    @app.get("/slow_async/{code}")
+    async def slow_async(code: str):
+        await asyncio.sleep(0.02)
+        return {"total": busy_loop(300_000)}
+
+    @app.get("/other")
+    def other():
+        return {"total": busy_loop(1000)}
+
+    yield TestClient(app), tmp_path
+    profiling.install(FastAPI(), profiling.ProfilingConfig())
+    profiling._reports.clear()
+
+
+class TestProfiling:
+    """采样剖析测试"""
+
+    def test_disabled_without_config(self):
+        app = FastAPI()
+        assert not profiling.install(app, profiling.ProfilingConfig(token="secret"))
+        assert app.router.route_class is not profiling.ProfilingRoute
+
+    def test_not_triggered_without_token(self, profiled_app):
+        client, _ = profiled_app
+        response = client.get("/slow/000001")
+        assert response.status_code == 200
+        assert profiling.ID_HEADER not in response.headers
+        response = client.get("/slow/000001", headers={"X-Profile-Token": "wrong"})
+        assert profiling.ID_HEADER not in response.headers
+        assert profiling.list_reports() == []
+
+    def test_sync_endpoint_folded_stacks(self, profiled_app):
+        client, tmp_path = profiled_app
+        response = client.get("/slow/000001", headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        assert response.json()["code"] == "000001"
+
+        report = profiling.get_report(response.headers[profiling.ID_HEADER])
+        assert report.route == "GET /slow/{code}" and report.path == "/slow/000001"
+        assert report.samples > 0
+        lines = report.folded.splitlines()
+        # 每行 "根;...;叶 次数"，根为路由，且只包含端点内部的帧
+        assert all(line.startswith("GET /slow/{code}") for line in lines)
+        assert any("test_profiling.busy_loop" in line for line in lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == report.samples
+        assert (tmp_path / f"{report.id}.folded").read_text(encoding="utf-8") == report.folded
+
+    def test_async_endpoint_via_query_flag(self, profiled_app):
+        client, _ = profiled_app
+        response = client.get("/slow_async/1", params={"profile_token": "secret"})
+        report = profiling.get_report(response.headers[profiling.ID_HEADER])
+        assert report.route == "GET /slow_async/{code}"
+        stacks = report.folded
+        assert "test_profiling.busy_loop" in stacks
+        assert profiling.WAITING_FRAME in stacks  # await asyncio.sleep 期间
+
+    def test_route_not_in_allowlist(self, profiled_app):
+        client, _ = profiled_app
+        response = client.get("/other", headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        assert profiling.ID_HEADER not in response.headers
+
+    def test_debug_endpoints_hidden_when_disabled(self):
+        from python_cli_starter.main import app
+
+        client = TestClient(app)
+        assert client.get("/debug/profiles", headers={"X-Profile-Token": ""}).status_code == 404
+        assert client.get("/debug/profiles/abc").status_code == 404
+
+    def test_frame_label_without_qualname(self):
+        """Python 3.10 的代码对象没有 co_qualname，回退到 co_name"""
+        frame = SimpleNamespace(f_globals={"__name__": "pkg.mod"}, f_code=SimpleNamespace(co_name="run"))
+        assert profiling._frame_label(frame) == "pkg.mod.run"
+        frame.f_code.co_qualname = "Strategy.run"
+        assert profiling._frame_label(frame) == "pkg.mod.Strategy.run"
@@ -0,0 +1,109 @@
+# tests/test_query_stats.py
+"""SQL 语句统计与慢查询日志测试"""
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from unittest.mock import patch
+
+from python_cli_starter import metrics, profiling, query_stats
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    query_stats.reset()
+    yield
+    query_stats.reset()
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    query_stats.install(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+    query_stats.reset()
+    yield engine
+    engine.dispose()
+
+
+class TestNormalize:
+    """语句归一化测试"""
+
+    def test_placeholders_and_lists(self):
+        a = query_stats.normalize("SELECT * FROM t\n  WHERE id IN ($1, $2, $3) AND name = $4")
+        b = query_stats.normalize("SELECT * FROM t WHERE id IN ($1, $2) AND name = $3")
+        assert a == b == "SELECT * FROM t WHERE id IN (?, ...) AND name = ?"
+
+    def test_multi_row_values(self):
+        statement = "INSERT INTO t (id, name) VALUES ($1::INTEGER, $2::VARCHAR), ($3::INTEGER, $4::VARCHAR), ($5::INTEGER, $6::VARCHAR)"
+        assert query_stats.normalize(statement) == "INSERT INTO t (id, name) VALUES (?, ...), ..."
+        assert query_stats.operation(statement) == "INSERT"
+        assert query_stats.operation("  (SELECT 1)") == "SELECT"
+        assert query_stats.operation("VACUUM") == "OTHER"
+
+    def test_params_shape_has_no_values(self):
+        shape = query_stats.params_shape({"a": "secret", "b": "x", "c": 1.5, "d": [1, 2, 3]})
+        assert shape == "(str×2, float, list[3])"
+        assert "secret" not in shape
+        assert query_stats.params_shape([(1, "a"), (2, "b")], executemany=True) == "2 × (int, str)"
+
+
+class TestEngineEvents:
+    """引擎事件聚合测试"""
+
+    def test_aggregates_per_statement(self, engine):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO t (id, name) VALUES (:id, :name)"), [{"id": i, "name": f"n{i}"} for i in range(3)])
+            for i in range(2):
+                conn.execute(text("UPDATE t SET name = :name WHERE id = :id"), {"id": i, "name": "x"})
+            conn.execute(text("SELECT * FROM t")).all()
+
+        stats = {s["operation"]: s for s in query_stats.snapshot()}
+        assert stats["INSERT"]["count"] == 1 and stats["INSERT"]["rows"] == 3
+        assert stats["UPDATE"]["count"] == 2 and stats["UPDATE"]["rows"] == 2
+        assert stats["UPDATE"]["statement"] == "UPDATE t SET name = ? WHERE id = ?"
+        assert stats["SELECT"]["count"] == 1 and stats["SELECT"]["rows"] == 0  # SELECT 的 rowcount 为 -1，不计行数
+        assert all(s["max_ms"] >= s["mean_ms"] >= 0 for s in stats.values())
+        assert query_stats.snapshot(sort_by="count", limit=1)[0]["operation"] == "UPDATE"
+
+    def test_errors_counted(self, engine):
+        with pytest.raises(Exception):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT * FROM missing_table"))
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        stats = {s["statement"]: s for s in query_stats.snapshot()}
+        assert stats["SELECT * FROM missing_table"]["errors"] == 1
+        assert stats["SELECT 1"]["count"] == 1
+
+    def test_slow_query_logged(self, engine, caplog):
+        before = metrics.DB_SLOW_QUERIES.value(operation="SELECT")
+        with patch.object(query_stats, "SLOW_QUERY_MS", 0.0), caplog.at_level(logging.WARNING, logger=query_stats.__name__):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT * FROM t WHERE name = :name"), {"name": "private-value"})
+        assert metrics.DB_SLOW_QUERIES.value(operation="SELECT") == before + 1
+        assert query_stats.snapshot()[0]["slow"] == 1
+        message = caplog.records[-1].getMessage()
+        assert "慢查询" in message and "(str)" in message and "private-value" not in message
+
+    def test_statement_limit(self):
+        with patch.object(query_stats, "MAX_STATEMENTS", 2):
+            for i in range(4):
+                query_stats.record(f"SELECT {i}", 1.0, 1)
+        assert {s["statement"] for s in query_stats.snapshot()} == {"SELECT 0", "SELECT 1", query_stats.OTHER}
+        assert next(s for s in query_stats.snapshot() if s["statement"] == query_stats.OTHER)["count"] == 2
+
+
+def test_debug_endpoint():
+    from python_cli_starter.main import app
+
+    query_stats.record("SELECT * FROM t WHERE id = $1", 3.0, 1)
+    client = TestClient(app)
+    assert client.get("/debug/queries").status_code == 404  # 未配置口令
+    with patch.object(profiling, "_config", profiling.ProfilingConfig(token="secret")):
+        assert client.get("/debug/queries", headers={profiling.TOKEN_HEADER: "wrong"}).status_code == 404
+        data = client.get("/debug/queries", params={"sort_by": "max_ms", profiling.TOKEN_QUERY: "secret"}).json()
+    assert data["statements"][0]["statement"] == "SELECT * FROM t WHERE id = ?"
+    assert {"pid", "size", "checked_out", "utilization"} <= set(data["pool"])
@@ -0,0 +1,128 @@
+# tests/test_rolling_stats.py
+"""板块滚动统计单元测试"""
+import asyncio
+import random
+import statistics
+from datetime import date
+
+import pytest
+
+from python_cli_starter.rolling_stats import QuantileSketch, RunningStats, build_seed_states, fold_pending
+
+
+class TestRunningStats:
+    """Welford 统计与分位数草图测试"""
+
+    def test_welford_matches_batch(self):
+        values = [1.5, -0.3, 2.2, 0.0, -1.1, 3.4]
+        stats = RunningStats()
+        for v in values:
+            stats.add(v)
+        assert stats.mean == pytest.approx(statistics.mean(values))
+        assert stats.std == pytest.approx(statistics.stdev(values))
+
+    def test_describe_zscore(self):
+        stats = RunningStats()
+        for v in [1.0, 2.0, 3.0]:
+            stats.add(v)
+        desc = stats.describe(4.0)
+        assert desc["zscore"] == pytest.approx(2.0)
+        assert desc["percentile"] == 100.0
+        assert desc["n"] == 3
+
+    def test_describe_without_history(self):
+        desc = RunningStats().describe(1.0)
+        assert desc["zscore"] is None
+        assert desc["percentile"] is None
+
+    def test_sketch_is_compact_and_accurate(self):
+        rng = random.Random(42)
+        sketch = QuantileSketch(k=64)
+        for _ in range(5000):
+            sketch.add(rng.gauss(0, 1))
+        assert sum(len(level) for level in sketch.levels) < 64 * 8
+        assert sketch.percentile(0.0) == pytest.approx(50, abs=5)
+        assert sketch.percentile(1.0) == pytest.approx(84.1, abs=5)
+
+    def test_roundtrip_serialization(self):
+        stats = RunningStats()
+        for v in range(200):
+            stats.add(float(v))
+        restored = RunningStats.from_dict(stats.to_dict())
+        assert restored.describe(150.0) == stats.describe(150.0)
+
+    def test_fold_pending(self):
+        state = fold_pending({}, {"change_percent": 1.0, "net_inflow": None})
+        state = fold_pending(state, {"change_percent": 3.0})
+        stats = RunningStats.from_dict(state["change_percent"])
+        assert stats.n == 2
+        assert stats.mean == 2.0
+        assert "net_inflow" not in state
+
+
+class TestSeedFromHistory:
+    """从每日表历史补齐统计状态"""
+
+    def test_matches_daily_folding(self):
+        """最后一个交易日作为 pending，之前各日依次并入 state"""
+        rows = [
+            ("半导体", date(2024, 1, 2), 1.0, 2.0),
+            ("半导体", date(2024, 1, 3), 3.0, None),
+            ("半导体", date(2024, 1, 4), 5.0, 6.0),
+            ("银行", date(2024, 1, 4), -1.0, 0.5),
+        ]
+        seeds = build_seed_states(rows, ("change_percent", "net_inflow"))
+
+        seed = seeds["半导体"]
+        assert seed["last_date"] == date(2024, 1, 4)
+        assert seed["pending"] == {"change_percent": 5.0, "net_inflow": 6.0}
+        expected = fold_pending(fold_pending({}, {"change_percent": 1.0, "net_inflow": 2.0}), {"change_percent": 3.0, "net_inflow": None})
+        assert seed["state"] == expected
+        assert RunningStats.from_dict(seed["state"]["change_percent"]).n == 2
+        assert RunningStats.from_dict(seed["state"]["net_inflow"]).n == 1
+
+        assert seeds["银行"] == {"last_date": date(2024, 1, 4), "pending": {"change_percent": -1.0, "net_inflow": 0.5}, "state": {}}
+
+    def test_query_skips_sectors_with_stats(self, monkeypatch):
+        """只读取尚无统计状态的板块，并以 ON CONFLICT DO NOTHING 写入"""
+        from sqlalchemy.dialects import postgresql
+        from python_cli_starter import rolling_stats
+
+        statements = []
+
+        class FakeResult:
+            def __init__(self, rows):
+                self._rows = rows
+
+            def all(self):
+                return self._rows
+
+        class FakeSession:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, stmt, params=None):
+                statements.append((str(stmt.compile(dialect=postgresql.dialect())), params))
+                return FakeResult([("银行", date(2024, 1, 3), -1.0, 0.5, 3e8), ("银行", date(2024, 1, 4), 2.0, 1.5, 4e8)])
+
+            async def commit(self):
+                pass
+
+        async def fake_sector_ids(source, names):
+            return {name: 7 for name in names}
+
+        monkeypatch.setattr(rolling_stats, "AsyncSessionLocal", FakeSession)
+        monkeypatch.setattr(rolling_stats, "get_sector_ids", fake_sector_ids)
+
+        assert asyncio.run(rolling_stats.seed_from_history("ths")) == 1
+        query, _ = statements[0]
+        assert "NOT (EXISTS" in query and "sector_stats" in query
+        insert_sql, records = statements[1]
+        assert "ON CONFLICT DO NOTHING" in insert_sql
+        assert records[0]["sector_id"] == 7
+        assert records[0]["last_date"] == date(2024, 1, 4)
+        assert RunningStats.from_dict(records[0]["state"]["net_inflow"]).mean == 3e8
+        assert records[0]["pending"] == {"change_percent": 2.0, "turnover_ratio": 1.5, "net_inflow": 4e8}
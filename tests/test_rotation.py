@@ -0,0 +1,68 @@
+# tests/test_rotation.py
+"""板块轮动指标计算单元测试"""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from python_cli_starter import rotation
+
+
+class TestRotationMath:
+    """向量化轮动指标计算测试"""
+
+    def test_build_matrix(self):
+        rows = [
+            ("银行", date(2026, 3, 2), 1.0, 5.0),
+            ("半导体", date(2026, 3, 2), 2.0, -1.0),
+            ("半导体", date(2026, 3, 3), 3.0, None),
+        ]
+        names, dates, (change, inflow) = rotation.build_matrix(rows, 2)
+        assert names == ["半导体", "银行"]
+        assert dates == [date(2026, 3, 2), date(2026, 3, 3)]
+        assert change[1, 0] == 3.0
+        assert np.isnan(change[1, 1])
+        assert np.isnan(inflow[1, 0])
+
+    def test_rolling_returns_compound(self):
+        change = np.array([[10.0], [10.0], [-50.0]])
+        ret = rotation.rolling_returns(change, 2)
+        assert ret[0, 0] == pytest.approx(10.0)
+        assert ret[1, 0] == pytest.approx(21.0)
+        assert ret[2, 0] == pytest.approx(-45.0)
+
+    def test_rank_desc_skips_nan(self):
+        values = np.array([[1.0, 3.0, np.nan, 2.0]])
+        ranks = rotation.rank_desc(values)
+        assert ranks[0, :2].tolist() == [3.0, 1.0]
+        assert np.isnan(ranks[0, 2])
+        assert ranks[0, 3] == 2.0
+
+    def test_sign_streak(self):
+        inflow = np.array([[1.0], [2.0], [-1.0], [-3.0], [-0.5], [np.nan], [4.0]])
+        assert rotation.sign_streak(inflow)[:, 0].tolist() == [1, 2, -1, -2, -3, 0, 1]
+
+    def test_compute_rotation_rank_change(self):
+        # 第二天 B 大涨，5 日排名从第 2 升到第 1
+        change = np.array([[2.0, 1.0], [0.0, 5.0]])
+        metrics = rotation.compute_rotation(change, windows=(5,))
+        assert metrics["rank_5"][1].tolist() == [2.0, 1.0]
+        assert metrics["rank_change_5"][1].tolist() == [-1.0, 1.0]
+        assert "flow_streak" not in metrics
+
+    def test_grouped_rotation_ranks_within_group(self):
+        """行业与概念板块分组排名：各组都有自己的第 1 名，累计涨跌幅不受分组影响"""
+        change = np.array([[1.0, 5.0, 2.0, 9.0], [1.0, 5.0, 2.0, 9.0]])
+        groups = np.array([2, 3, 2, 3])
+        grouped = rotation.compute_grouped_rotation(change, None, groups, windows=(5,))
+        assert grouped["rank_5"][1].tolist() == [2.0, 2.0, 1.0, 1.0]
+        ungrouped = rotation.compute_rotation(change, windows=(5,))
+        assert ungrouped["rank_5"][1].tolist() == [4.0, 2.0, 3.0, 1.0]
+        np.testing.assert_allclose(grouped["ret_5"], ungrouped["ret_5"])
+
+    def test_grouped_rotation_without_groups(self):
+        change = np.array([[2.0, 1.0]])
+        inflow = np.array([[1.0, -1.0]])
+        grouped = rotation.compute_grouped_rotation(change, inflow, None, windows=(5,))
+        assert grouped["rank_5"][0].tolist() == [1.0, 2.0]
+        assert grouped["flow_streak"][0].tolist() == [1.0, -1.0]
@@ -0,0 +1,117 @@
+# tests/test_sector_mapping.py
+"""东方财富 ↔ 同花顺板块名称映射单元测试"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from python_cli_starter import sector_mapping
+from python_cli_starter.sector_mapping import build_mapping, normalize_name, bigrams, similarity
+
+
+class TestNormalize:
+    """名称归一化测试"""
+
+    def test_strip_suffix_and_fullwidth(self):
+        assert normalize_name("半导体行业") == "半导体"
+        assert normalize_name("ＡＩ概念") == "ai"
+        assert normalize_name("电力Ⅱ") == "电力"
+
+    def test_suffix_only_name_kept(self):
+        assert normalize_name("行业") == "行业"
+
+    def test_similarity(self):
+        assert similarity(bigrams("半导体"), bigrams("半导体及元件")) > 0.5
+        assert similarity(bigrams("银行"), bigrams("白酒")) == 0.0
+
+
+class TestBuildMapping:
+    """映射构建测试"""
+
+    def test_exact_and_ngram(self):
+        mapping = build_mapping(["半导体", "银行", "电力行业"], ["半导体及元件", "银行", "电力"])
+        assert mapping["银行"] == ("银行", 1.0, "exact")
+        assert mapping["电力行业"] == ("电力", 1.0, "exact")
+        assert mapping["半导体"][0] == "半导体及元件"
+        assert mapping["半导体"][2] == "ngram"
+
+    def test_one_to_one(self):
+        """同一同花顺板块只分配给相似度最高的东方财富板块"""
+        mapping = build_mapping(["通信设备", "通信服务"], ["通信设备"])
+        assert mapping == {"通信设备": ("通信设备", 1.0, "exact")}
+
+    def test_below_threshold_unmapped(self):
+        assert build_mapping(["银行"], ["白酒"]) == {}
+
+    def test_overrides(self):
+        mapping = build_mapping(
+            ["酿酒行业", "半导体"],
+            ["白酒", "半导体"],
+            overrides={"酿酒行业": "白酒", "半导体": None, "不存在": "白酒"},
+        )
+        assert mapping == {"酿酒行业": ("白酒", 1.0, "manual")}
+
+
+class FakeMappingStore:
+    """模拟维度表与映射表：按 refresh_sector_mapping 的执行顺序返回查询结果并保存写入的映射"""
+
+    def __init__(self, em_names, ths_names):
+        self.dims = [(1, n, i) for i, n in enumerate(em_names, 1)] + [(2, n, 100 + i) for i, n in enumerate(ths_names, 1)]
+        self.names = {sector_id: name for _, name, sector_id in self.dims}
+        self.rows = []
+
+    def session(self):
+        store = self
+
+        class Session:
+            calls = 0
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, stmt, params=None):
+                self.calls += 1
+                result = MagicMock()
+                if self.calls == 1:
+                    result.all.return_value = store.dims
+                elif self.calls == 2:  # 只读回 method='manual' 的记录
+                    result.all.return_value = [
+                        (store.names[r["em_sector_id"]], store.names[r["ths_sector_id"]])
+                        for r in store.rows if r["method"] == "manual"
+                    ]
+                elif self.calls == 3:
+                    store.rows = []
+                else:
+                    store.rows = list(params)
+                return result
+
+            async def commit(self):
+                pass
+
+        return Session()
+
+    def refresh(self, file_overrides):
+        """以给定的覆盖文件内容重建一次，返回 {东方财富名称: (同花顺名称, method)}"""
+        with patch.object(sector_mapping, "AsyncSessionLocal", self.session), \
+                patch.object(sector_mapping, "load_override_file", return_value=file_overrides):
+            asyncio.run(sector_mapping.refresh_sector_mapping())
+        return {self.names[r["em_sector_id"]]: (self.names[r["ths_sector_id"]], r["method"]) for r in self.rows}
+
+
+class TestRefreshOverrides:
+    """覆盖文件的修改在后续重建中生效"""
+
+    def test_file_edit_and_null_after_refresh(self):
+        store = FakeMappingStore(["酿酒行业", "半导体"], ["白酒", "饮料", "半导体"])
+
+        assert store.refresh({"酿酒行业": "白酒"}) == {"酿酒行业": ("白酒", "override"), "半导体": ("半导体", "exact")}
+        assert store.refresh({"酿酒行业": "饮料"})["酿酒行业"] == ("饮料", "override")
+        assert "酿酒行业" not in store.refresh({"酿酒行业": None})
+
+    def test_table_manual_kept_unless_file_lists_name(self):
+        store = FakeMappingStore(["酿酒行业"], ["白酒", "饮料"])
+        store.rows = [{"em_sector_id": 1, "ths_sector_id": 101, "method": "manual"}]
+
+        assert store.refresh({}) == {"酿酒行业": ("白酒", "manual")}
+        assert store.refresh({"酿酒行业": "饮料"}) == {"酿酒行业": ("饮料", "override")}
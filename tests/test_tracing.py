@@ -0,0 +1,171 @@
+# tests/test_tracing.py
+"""span 追踪测试"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from benchmarks import upstreams
+from python_cli_starter import market, profiling, tracing
+
+
+@pytest.fixture(autouse=True)
+def clean_buffer():
+    tracing.buffer.spans.clear()
+    yield
+    tracing.buffer.spans.clear()
+
+
+class TestSpans:
+    """span 基本行为测试"""
+
+    def test_parent_child_and_attributes(self):
+        with tracing.span("root", kind="test") as root:
+            with tracing.span("child") as child:
+                tracing.set_attributes(rows=3)
+            assert tracing.current_span() is root
+        assert tracing.current_span() is None
+
+        assert child.trace_id == root.trace_id and child.parent_id == root.span_id
+        assert child.attributes == {"rows": 3}
+        assert root.duration_ms >= child.duration_ms >= 0
+
+    def test_error_status(self):
+        with pytest.raises(ValueError):
+            with tracing.span("failing"):
+                raise ValueError("boom")
+        span = tracing.buffer.spans[-1]
+        assert span.status == "error" and "boom" in span.error
+
+    @pytest.mark.asyncio
+    async def test_tasks_and_threads_inherit_parent(self):
+        @tracing.traced("worker")
+        async def worker(i):
+            await asyncio.sleep(0)
+            return tracing.current_span().parent_id
+
+        def in_thread():
+            with tracing.span("thread") as span:
+                return span.parent_id
+
+        with tracing.span("root") as root:
+            parents = await asyncio.gather(worker(1), worker(2))
+            thread_parent = await asyncio.to_thread(in_thread)
+        assert parents == [root.span_id, root.span_id]
+        assert thread_parent == root.span_id
+
+    @pytest.mark.asyncio
+    async def test_cancelled_status(self):
+        async def slow():
+            with tracing.span("slow"):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert tracing.buffer.spans[-1].status == "cancelled"
+
+    def test_jsonl_exporter(self, tmp_path):
+        exporter = tracing.JsonLinesExporter(str(tmp_path / "spans.jsonl"))
+        with patch.object(tracing, "exporters", [tracing.buffer, exporter]):
+            with tracing.span("root"):
+                with tracing.span("child", page=1):
+                    pass
+        exporter.flush()
+        lines = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text(encoding="utf-8").splitlines()]
+        assert [line["name"] for line in lines] == ["child", "root"]
+        assert lines[0]["parent_id"] == lines[1]["span_id"]
+        assert lines[0]["attributes"] == {"page": 1}
+
+    def test_jsonl_exporter_writes_off_caller_thread(self, tmp_path):
+        """export 只入队，文件写入在后台线程进行；队列满时丢弃而不阻塞"""
+        import threading
+        writers = []
+        exporter = tracing.JsonLinesExporter(str(tmp_path / "spans.jsonl"), max_pending=1)
+        original = exporter._write
+        started, release = threading.Event(), threading.Event()
+
+        def slow_write(records):
+            writers.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+            original(records)
+
+        exporter._write = slow_write
+        with patch.object(tracing, "exporters", [exporter]):
+            with tracing.span("first"):
+                pass
+            assert started.wait(5)  # 后台线程已取走第一条，正在写入
+            for name in ("second", "third"):
+                with tracing.span(name):
+                    pass
+        assert exporter.dropped == 1
+        release.set()
+        exporter.flush()
+        assert writers[0] == "trace-writer"
+        names = [json.loads(line)["name"] for line in (tmp_path / "spans.jsonl").read_text(encoding="utf-8").splitlines()]
+        assert names == ["first", "second"]
+
+    def test_recent_traces_filters(self):
+        for name in ("a", "b", "a"):
+            with tracing.span(name):
+                with tracing.span("child"):
+                    pass
+        traces = tracing.recent_traces(name="a")
+        assert len(traces) == 2 and all(t["span_count"] == 2 for t in traces)
+        assert tracing.recent_traces(limit=1)[0]["name"] == "a"
+        assert tracing.recent_traces(min_duration_ms=10_000) == []
+
+
+class TestPipelineSpans:
+    """抓取流水线埋点测试"""
+
+    @pytest.mark.asyncio
+    async def test_eastmoney_fetch_stages(self):
+        app = upstreams.create_app(upstreams.UpstreamConfig(eastmoney_boards=250))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as client:
+            with tracing.span("root") as root:
+                batch = await market.fetch_eastmoney_batch(cookie="a=b", client=client)
+
+        spans = tracing.get_trace(root.trace_id)
+        fetch = next(s for s in spans if s["name"] == "eastmoney.fetch")
+        assert fetch["parent_id"] == root.span_id
+        assert fetch["attributes"] == {"fs_type": 2, "cookie_provided": True, "pages": 3, "rows": len(batch)}
+
+        pages = [s for s in spans if s["name"] == "eastmoney.page"]
+        assert sorted(p["attributes"]["page"] for p in pages) == [1, 2, 3]
+        assert all(p["parent_id"] == fetch["span_id"] and p["attributes"]["bytes"] > 0 for p in pages)
+        assert all(p["attributes"]["retries"] == 0 for p in pages)
+        decodes = [s for s in spans if s["name"] == "eastmoney.decode"]
+        assert {d["parent_id"] for d in decodes} == {p["span_id"] for p in pages}
+        assert next(s for s in spans if s["name"] == "eastmoney.parse")["attributes"] == {"rows": 250}
+
+    def test_strategy_trace_via_debug_endpoint(self):
+        import pandas as pd
+        from python_cli_starter.main import app
+        from python_cli_starter.strategies import rsi_strategy
+
+        nav = pd.DataFrame({"净值日期": pd.date_range(end=pd.Timestamp.today(), periods=60).strftime("%Y-%m-%d"), "单位净值": [1.0 + i * 0.01 for i in range(60)]})
+        client = TestClient(app)
+        with patch.object(rsi_strategy.ak, "fund_open_fund_info_em", return_value=nav):
+            assert client.get("/strategies/rsi/000001").status_code == 200
+
+        assert client.get("/debug/traces").status_code == 404  # 未配置口令
+        headers = {profiling.TOKEN_HEADER: "secret"}
+        with patch.object(profiling, "_config", profiling.ProfilingConfig(token="secret")):
+            assert client.get("/debug/traces", headers={profiling.TOKEN_HEADER: "wrong"}).status_code == 404
+            traces = client.get("/debug/traces", params={"name": "strategy.run"}, headers=headers).json()
+            assert len(traces) == 1 and traces[0]["attributes"] == {"strategy": "rsi", "fund_code": "000001"}
+            assert client.get(f"/debug/traces/{traces[0]['trace_id']}").status_code == 404
+
+            detail = client.get(f"/debug/traces/{traces[0]['trace_id']}", headers=headers).json()
+            assert client.get("/debug/traces/unknown", headers=headers).status_code == 404
+        spans = {s["name"]: s for s in detail["spans"]}
+        assert set(spans) == {"strategy.run", "akshare.nav", "strategy.compute"}
+        assert spans["akshare.nav"]["parent_id"] == spans["strategy.run"]["span_id"]
+        assert spans["strategy.compute"]["attributes"] == {"strategy": "rsi"}